@@ -0,0 +1,133 @@
+"""
+Speed and cluster quality of the spherical (cosine) k-means engine against the scikit-learn KMeans path
+that ClusterManager uses by default.
+
+The vectors are fake embeddings of synthetic paragraphs, each written about one of the synthetic topics, so the
+topic of every paragraph is the ground truth. Quality is the adjusted Rand index against the topics and the mean
+cosine similarity of each vector to the normalized mean of its cluster. Embedding models do not all return
+unit-length vectors; --norm-spread scales every vector by a random factor to mimic one that does not.
+
+Usage:
+    python benchmarks/clustering_benchmark.py --sizes 10000 50000
+    python benchmarks/clustering_benchmark.py --sizes 10000 50000 --norm-spread 2 --check
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+import numpy as np
+from benchmarks.synthetic import TOPIC_WORDS, FILLER_WORDS
+from models.fakes import FakeEmbeddings
+from clustering.spherical_kmeans import SphericalKMeans, normalize_rows
+
+DEFAULT_SIZES = [10000, 50000]
+# The spherical engine passes the check when its adjusted Rand index is at most this much below scikit-learn's
+DEFAULT_ARI_MARGIN = 0.02
+
+
+def labeled_vectors(count, dimension=384, seed=0, norm_spread=1.0, paragraph_words=(20, 120)):
+    """
+    Embeds synthetic paragraphs of random topics and lengths with the fake embeddings.
+
+    :param norm_spread: Vectors are scaled by a random factor between 1 / norm_spread and norm_spread
+    :return: Tuple of the float32 vectors and the topic of every vector
+    """
+    rng = np.random.default_rng(seed)
+    topics = list(TOPIC_WORDS)
+    labels = rng.integers(len(topics), size=count)
+    paragraphs = []
+    for label, length in zip(labels, rng.integers(*paragraph_words, size=count)):
+        topic_words = TOPIC_WORDS[topics[label]]
+        # Roughly half topic words and half filler words, like benchmarks.synthetic.generate_document
+        words = [topic_words[rng.integers(len(topic_words))] if rng.random() < 0.5 else FILLER_WORDS[rng.integers(len(FILLER_WORDS))]
+                 for _ in range(length)]
+        paragraphs.append(" ".join(words))
+    vectors = np.asarray(FakeEmbeddings(dimension).embed_documents(paragraphs), dtype=np.float32)
+    if norm_spread > 1:
+        vectors *= np.exp(rng.uniform(-np.log(norm_spread), np.log(norm_spread), size=(count, 1))).astype(np.float32)
+    return vectors, labels
+
+
+def cohesion(vectors, labels):
+    """
+    :return: Mean cosine similarity of the vectors to the normalized mean of their cluster
+    """
+    unit = normalize_rows(vectors)
+    similarities = np.empty(len(unit), dtype=np.float32)
+    for label in np.unique(labels):
+        members = labels == label
+        center = unit[members].sum(axis=0)
+        similarities[members] = unit[members] @ (center / max(np.linalg.norm(center), 1e-12))
+    return float(similarities.mean())
+
+
+def cluster_sklearn(vectors, n_clusters):
+    from sklearn.cluster import KMeans
+
+    return KMeans(n_clusters=n_clusters, random_state=0, n_init="auto").fit_predict(vectors)
+
+
+def cluster_spherical(vectors, n_clusters):
+    return SphericalKMeans(n_clusters, random_state=0).fit_predict(vectors)
+
+
+ENGINES = {'sklearn': cluster_sklearn, 'spherical': cluster_spherical}
+
+
+def best_run(function, vectors, n_clusters, repeat):
+    """
+    :return: Tuple of the fastest of repeat runs in seconds and the labels of the last run
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        labels = function(vectors, n_clusters)
+        timings.append(time.perf_counter() - start)
+    return min(timings), labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the spherical k-means engine with scikit-learn KMeans.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Numbers of vectors")
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=len(TOPIC_WORDS))
+    parser.add_argument('--norm-spread', type=float, default=1.0,
+                        help="Scale the vectors by random factors up to this much, 1 keeps them unit length")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check', action='store_true',
+                        help="Fail if the spherical engine is slower than scikit-learn or its adjusted Rand index is lower")
+    parser.add_argument('--ari-margin', type=float, default=DEFAULT_ARI_MARGIN)
+    args = parser.parse_args(argv)
+
+    from sklearn.metrics import adjusted_rand_score
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    print(f"{'vectors':>8} {'engine':<10} {'seconds':>8} {'ARI':>6} {'cohesion':>9} {'speedup':>8}")
+    failures = []
+    for size in args.sizes:
+        vectors, topics = labeled_vectors(size, args.dimension, norm_spread=args.norm_spread)
+        results = {}
+        for name, function in ENGINES.items():
+            seconds, labels = best_run(function, vectors, args.clusters, args.repeat)
+            results[name] = seconds, adjusted_rand_score(topics, labels)
+            speedup = results['sklearn'][0] / seconds
+            print(f"{size:>8} {name:<10} {seconds:>8.3f} {results[name][1]:>6.3f} {cohesion(vectors, labels):>9.4f} {speedup:>7.2f}x")
+        if results['spherical'][0] > results['sklearn'][0]:
+            failures.append(f"slower than scikit-learn at {size} vectors")
+        if results['spherical'][1] < results['sklearn'][1] - args.ari_margin:
+            failures.append(f"lower adjusted Rand index at {size} vectors")
+
+    if args.check and failures:
+        print("FAIL: the spherical engine is " + "; ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
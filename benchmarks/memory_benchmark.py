@@ -0,0 +1,162 @@
+"""
+Peak memory of a summarization run (load, chunk, embed, cluster, topics, themes and summary) on synthetic PDFs
+of growing page counts, with and without low-memory mode.
+
+Every run happens in a fresh process, so the reported peak RSS belongs to that run alone. In the standard
+mode the peak grows with the document, mostly with the list-of-lists vectors. In low-memory mode it should
+stay nearly flat: only the chunk texts, which the later stages need, grow with the page count.
+
+Usage:
+    python benchmarks/memory_benchmark.py --pages 250 500 1000 2000
+    python benchmarks/memory_benchmark.py --pages 250 2000 --check
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+from benchmarks.synthetic import generate_document
+from benchmarks.run_benchmarks import make_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES = [250, 500, 1000, 2000]
+MODES = ['standard', 'low_memory']
+# Low-memory mode passes the check when its peak grows by less than this between the smallest and largest document
+DEFAULT_MAX_GROWTH_MB = 64
+
+
+def write_pdf(path, pages, words_per_page=500):
+    """
+    Writes a synthetic PDF with the given number of pages of generated text.
+
+    :return: Path of the PDF
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for page in range(pages):
+        text = pdf.beginText(40, 750)
+        text.setFont('Helvetica', 8)
+        for paragraph in generate_document(words_per_page, seed=page).split("\n\n"):
+            words = paragraph.split()
+            for start in range(0, len(words), 16):
+                text.textLine(" ".join(words[start:start + 16]))
+            text.textLine("")
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def run_pipeline(config_path, pdf_path):
+    """
+    Summarizes the PDF with the Summarizer and the fake backends, in standard or low-memory mode depending
+    on the config. The UMAP plot is rendered in its own process and is not part of the measured peak, but
+    handing the vectors to that process is.
+
+    :return: Dictionary with the chunk count, the peak RSS and the RSS after imports, in MB
+    """
+    logging.basicConfig(level=logging.WARNING, force=True)
+    os.chdir(ROOT)  # The Summarizer reads its prompts relative to the project root
+    from summarize import Summarizer
+    from utils.metrics import current_rss_bytes, peak_rss_bytes
+    import sklearn.cluster  # noqa: F401  Imported up front so it counts towards the startup memory
+    import scipy.cluster.hierarchy  # noqa: F401
+
+    summarizer = Summarizer(config_path)
+    startup = current_rss_bytes()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        data = summarizer(pdf_path, 'pdf', output_dir=output_dir)
+        peak = peak_rss_bytes()
+        if hasattr(data['umap_image_path'], 'result'):
+            data['umap_image_path'].result()
+        summarizer.visualizer.shutdown()
+
+    return {'chunks': len(data['labels']), 'peak_rss_mb': peak / 2 ** 20, 'startup_rss_mb': startup / 2 ** 20}
+
+
+def run(pages, modes=MODES, config=os.path.join(ROOT, 'config', 'config.yaml'), words_per_page=500, dimension=768):
+    """
+    Measures every mode on a synthetic PDF of each page count, each run in a fresh process.
+
+    :return: Dictionary of mode to page count to measurements
+    """
+    results = {mode: {} for mode in modes}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in pages:
+            pdf_path = write_pdf(os.path.join(work_dir, f'synthetic_{count}.pdf'), count, words_per_page)
+            for mode in modes:
+                # summary_detail 'medium' merges the clusters into topics, so the topic tree is part of the run
+                config_path = make_config(config, {'low_memory': mode == 'low_memory', 'fake_embedding_dimension': dimension,
+                                                   'summary_detail': 'medium'})
+                try:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                        results[mode][str(count)] = executor.submit(run_pipeline, config_path, pdf_path).result()
+                finally:
+                    os.remove(config_path)
+            os.remove(pdf_path)
+    return results
+
+
+def peak_growth_mb(measurements):
+    """
+    :return: Growth of the peak RSS above startup from the smallest to the largest document, in MB
+    """
+    ordered = [measurements[count] for count in sorted(measurements, key=int)]
+    growth = [measured['peak_rss_mb'] - measured['startup_rss_mb'] for measured in ordered]
+    return growth[-1] - growth[0]
+
+
+def print_results(results):
+    print(f"{'mode':<12} {'pages':>7} {'chunks':>8} {'startup MB':>11} {'peak MB':>9} {'above startup MB':>17}")
+    for mode, measurements in results.items():
+        for count, measured in sorted(measurements.items(), key=lambda item: int(item[0])):
+            print(f"{mode:<12} {count:>7} {measured['chunks']:>8} {measured['startup_rss_mb']:>11.1f} "
+                  f"{measured['peak_rss_mb']:>9.1f} {measured['peak_rss_mb'] - measured['startup_rss_mb']:>17.1f}")
+        if len(measurements) > 1:
+            print(f"{mode:<12} peak growth from {min(measurements, key=int)} to {max(measurements, key=int)} pages: "
+                  f"{peak_growth_mb(measurements):.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure peak memory with and without low-memory mode.")
+    parser.add_argument('--pages', type=int, nargs='+', default=DEFAULT_PAGES, help="Page counts of the synthetic PDFs")
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config', 'config.yaml'))
+    parser.add_argument('--words-per-page', type=int, default=500)
+    parser.add_argument('--dimension', type=int, default=768, help="Embedding dimension of the fake embeddings")
+    parser.add_argument('--check', action='store_true', help="Fail if the low-memory peak grows with the page count")
+    parser.add_argument('--max-growth-mb', type=float, default=DEFAULT_MAX_GROWTH_MB)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    results = run(args.pages, args.modes, args.config, args.words_per_page, args.dimension)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.check and 'low_memory' in results and len(results['low_memory']) > 1:
+        growth = peak_growth_mb(results['low_memory'])
+        if growth > args.max_growth_mb:
+            print(f"FAIL: low-memory peak grew by {growth:.1f} MB (limit {args.max_growth_mb:.0f} MB)")
+            return 1
+        print(f"OK: low-memory peak grew by {growth:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
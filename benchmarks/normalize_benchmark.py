@@ -0,0 +1,97 @@
+"""
+Throughput of the text normalization used by the chunker, against the three regex passes it replaced.
+
+The synthetic text is laid out like text extracted from a PDF: lines of about a dozen words, a blank line
+between paragraphs and a share of the words replaced by the characters PDF extraction produces: ligatures,
+curly quotes, dashes, accented and non-Latin words, soft hyphens, zero-width characters and Unicode spaces.
+
+Usage:
+    python benchmarks/normalize_benchmark.py --words 1000000
+    python benchmarks/normalize_benchmark.py --words 1000000 --unicode-share 0 0.02 0.05 0.1 --check
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+import numpy as np
+from benchmarks.synthetic import generate_document
+from chunking.normalize import normalize_text
+
+# Words typical of text extracted from PDFs
+UNICODE_WORDS = ["\ufb01nal", "o\ufb00ice", "“quoted”", "it’s", "café", "naïve", "Straße",
+                 "re\u00adport", "\u00a0", "—", "–", "Zürich", "señor", "東京", "zero\u200bwidth"]
+
+
+def legacy_preprocess(text):
+    """
+    The preprocessing the chunker used before: three regex passes that also dropped every non-ASCII character.
+    """
+    text = re.sub(r'\n+', '\n\n', text)
+    text = re.sub(r'\t+', '\t', text)
+    return re.sub(r'[^\x00-\x7F]+', '', text)
+
+
+def generate_text(num_words, seed=0, unicode_share=0.05, line_words=12):
+    """
+    Generates synthetic PDF-like text where about unicode_share of the words are PDF-style Unicode words.
+
+    :return: The text
+    """
+    rng = np.random.default_rng(seed)
+    paragraphs = []
+    for paragraph in generate_document(num_words, seed=seed).split("\n\n"):
+        words = paragraph.split()
+        swaps = np.flatnonzero(rng.random(len(words)) < unicode_share)
+        for index, pick in zip(swaps, rng.integers(len(UNICODE_WORDS), size=len(swaps))):
+            words[index] = UNICODE_WORDS[pick]
+        paragraphs.append("\n".join(" ".join(words[start:start + line_words])
+                                    for start in range(0, len(words), line_words)))
+    return "\n\n".join(paragraphs)
+
+
+def best_time(function, text, repeat):
+    """
+    :return: Fastest of repeat runs of function(text), in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare text normalization against the legacy regex preprocessing.")
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--unicode-share', type=float, nargs='+', default=[0, 0.02, 0.05, 0.1],
+                        help="Shares of words replaced by Unicode words, one text each")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help="Fail if normalization is slower than the legacy passes")
+    args = parser.parse_args(argv)
+
+    print(f"{'unicode share':>13} {'MB':>6} {'legacy ms':>10} {'normalize ms':>13} {'speedup':>8}")
+    slower = []
+    for share in args.unicode_share:
+        text = generate_text(args.words, unicode_share=share)
+        megabytes = len(text.encode('utf-8')) / 2 ** 20
+        legacy = best_time(legacy_preprocess, text, args.repeat)
+        normalize = best_time(normalize_text, text, args.repeat)
+        print(f"{share:>13.2f} {megabytes:>6.1f} {legacy * 1000:>10.1f} {normalize * 1000:>13.1f} {legacy / normalize:>7.2f}x")
+        if normalize > legacy:
+            slower.append(share)
+
+    if args.check and slower:
+        print(f"FAIL: normalization is slower than the legacy preprocessing at unicode share {slower}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Offline benchmark suite for the summarization pipeline.
+
+Runs the pipeline stages on synthetic documents with the deterministic fake LLM and embedding
+backends, reports per-stage throughput and peak memory, and compares the results to a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import tracemalloc
+import yaml
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+from models.models import ModelManager
+from chunking.textchunking import ChunkManager
+from clustering.clustering import ClusterManager
+from visualize.visualize import render_umap_plot
+from topic_themes.themes import KeywordThemes
+from outputs.report_generate import create_final_report
+from benchmarks.synthetic import generate_document
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+STAGES = ['chunking', 'embedding', 'clustering', 'representatives', 'keyword_themes', 'umap', 'report']
+# A stage regresses when its throughput falls below this fraction of the baseline
+DEFAULT_TOLERANCE = 0.75
+
+
+def make_config(config_path, overrides):
+    """
+    Writes a copy of the project config with the fake backends and the given overrides.
+
+    :return: Path to the temporary config file
+    """
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    config.update({'llm_provider': 'fake', 'embedding_provider': 'fake', 'checkpoint_dir': None, 'artifacts_dir': None})
+    config.update(overrides)
+    handle, path = tempfile.mkstemp(suffix='.yaml')
+    with os.fdopen(handle, 'w') as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def measure(results, stage, items, fn, trace_memory=True):
+    """
+    Records wall time and throughput of the stage from a run of fn without tracing, then its peak traced memory
+    from a second run under tracemalloc (tracing slows down every allocation, so it would skew the timing).
+    fn must give the same result when it runs twice.
+
+    :param trace_memory: Whether to make the second, traced run; the peak memory is None without it
+    :return: The return value of fn
+    """
+    start = time.perf_counter()
+    value = fn()
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    results[stage] = {'seconds': seconds, 'items': items(value) if callable(items) else items,
+                      'peak_memory_mb': peak / 2 ** 20 if peak is not None else None}
+    results[stage]['throughput'] = results[stage]['items'] / seconds if seconds > 0 else float('inf')
+    return value
+
+
+def run_size(config_path, num_words, skip=(), output_dir=None, trace_memory=True):
+    """
+    Runs every stage on a synthetic document of the given size.
+    With trace_memory, every stage runs a second time under tracemalloc for its peak memory.
+
+    :return: Dictionary of stage name to measurements
+    """
+    output_dir = output_dir or tempfile.mkdtemp()
+    text = generate_document(num_words, seed=num_words)
+    model_manager = ModelManager(config_path)
+    chunk_manager = ChunkManager(config_path)
+    cluster_manager = ClusterManager(model_manager, config_path)
+    results = {}
+
+    def chunk():
+        chunk_manager.flexible_chunk(chunk_manager.preprocess_text(text))
+        return chunk_manager.get_chunks()
+
+    def embed():
+        cluster_manager.vectors = []  # Embedding appends to the vectors
+        cluster_manager.embed_documents_with_progress(chunks)
+
+    def run(stage, items, fn):
+        return measure(results, stage, items, fn, trace_memory=trace_memory)
+
+    chunks = run('chunking', num_words, chunk)
+    run('embedding', len(chunks), embed)
+    labels, _ = run('clustering', len(chunks), cluster_manager.cluster_document)
+    representatives = run('representatives', len(chunks), cluster_manager.find_n_closest_representatives)
+    keyword_themes = KeywordThemes(config_path)
+    run('keyword_themes', len(chunks), lambda: keyword_themes.find_themes(chunks, labels))
+
+    themes = {label: model_manager.invoke_llm(chunks[indices[0]]) for label, indices in representatives}
+    image_path = os.path.join(output_dir, f'umap_{num_words}.png')
+    if 'umap' not in skip:
+        run('umap', len(chunks), lambda: render_umap_plot(
+            np.asarray(cluster_manager.vectors, dtype=np.float32), themes, labels,
+            n_neighbors=min(25, len(chunks) - 1), output_image=image_path))
+    if 'report' not in skip:
+        data = {'summary': model_manager.invoke_llm(" ".join(chunks[:20])), 'labels': labels, 'themes': themes,
+                'total_chunks': len(chunks), 'total_words': num_words, 'umap_image_path': image_path}
+        run('report', 1, lambda: create_final_report(data, os.path.join(output_dir, f'report_{num_words}.pdf')))
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds stages whose throughput dropped below tolerance times the baseline throughput.
+
+    :return: List of (size, stage, baseline throughput, current throughput) regressions
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, measured in stages.items():
+            expected = baseline.get(size, {}).get(stage)
+            if expected and measured['throughput'] < tolerance * expected['throughput']:
+                regressions.append((size, stage, expected['throughput'], measured['throughput']))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'words':>9} {'stage':<16} {'seconds':>9} {'items':>9} {'items/s':>12} {'peak MB':>9}")
+    for size, stages in results.items():
+        for stage in STAGES:
+            if stage in stages:
+                r = stages[stage]
+                peak = f"{r['peak_memory_mb']:>9.1f}" if r['peak_memory_mb'] is not None else f"{'-':>9}"
+                print(f"{size:>9} {stage:<16} {r['seconds']:>9.3f} {r['items']:>9} {r['throughput']:>12.1f} {peak}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Document sizes in words")
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config', 'config.yaml'))
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument('--embedding-latency', type=float, default=0.0, help="Simulated seconds per embedding call")
+    parser.add_argument('--skip', nargs='*', default=[], choices=STAGES, help="Stages to skip")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per size; the fastest run of each stage is kept")
+    parser.add_argument('--no-warmup', action='store_true', help="Skip the untimed warm-up run (JIT compilation, imports)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run of every stage that measures peak memory")
+    parser.add_argument('--compare', help="Baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--update-baseline', help="Write the results to this baseline JSON")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    config_path = make_config(args.config, {'fake_llm_latency': args.llm_latency,
+                                            'fake_embedding_latency': args.embedding_latency})
+    try:
+        if not args.no_warmup:
+            run_size(config_path, 2000, skip=args.skip, trace_memory=False)
+        results = {}
+        for size in args.sizes:
+            runs = [run_size(config_path, size, skip=args.skip, trace_memory=not args.no_memory)
+                    for _ in range(max(1, args.repeat))]
+            results[str(size)] = {stage: min((run[stage] for run in runs), key=lambda r: r['seconds']) for stage in runs[0]}
+    finally:
+        os.remove(config_path)
+    print_results(results)
+
+    for path in filter(None, [args.output, args.update_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for size, stage, expected, measured in regressions:
+            print(f"REGRESSION: {stage} at {size} words: {measured:.1f} items/s vs baseline {expected:.1f} items/s")
+        if regressions:
+            return 1
+        print("No regressions against", args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Word pools for the synthetic topics. Each generated paragraph mixes one topic's words
+# with common filler words, so the chunks form recognizable clusters.
+TOPIC_WORDS = {
+    'economy': "jobs inflation wages growth market trade tariffs manufacturing investment budget deficit taxes interest rates".split(),
+    'health': "hospital insulin patients doctors medicare prescription vaccine insurance clinic treatment nurses disease".split(),
+    'education': "students teachers college tuition school loans classroom degree university grants curriculum literacy".split(),
+    'climate': "emissions energy solar wind carbon warming floods drought renewable grid pollution wildfire".split(),
+    'security': "border military defense troops alliance missiles intelligence veterans cyber sanctions treaty navy".split(),
+    'technology': "software chips internet data privacy startups algorithms cloud semiconductors broadband robots research".split(),
+    'justice': "courts judges police rights voting crime prisons lawyers reform constitution jury evidence".split(),
+    'housing': "rent mortgages homes construction zoning tenants landlords neighborhoods affordability eviction builders loans".split(),
+}
+FILLER_WORDS = "the a and of to in that for is on with as by this we our they it be are was will have more".split()
+
+
+def generate_document(num_words, seed=0, sentence_words=(8, 20), paragraph_sentences=(3, 8)):
+    """
+    Generates a deterministic synthetic document with paragraph and sentence structure.
+
+    :param num_words: Approximate number of words in the document
+    :param seed: Random seed; the same seed always gives the same document
+    :param sentence_words: Range of words per sentence
+    :param paragraph_sentences: Range of sentences per paragraph
+    :return: The document text
+    """
+    rng = np.random.default_rng(seed)
+    topics = list(TOPIC_WORDS)
+    paragraphs = []
+    words_written = 0
+    while words_written < num_words:
+        topic_words = TOPIC_WORDS[topics[rng.integers(len(topics))]]
+        sentences = []
+        for _ in range(rng.integers(*paragraph_sentences)):
+            length = int(rng.integers(*sentence_words))
+            # Roughly half topic words and half filler words
+            from_topic = rng.random(length) < 0.5
+            topic_picks = rng.integers(len(topic_words), size=length)
+            filler_picks = rng.integers(len(FILLER_WORDS), size=length)
+            words = [topic_words[t] if use_topic else FILLER_WORDS[f]
+                     for use_topic, t, f in zip(from_topic, topic_picks, filler_picks)]
+            sentences.append(" ".join(words).capitalize() + ".")
+            words_written += length
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
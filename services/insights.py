@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Concurrent, cached LLM questions about a dataset. Answers are cached per dataset fingerprint
+# (schema plus a hash of the file content) and question, so re-running on an unchanged file is free.
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Hashes the content of a file in blocks, without loading it into memory.
+
+    :return: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(profile, content_digest):
+    """
+    Identifies a dataset by its schema (column names and types) and the hash of its content.
+
+    :param profile: Result of profiler.profile_table
+    :param content_digest: Result of file_digest
+    :return: Hex fingerprint
+    """
+    schema = [[name, column['dtypes']] for name, column in profile['columns'].items()]
+    return hashlib.blake2b(json.dumps([schema, content_digest]).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class InsightCache:
+    """
+    Answers stored as one JSON file per dataset fingerprint under cache_dir.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint}.json")
+
+    def load(self, fingerprint):
+        """
+        :return: Dictionary of question to answer (empty if nothing is cached)
+        """
+        try:
+            with open(self._path(fingerprint), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self, fingerprint, answers):
+        """
+        Adds answers to the cache of a dataset; the file is replaced atomically.
+        """
+        with self.lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cached = self.load(fingerprint)
+            cached.update(answers)
+            temporary = self._path(fingerprint) + '.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(cached, f, indent=2)
+            os.replace(temporary, self._path(fingerprint))
+
+
+def ask_all(ask, questions, max_concurrency=4, cache=None, fingerprint=None):
+    """
+    Answers the questions concurrently, at most max_concurrency at a time. Cached answers are reused
+    and new answers are added to the cache; a failed question is reported and not cached.
+
+    :param ask: Callable taking a question and returning the answer text
+    :param questions: List of questions
+    :param max_concurrency: Maximum questions in flight
+    :param cache: Optional; InsightCache
+    :param fingerprint: Dataset fingerprint, required with a cache
+    :return: Dictionary of question to {'answer', 'seconds', 'cached', 'error'}, in question order
+    """
+    cached = cache.load(fingerprint) if cache is not None else {}
+    results = {question: {'answer': cached[question], 'seconds': 0.0, 'cached': True, 'error': None}
+               for question in questions if question in cached}
+
+    def run(question):
+        start = time.perf_counter()
+        try:
+            answer, error = ask(question), None
+        except Exception as e:
+            logger.error("Question failed: %s: %s", question, e)
+            answer, error = None, str(e)
+        return {'answer': answer, 'seconds': time.perf_counter() - start, 'cached': False, 'error': error}
+
+    pending = [question for question in dict.fromkeys(questions) if question not in results]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            for question, result in zip(pending, executor.map(run, pending)):
+                results[question] = result
+        if cache is not None:
+            cache.save(fingerprint, {question: results[question]['answer'] for question in pending
+                                     if results[question]['error'] is None})
+    return {question: results[question] for question in questions}
@@ -0,0 +1,381 @@
+import os
+import zlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-pass, bounded-memory profiling of large CSV and Parquet files.
+# The file is read in chunks; every column keeps small mergeable sketches (moments, a uniform sample
+# for quantiles and a Misra-Gries heavy-hitter summary), and groups of columns are profiled in parallel.
+# The numeric columns additionally share pairwise co-moments for the correlation matrix.
+
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class Moments:
+    """
+    Count, mean, variance, min and max, updated a chunk at a time and merged with Chan's parallel formula.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            chunk = Moments()
+            chunk.count, chunk.mean = len(values), float(values.mean())
+            chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+            chunk.min, chunk.max = float(values.min()), float(values.max())
+            self.merge(chunk)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    def summary(self):
+        if not self.count:
+            return {}
+        std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+        return {'count': self.count, 'mean': self.mean, 'std': std, 'min': self.min, 'max': self.max}
+
+
+class CoMoments:
+    """
+    Pairwise count, means, second moments and co-moment of a set of numeric columns, for a correlation
+    matrix with pairwise-complete observations. Every statistic is a matrix indexed by the column pair,
+    updated a chunk at a time and merged element-wise with the same Chan formula as Moments.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        shape = (len(self.columns), len(self.columns))
+        self.count = np.zeros(shape)
+        self.mean_x = np.zeros(shape)  # Mean of column i over the rows where both i and j are present
+        self.mean_y = np.zeros(shape)  # Mean of column j over the same rows
+        self.m2_x = np.zeros(shape)
+        self.m2_y = np.zeros(shape)
+        self.co_m2 = np.zeros(shape)
+
+    def update(self, frame):
+        values = frame[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        present = np.isfinite(values)
+        if not present.any():
+            return
+        mask = present.astype(np.float64)
+        values = np.where(present, values, 0.0)
+        # Shifting by the chunk means keeps the sums small; the shift cancels out of the centered moments
+        shift = values.sum(axis=0, keepdims=True) / np.maximum(mask.sum(axis=0, keepdims=True), 1)
+        values = (values - shift) * mask
+
+        chunk = CoMoments(self.columns)
+        chunk.count = mask.T @ mask
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums = values.T @ mask  # [i, j]: sum of column i over the rows where j is present too
+            chunk.mean_x = np.nan_to_num(sums / chunk.count)
+            chunk.mean_y = chunk.mean_x.T.copy()
+            chunk.m2_x = (values ** 2).T @ mask - sums * chunk.mean_x
+            chunk.m2_y = chunk.m2_x.T.copy()
+            chunk.co_m2 = values.T @ values - sums * chunk.mean_y
+        chunk.mean_x += shift.T
+        chunk.mean_y += shift
+        self.merge(chunk)
+
+    def merge(self, other):
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.nan_to_num(self.count * other.count / count)
+            share = np.nan_to_num(other.count / count)
+        delta_x, delta_y = other.mean_x - self.mean_x, other.mean_y - self.mean_y
+        self.mean_x += delta_x * share
+        self.mean_y += delta_y * share
+        self.m2_x += other.m2_x + delta_x ** 2 * weight
+        self.m2_y += other.m2_y + delta_y ** 2 * weight
+        self.co_m2 += other.co_m2 + delta_x * delta_y * weight
+        self.count = count
+
+    def correlation(self):
+        """
+        :return: Pearson correlation matrix (NaN where a pair has fewer than two rows or no variance)
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matrix = self.co_m2 / np.sqrt(self.m2_x * self.m2_y)
+        matrix[self.count < 2] = np.nan
+        return np.clip(matrix, -1.0, 1.0)
+
+
+class UniformSample:
+    """
+    Uniform sample of bounded size (bottom-k sampling): every value gets a random key and the values
+    with the smallest keys are kept. Chunks are sampled with vectorised operations and samples merge exactly.
+    """
+
+    def __init__(self, size=10000, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.values = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            self._keep(np.concatenate([self.keys, self.rng.random(len(values))]), np.concatenate([self.values, values]))
+
+    def merge(self, other):
+        self._keep(np.concatenate([self.keys, other.keys]), np.concatenate([self.values, other.values]))
+
+    def _keep(self, keys, values):
+        if len(keys) > self.size:
+            kept = np.argpartition(keys, self.size)[:self.size]
+            keys, values = keys[kept], values[kept]
+        self.keys, self.values = keys, values
+
+    def quantiles(self, quantiles=QUANTILES):
+        if not len(self.values):
+            return {}
+        return {f"p{round(q * 100)}": float(value) for q, value in zip(quantiles, np.quantile(self.values, quantiles))}
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary of the most frequent values with at most k counters. Reported counts are lower bounds
+    that undercount by at most (values seen) / (k + 1); summaries merge by adding counters and subtracting
+    the (k + 1)-th largest count.
+    """
+
+    def __init__(self, k=50):
+        self.k = k
+        self.counters = pd.Series(dtype=np.int64)
+
+    def update(self, values):
+        self.merge_counts(pd.Series(values).value_counts(sort=False))
+
+    def merge(self, other):
+        self.merge_counts(other.counters)
+
+    def merge_counts(self, counts):
+        counters = self.counters.add(counts, fill_value=0) if len(self.counters) else counts.astype(np.int64)
+        if len(counters) > self.k:
+            cutoff = counters.nlargest(self.k + 1).iloc[-1]
+            counters = counters[counters > cutoff] - cutoff
+        self.counters = counters.astype(np.int64)
+
+    def top(self, n=None):
+        top = self.counters.sort_values(ascending=False, kind='stable')[:n]
+        return [(value, int(count)) for value, count in top.items()]
+
+
+class ColumnProfile:
+    """
+    Sketches of one column. Numeric chunks feed the moments and the quantile sample,
+    other chunks feed the heavy hitters, so a column whose inferred type changes between chunks keeps both.
+    """
+
+    def __init__(self, name, sample_size=10000, top_k=50):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.dtypes = set()
+        self.moments = Moments()
+        self.sample = UniformSample(sample_size, seed=zlib.crc32(str(name).encode('utf-8')))
+        self.heavy_hitters = HeavyHitters(top_k)
+
+    def update(self, series):
+        self.rows += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.dtypes.add(str(series.dtype))
+        if pd.api.types.is_bool_dtype(series.dtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+            self.heavy_hitters.update(values.astype(str))
+        else:
+            values = values.to_numpy(dtype=np.float64)
+            values = values[np.isfinite(values)]
+            self.moments.update(values)
+            self.sample.update(values)
+
+    def summary(self, top_n=10):
+        summary = {'rows': self.rows, 'nulls': self.nulls, 'dtypes': sorted(self.dtypes)}
+        if self.moments.count:
+            summary.update(self.moments.summary())
+            summary['quantiles'] = self.sample.quantiles()
+        if len(self.heavy_hitters.counters):
+            summary['top_values'] = self.heavy_hitters.top(top_n)
+        return summary
+
+
+def _detect_format(path, file_format=None):
+    file_format = file_format or os.path.splitext(path)[1].lower().lstrip('.')
+    if file_format in ('parquet', 'pq'):
+        return 'parquet'
+    if file_format in ('csv', 'txt'):
+        return 'csv'
+    raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def list_columns(path, file_format=None):
+    """
+    Reads only the header (CSV) or the schema (Parquet).
+
+    :return: List of column names
+    """
+    if _detect_format(path, file_format) == 'parquet':
+        import pyarrow.parquet as pq  # Only needed for Parquet files
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_chunks(path, columns=None, chunk_size=100000, file_format=None):
+    """
+    Yields the file as DataFrames of at most chunk_size rows, reading only the given columns.
+    """
+    if _detect_format(path, file_format) == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size, low_memory=True)
+
+
+def profile_columns(path, columns, chunk_size=100000, file_format=None, sample_size=10000, top_k=50):
+    """
+    Profiles a group of columns in a single pass over the file.
+
+    :return: Dictionary of column name to ColumnProfile
+    """
+    profiles = {column: ColumnProfile(column, sample_size, top_k) for column in columns}
+    for chunk in iter_chunks(path, columns, chunk_size, file_format):
+        for column in columns:
+            profiles[column].update(chunk[column])
+    return profiles
+
+
+def numeric_columns(path, file_format=None, rows=1000):
+    """
+    Infers the numeric (non-boolean) columns from the first rows of the file.
+
+    :return: List of column names
+    """
+    head = next(iter_chunks(path, None, rows, file_format), pd.DataFrame())
+    return [column for column in head.columns
+            if pd.api.types.is_numeric_dtype(head[column].dtype) and not pd.api.types.is_bool_dtype(head[column].dtype)]
+
+
+def correlate_columns(path, columns, chunk_size=100000, file_format=None):
+    """
+    Accumulates the pairwise co-moments of the given numeric columns in a single pass over the file.
+    Values that are not numbers in later chunks count as missing.
+
+    :return: CoMoments instance
+    """
+    co_moments = CoMoments(columns)
+    for chunk in iter_chunks(path, columns, chunk_size, file_format):
+        co_moments.update(chunk)
+    return co_moments
+
+
+def profile_table(path, chunk_size=100000, max_workers=None, file_format=None, sample_size=10000, top_k=50, top_n=10,
+                  max_correlation_columns=50):
+    """
+    Profiles a CSV or Parquet file in bounded memory. The columns are split into groups that are
+    profiled in parallel worker processes; each worker reads only its own columns, one chunk at a time.
+
+    :param path: Path to the CSV or Parquet file
+    :param chunk_size: Rows per chunk
+    :param max_workers: Worker processes (column groups). Defaults to the number of CPUs.
+    :param file_format: Optional; 'csv' or 'parquet'. Detected from the extension if not given.
+    :param sample_size: Values kept per numeric column for the approximate quantiles
+    :param top_k: Counters kept per column for the heavy hitters
+    :param top_n: Heavy hitters reported per column
+    :param max_correlation_columns: Numeric columns (the first ones in file order) included in the correlation
+                                    matrix; its cost grows with the square of this number. 0 disables it.
+    :return: Dictionary with the row count, a summary per column in file order and, with at least two numeric
+             columns, the correlation matrix
+    """
+    columns = list_columns(path, file_format)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(columns)))
+    groups = [columns[i::workers] for i in range(workers)]
+    logger.info("Profiling %d columns of %s in %d groups", len(columns), path, workers)
+
+    # Co-moments need every numeric column of a row together, so they get their own pass next to the column groups
+    numeric = numeric_columns(path, file_format)[:max_correlation_columns] if columns and max_correlation_columns else []
+    if len(numeric) < 2:
+        numeric = []
+
+    profiles, co_moments = {}, None
+    if workers == 1:
+        profiles.update(profile_columns(path, columns, chunk_size, file_format, sample_size, top_k))
+        if numeric:
+            co_moments = correlate_columns(path, numeric, chunk_size, file_format)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(profile_columns, path, group, chunk_size, file_format, sample_size, top_k)
+                       for group in groups]
+            correlation = executor.submit(correlate_columns, path, numeric, chunk_size, file_format) if numeric else None
+            for future in futures:
+                profiles.update(future.result())
+            co_moments = correlation.result() if correlation else None
+
+    rows = profiles[columns[0]].rows if columns else 0
+    profile = {'source': os.path.basename(path), 'rows': rows,
+               'columns': {column: profiles[column].summary(top_n) for column in columns}}
+    if co_moments is not None:
+        profile['correlations'] = {'columns': numeric, 'matrix': co_moments.correlation().tolist()}
+    return profile
+
+
+def _format_number(value):
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+
+def format_profile(profile, max_values=5, max_pairs=5):
+    """
+    Renders a profile as compact text for an LLM prompt or a console report.
+
+    :param profile: Result of profile_table
+    :param max_values: Heavy hitters shown per column
+    :param max_pairs: Most correlated column pairs shown
+    :return: Text with one line per column, then the strongest correlations
+    """
+    lines = [f"Dataset {profile['source']}: {profile['rows']} rows, {len(profile['columns'])} columns"]
+    for name, column in profile['columns'].items():
+        parts = [f"{name} ({'/'.join(column['dtypes'])})", f"nulls={column['nulls']}"]
+        if 'mean' in column:
+            parts.append(" ".join(f"{key}={_format_number(column[key])}" for key in ('mean', 'std', 'min', 'max')))
+            parts.append(" ".join(f"{key}={_format_number(value)}" for key, value in column['quantiles'].items()))
+        if 'top_values' in column:
+            parts.append("top: " + ", ".join(f"{value} ({count})" for value, count in column['top_values'][:max_values]))
+        lines.append("- " + "; ".join(parts))
+    pairs = strongest_correlations(profile, max_pairs)
+    if pairs:
+        lines.append("Strongest correlations: " + ", ".join(f"{a}~{b} r={r:.2f}" for a, b, r in pairs))
+    return "\n".join(lines)
+
+
+def strongest_correlations(profile, n=5):
+    """
+    :param profile: Result of profile_table
+    :param n: Pairs to return
+    :return: List of (column, column, correlation) tuples with the largest absolute correlations
+    """
+    if 'correlations' not in profile:
+        return []
+    columns = profile['correlations']['columns']
+    matrix = np.array(profile['correlations']['matrix'], dtype=np.float64)
+    rows, cols = np.triu_indices(len(columns), k=1)
+    values = matrix[rows, cols]
+    order = [i for i in np.argsort(-np.abs(values), kind='stable') if np.isfinite(values[i])][:n]
+    return [(columns[rows[i]], columns[cols[i]], float(values[i])) for i in order]
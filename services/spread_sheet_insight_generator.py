@@ -1,95 +1,137 @@
-import pandas as pd
+import sys
 import yaml
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from pandasai import SmartDataframe
-from langchain_groq.chat_models import ChatGroq
-from langchain_ollama import OllamaLLM 
+from profiler import profile_table, format_profile, strongest_correlations
+from insights import file_digest, dataset_fingerprint, InsightCache, ask_all
 
 # Load environment variables
 load_dotenv()
 
 # Function to load configuration from YAML file
-def load_config(config_path="config\config.yaml"):
+def load_config(config_path="config/config.yaml"):
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
     return config
 
-# Load configuration
-config = load_config()
-
 # Function to select the LLM based on the config.yaml file
 def initialize_llm(config):
     if config['llm_provider'] == "groq":
+        from langchain_groq.chat_models import ChatGroq
         print(f"Using Groq LLM Model: {config['llm_model']}")
         return ChatGroq(model=config['llm_model'])
     elif config['llm_provider'] == "ollama":
+        from langchain_ollama import OllamaLLM
         print(f"Using Ollama LLM Model: {config['llm_model']}")
         return OllamaLLM(model=config['llm_model']) 
     else:
         raise ValueError("Unsupported LLM provider specified in config.yaml.")
 
-# Initialize the LLM based on configuration
-llm = initialize_llm(config)
-
-# Load the dataset
-try:
-    df = pd.read_csv("samples\Train.csv")  # Specify correct path to the CSV file
-except FileNotFoundError:
-    raise Exception("CSV file not found. Please check the path to the dataset.")
+def ask(llm, profile_text, question):
+    """
+    Asks the LLM a question about the dataset. Only the compact profile is sent, never the rows.
+    """
+    prompt = f"You are a data analyst. Here is a profile of a dataset:\n{profile_text}\n\n{question}\nBe concise."
+    response = llm.invoke(prompt)
+    return getattr(response, 'content', response)
 
 # Function to generate key insights from the dataset
-def generate_insights(dataframe):
-    # Initialize SmartDataframe with the selected LLM
-    sdf = SmartDataframe(dataframe, config={"llm": llm})
+def generate_insights(path, llm, config):
+    # Profile the file in one chunked pass (it is never loaded into memory as a whole)
+    # and hash its content for the answer cache at the same time
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        digest = executor.submit(file_digest, path)
+        profile = profile_table(path, chunk_size=config.get('profile_chunk_size', 100000),
+                                max_workers=config.get('profile_workers'),
+                                max_correlation_columns=config.get('profile_correlation_columns', 50))
+        fingerprint = dataset_fingerprint(profile, digest.result())
+    profile_text = format_profile(profile)
+    columns = profile['columns']
+
+    # Collect every LLM question first so they can be answered concurrently
+    outlier_question = ("Based on the quantiles, min/max and standard deviations, which numeric columns "
+                        "likely contain outliers, and why?")
+    categorical_cols = [name for name, column in columns.items() if 'top_values' in column]
+    categorical_questions = {col: f"Describe the distribution of {col} and point out data quality issues "
+                                  f"such as inconsistent labels." for col in categorical_cols}
+    trend_question = "What time range does the date column cover and what trends does the profile suggest?"
+    questions = [outlier_question] + list(categorical_questions.values())
+    if 'date' in columns:
+        questions.append(trend_question)
+
+    cache = InsightCache(config['insight_cache_dir']) if config.get('insight_cache_dir') else None
+    results = ask_all(lambda question: ask(llm, profile_text, question), questions,
+                      max_concurrency=config.get('insight_concurrency', 4), cache=cache, fingerprint=fingerprint)
+
+    def answer(question):
+        result = results[question]
+        return result['answer'] if result['error'] is None else f"Failed: {result['error']}"
 
     print("===== Data Insights Report =====\n")
 
-    # 1. Basic Information: Displays general info about the dataset
+    # 1. Basic Information: rows, columns and their types
     print("1. Basic Information:\n")
-    print(dataframe.info(), "\n")
+    print(f"{profile['rows']} rows, {len(columns)} columns")
+    for name, column in columns.items():
+        print(f"  {name}: {'/'.join(column['dtypes'])}")
 
     # 2. Missing Values: Summarizes the number of missing values in each column
-    print("2. Missing Values Summary:\n")
-    print(dataframe.isnull().sum(), "\n")
-
-    # 3. Descriptive Statistics: Generates summary statistics for numeric columns
-    print("3. Descriptive Statistics (Numeric Columns):\n")
-    print(dataframe.describe(), "\n")
-
-    # 4. Correlation Matrix (Plotting using LLM)
-    print("4. Correlation Matrix:\n")
-    correlation_matrix_prompt = "Create a plot of the correlation matrix."
-    correlation_matrix = sdf.chat(correlation_matrix_prompt)
-    print(correlation_matrix)
+    print("\n2. Missing Values Summary:\n")
+    for name, column in columns.items():
+        print(f"  {name}: {column['nulls']}")
+
+    # 3. Descriptive Statistics: moments and approximate quantiles of numeric columns
+    print("\n3. Descriptive Statistics (Numeric Columns):\n")
+    for name, column in columns.items():
+        if 'mean' in column:
+            print(f"  {name}: count={column['count']} mean={column['mean']:.4g} std={column['std']:.4g} "
+                  f"min={column['min']:.4g} max={column['max']:.4g} "
+                  + " ".join(f"{key}={value:.4g}" for key, value in column['quantiles'].items()))
+
+    # 4. Correlation Matrix: Pearson correlations of the numeric columns, from co-moments streamed with the profile
+    print("\n4. Correlation Matrix:\n")
+    if 'correlations' in profile:
+        correlations = profile['correlations']
+        print(pd.DataFrame(correlations['matrix'], index=correlations['columns'], columns=correlations['columns']).round(2))
+        print("\nStrongest correlations:")
+        for a, b, r in strongest_correlations(profile):
+            print(f"  {a} ~ {b}: {r:.2f}")
+    else:
+        print("Fewer than two numeric columns; no correlation matrix.")
 
-    # 5. Outlier Detection: Detects any outliers in the dataset using LLM
+    # 5. Outlier Detection: asks the LLM to read the quantiles and extremes of the numeric columns
     print("\n5. Outlier Detection:\n")
-    outlier_prompt = "Identify any outliers in the dataset."
-    outliers = sdf.chat(outlier_prompt)
-    print(outliers)
+    print(answer(outlier_question))
 
-    # 6. Value Counts for Categorical Columns: Displays the distribution of values for each categorical column
+    # 6. Value Counts for Categorical Columns: the most frequent values of each categorical column
     print("\n6. Categorical Columns Distribution:\n")
-    categorical_cols = dataframe.select_dtypes(include=['object']).columns
     if len(categorical_cols) > 0:
         for col in categorical_cols:
-            print(f"Value counts for {col}:\n", dataframe[col].value_counts(), "\n")
-
-            # Create a plot of the distribution of values for the categorical column
-            plot_prompt = f"Create a plot showing the distribution of {col}."
-            plot_output = sdf.chat(plot_prompt)
-            print(plot_output)
+            print(f"Most frequent values for {col}:\n", columns[col]['top_values'], "\n")
+            print(answer(categorical_questions[col]))
     else:
         print("No categorical columns found.\n")
 
-    # 7. Time-Series Trend Analysis: If 'date' column exists, plots trends over time
-    if 'date' in dataframe.columns:
+    # 7. Time-Series Trend Analysis: If 'date' column exists, describes its coverage
+    if 'date' in columns:
         print("\n7. Time-Series Trend Analysis:\n")
-        trend_prompt = "Plot the trends in the data over time."
-        trends = sdf.chat(trend_prompt)
-        print(trends)
+        print(answer(trend_question))
     else:
         print("\nNo date column detected for trend analysis.\n")
 
-# Call the function to generate insights
-generate_insights(df)
+    # 8. Latency of every question; with concurrency the total is close to the slowest question
+    print("\n8. Question Latency:\n")
+    for question, result in results.items():
+        status = "cached" if result['cached'] else ("failed" if result['error'] else f"{result['seconds']:.2f}s")
+        print(f"  {status:>8}  {question}")
+    return results
+
+def main():
+    config = load_config()
+    llm = initialize_llm(config)
+    path = sys.argv[1] if len(sys.argv) > 1 else "samples/Train.csv"  # CSV or Parquet file
+    generate_insights(path, llm, config)
+
+if __name__ == "__main__":
+    main()
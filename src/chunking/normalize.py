@@ -0,0 +1,89 @@
+import re
+import unicodedata
+
+# Unicode-aware text normalization for chunking. Every line becomes a paragraph: it is NFKC-normalized (ligatures
+# such as the "fi" ligature from PDFs, full-width forms and Unicode spaces become their plain equivalents),
+# control and invisible characters are removed, quotes and dashes are straightened and whitespace runs collapse
+# to single spaces. Accented and non-Latin text is kept.
+#
+# The work is done by C-level string methods: quotes and dashes are replaced in the whole block at once, only lines
+# that are not NFKC-normalized yet are normalized and only lines that are not printable (a tab, a control or an
+# invisible character) are searched for characters to remove, so typical lines are only checked, never rebuilt.
+
+_DELETE = [chr(c) for c in range(0x00, 0x20) if chr(c) not in '\t\n\v\f\r'] + [chr(0x7F)]
+_DELETE += [chr(c) for c in range(0x80, 0xA0) if c != 0x85]  # C1 controls, except NEL (a line break)
+_DELETE += ['\u00ad',                                          # soft hyphen
+            '\u200b', '\u200c', '\u200d', '\u2060', '\ufeff',  # zero-width characters and the BOM
+            '\u200e', '\u200f', '\u202a', '\u202b', '\u202c', '\u202d', '\u202e',
+            '\u2066', '\u2067', '\u2068', '\u2069']            # bidirectional marks
+
+_REPLACE = {
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"', '\u2033': '"',
+    '\u2010': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-', '\u2015': '-', '\u2212': '-',
+}
+
+_INVISIBLE = re.compile('[' + re.escape(''.join(_DELETE)) + ']+')
+
+
+def _straighten(text):
+    """
+    Replaces curly quotes and dashes; each character is searched for and replaced in one C-level pass.
+    """
+    for character, replacement in _REPLACE.items():
+        if character in text:
+            text = text.replace(character, replacement)
+    return text
+
+
+def _normalize_line(line):
+    """
+    Normalizes one line of text whose quotes and dashes are already straightened.
+
+    :return: The normalized line ('' if nothing but whitespace is left)
+    """
+    if not line.isascii() and not unicodedata.is_normalized('NFKC', line):
+        # NFKC can produce quotes and dashes of its own, such as the primes of a double prime
+        line = _straighten(unicodedata.normalize('NFKC', line))
+    if not line.isprintable():
+        return ' '.join(_INVISIBLE.sub('', line).split())
+    # The only whitespace a printable line can hold is the plain space
+    if '  ' in line or line[:1] == ' ' or line[-1:] == ' ':
+        return ' '.join(line.split())
+    return line
+
+
+def normalize_text(text):
+    """
+    Normalizes text for chunking and embedding: NFKC, control and invisible characters removed,
+    curly quotes and dashes straightened and whitespace runs collapsed. Every non-blank line
+    becomes a paragraph and paragraphs are separated by a blank line.
+
+    :param text: The raw text
+    :return: Normalized text
+    """
+    return '\n\n'.join(iter_normalized([text]))
+
+
+def iter_normalized(blocks):
+    """
+    Normalizes a stream of text blocks (for example PDF pages) into paragraphs. The last line of a block
+    is held back until the block that finishes it, so lines that span block boundaries come out the same
+    as if the text had been normalized in one piece.
+
+    :param blocks: Iterable of raw text blocks, in order
+    :return: Generator of normalized paragraphs; joined by blank lines, they equal normalize_text of the joined blocks
+    """
+    carry = ''
+    for block in blocks:
+        if not block.isascii():
+            block = _straighten(block)
+        text = carry + block
+        lines = text.splitlines()
+        # An unfinished last line continues in the next block
+        carry = lines.pop() if lines and text[-1:].splitlines() != [''] else ''
+        yield from filter(None, map(_normalize_line, lines))
+    if carry:
+        paragraph = _normalize_line(carry)
+        if paragraph:
+            yield paragraph
@@ -1,6 +1,9 @@
+import os
 import re
 import yaml
 import logging
+from .normalize import normalize_text, iter_normalized
+from .token_chunking import TokenChunker
 
 # Set up logger
 logging.basicConfig(level=logging.INFO)
@@ -26,23 +29,68 @@ class ChunkManager:
 
         self.flexibility = self.config.get('chunk_flexibility', 0.25)  # Default to 25% flexibility
         self.target_words = self.config.get('target_words', 100)       # Default to 100 words per chunk
+        # 'words' sizes chunks by word count (flexible_chunk), 'tokens' by tokens of the embedding model (token_chunk)
+        self.chunk_mode = self.config.get('chunk_mode', 'words')
+        self.max_tokens = self.config.get('chunk_max_tokens', 256)
+        self.token_chunker = None
         self.chunks = []
         logger.info("ChunkManager initialized with target_words=%d and flexibility=%.2f", self.target_words, self.flexibility)
 
     def preprocess_text(self, text):
         """
-        Cleans the input text by replacing multiple newlines and removing non-ASCII characters.
-        
+        Cleans the input text: every line becomes a paragraph with Unicode normalization (NFKC, quotes and dashes),
+        control and invisible characters removed and whitespace runs collapsed.
+        Accented and non-English text is kept.
+
         :param text: The raw text to be preprocessed.
         :return: Cleaned text.
         """
-        logger.info("Preprocessing text: removing extra newlines and non-ASCII characters")
-        text = re.sub(r'\n+', '\n\n', text)
-        text = re.sub(r'\t+', '\t', text)
-        text = re.sub(r'[^\x00-\x7F]+', '', text)
+        logger.debug("Preprocessing text: normalizing Unicode and whitespace")
+        text = normalize_text(text)
         logger.debug("Preprocessed text: %s", text[:100])  # Log a preview of the preprocessed text
         return text
 
+    def chunk(self, text):
+        """
+        Divides preprocessed text into chunks with the configured chunk_mode.
+
+        :param text: The preprocessed text to be chunked.
+        """
+        if self.chunk_mode == 'tokens':
+            self.token_chunk(text)
+        else:
+            self.flexible_chunk(text)
+
+    def load_token_chunker(self):
+        """
+        Lazily loads the TokenChunker with the tokenizer of chunk_tokenizer_path, or the tokenizer.json
+        of the ONNX embedding model if no path is configured.
+
+        :return: The TokenChunker.
+        :raises ValueError: If no tokenizer is configured and the embedding provider is not ONNX.
+        """
+        if self.token_chunker is None:
+            tokenizer_path = self.config.get('chunk_tokenizer_path')
+            if not tokenizer_path:
+                if self.config.get('embedding_provider') != 'onnx' or not self.config.get('onnx_model_path'):
+                    raise ValueError("chunk_mode 'tokens' needs chunk_tokenizer_path, unless embedding_provider is 'onnx' "
+                                     "and onnx_model_path contains the model's tokenizer.json")
+                tokenizer_path = os.path.join(self.config['onnx_model_path'], 'tokenizer.json')
+            logger.info("Loading tokenizer %s for token chunking", tokenizer_path)
+            self.token_chunker = TokenChunker(tokenizer_path, self.max_tokens)
+        return self.token_chunker
+
+    def token_chunk(self, text):
+        """
+        Divides the text into chunks of at most chunk_max_tokens tokens of the embedding model,
+        keeping paragraphs and then sentences together where they fit.
+
+        :param text: The preprocessed text to be chunked.
+        """
+        logger.info("Chunking text with max_tokens=%d", self.max_tokens)
+        self.chunks = list(self.load_token_chunker().iter_chunks(re.split(r'\n\n', text)))
+        logger.info("Chunking completed with %d chunks", len(self.chunks))
+
     def flexible_chunk(self, text, target_words=None, flexibility=None):
         """
         Divides the text into chunks based on a target word count and flexible chunk size.
@@ -76,21 +124,39 @@ class ChunkManager:
                     target_words, flexibility, min_words, max_words)
 
         paragraphs = re.split(r'\n\n', text)  # Split by paragraphs
-        chunks = []
+        chunks = list(self._chunk_paragraphs(paragraphs, min_words, max_words))
+        self.chunks = chunks
+        logger.info("Chunking completed with %d chunks", len(chunks))
+
+    def _chunk_paragraphs(self, paragraphs, min_words, max_words):
+        """
+        Groups paragraphs into chunks of min_words to max_words words, splitting paragraphs
+        longer than max_words into sentences.
+
+        :param paragraphs: Iterable of paragraphs
+        :param min_words: Minimum words per chunk
+        :param max_words: Maximum words per chunk
+        :return: Generator of chunks
+        """
         current_chunk = []
         current_word_count = 0
 
-        def finalize_chunk(force=False):
-            """Finalizes the current chunk if it meets the minimum word count or if forced."""
-            if current_chunk and (force or current_word_count >= min_words):
-                logger.debug("Finalizing chunk with %d words", current_word_count)
-                chunks.append(' '.join(current_chunk))
-
-        def process_paragraph(paragraph):
-            """Processes a paragraph, splitting it into sentences and adding to chunks."""
-            nonlocal current_chunk, current_word_count
-            sentences = re.split(r'(?<=[.!?]) +', paragraph)  # Split by sentence
-            for sentence in sentences:
+        for paragraph in paragraphs:
+            para_word_count = len(paragraph.split())
+            logger.debug("Processing paragraph with %d words", para_word_count)
+
+            # If the paragraph itself is smaller than the max size, add it to the current chunk
+            if para_word_count <= max_words:
+                current_chunk.append(paragraph)
+                current_word_count += para_word_count
+                if current_word_count >= min_words:
+                    yield ' '.join(current_chunk)
+                    current_chunk = []
+                    current_word_count = 0
+                continue
+
+            # Otherwise split the paragraph into sentences and add them one by one
+            for sentence in re.split(r'(?<=[.!?]) +', paragraph):
                 sentence_word_count = len(sentence.split())
 
                 # If adding the sentence keeps the chunk under the max limit, add it
@@ -100,36 +166,44 @@ class ChunkManager:
 
                 # If the chunk is at or above the minimum, finalize it
                 if current_word_count >= min_words:
-                    finalize_chunk()
+                    if current_chunk:
+                        yield ' '.join(current_chunk)
                     current_chunk = []
                     current_word_count = 0
 
-                # If adding the sentence exceeds the max, finalize and start a new chunk
+                # If adding the sentence exceeds the max, start a new chunk with it
                 elif current_word_count + sentence_word_count > max_words:
-                    finalize_chunk()
                     current_chunk = [sentence]
                     current_word_count = sentence_word_count
 
-        # Process each paragraph and chunk the text accordingly
-        for paragraph in paragraphs:
-            para_word_count = len(paragraph.split())
-            logger.debug("Processing paragraph with %d words", para_word_count)
+        # Finalize any remaining text as the last chunk
+        if current_chunk:
+            logger.debug("Finalizing chunk with %d words", current_word_count)
+            yield ' '.join(current_chunk)
 
-            # If the paragraph itself is smaller than the max size, add it as a chunk
-            if para_word_count <= max_words:
-                current_chunk.append(paragraph)
-                current_word_count += para_word_count
-                if current_word_count >= min_words:
-                    finalize_chunk()
-                    current_chunk = []
-                    current_word_count = 0
-            else:
-                process_paragraph(paragraph)
+    def iter_chunks(self, texts, target_words=None, flexibility=None):
+        """
+        Chunks a stream of texts (for example the pages of a PDF) without joining them into one text.
+        The texts are normalized into paragraphs as a stream and a line that continues into the next text is kept
+        together, so the chunks are the same as chunk gives for the joined, preprocessed text.
+        Unlike flexible_chunk, the target word count is not lowered for short documents,
+        since the total length is not known up front. In 'tokens' chunk_mode the word counts are not used.
 
-        # Finalize any remaining text as the last chunk
-        finalize_chunk(force=True)
-        self.chunks = chunks
-        logger.info("Chunking completed with %d chunks", len(chunks))
+        :param texts: Iterable of raw texts, in document order
+        :param target_words: Optional; target word count per chunk. If not provided, the default is used.
+        :param flexibility: Optional; the percentage flexibility for chunk size. If not provided, the default is used.
+        :return: Generator of chunks
+        """
+        if self.chunk_mode == 'tokens':
+            return self.load_token_chunker().iter_chunks(iter_normalized(texts))
+        if target_words is None:
+            target_words = self.target_words
+        if flexibility is None:
+            flexibility = self.flexibility
+        min_words = int(target_words * (1 - flexibility))
+        max_words = int(target_words * (1 + flexibility))
+
+        return self._chunk_paragraphs(iter_normalized(texts), min_words, max_words)
 
     def get_word_count_per_chunk(self):
         """
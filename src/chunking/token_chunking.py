@@ -0,0 +1,157 @@
+import re
+import logging
+from itertools import islice
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Paragraphs that do not fit in a chunk are split into sentences, the same way flexible_chunk splits them
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?]) +')
+
+
+class TokenChunker:
+    """
+    The TokenChunker class packs paragraphs into chunks of at most max_tokens tokens of the embedding model,
+    so chunks are neither truncated by the model nor much shorter than it can take.
+
+    Tokens are counted with the model's own fast tokenizer (a Hugging Face tokenizer.json). Paragraphs are
+    tokenized a batch at a time and the offset mapping of each paragraph places its tokens in its sentences.
+    Chunks break between paragraphs where possible, between sentences of a paragraph that does not fit in one
+    chunk, and only a sentence that does not fit either is cut, between words. Tokenizers that mark the space
+    before a word (ByteLevel BPE, Metaspace) count a piece differently inside and outside its context, so every
+    packed chunk is tokenized once more, in the same batches, and split again if it went over.
+    """
+
+    def __init__(self, tokenizer_path, max_tokens=256, batch_size=1024):
+        """
+        Loads the tokenizer.
+
+        :param tokenizer_path: Path to a tokenizer.json file.
+        :param max_tokens: Maximum tokens per chunk, including the special tokens the model adds (such as [CLS] and [SEP]).
+        :param batch_size: Number of paragraphs tokenized per call.
+        """
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        # Tokens left for the text once the model has added its special tokens
+        self.budget = max_tokens - self.tokenizer.num_special_tokens_to_add(False)
+        if self.budget < 1:
+            raise ValueError(f"max_tokens={max_tokens} leaves no room for text next to the special tokens")
+
+    def count_tokens(self, text):
+        """
+        :return: Number of tokens the model sees for the text, special tokens included
+        """
+        return len(self.tokenizer.encode(text).ids)
+
+    def _word_starts(self, text, encoding):
+        """
+        :return: Boolean array, True for the tokens that start a whitespace-separated word of the text
+        """
+        offsets = np.array(encoding.offsets, dtype=np.int64).reshape(-1, 2)
+        word_ids = np.array([-1 if word is None else word for word in encoding.word_ids], dtype=np.int64)
+        # A new pre-tokenizer word starts a text word when whitespace comes before it, either between the
+        # tokens (WordPiece offsets leave it out) or inside the token (ByteLevel and Metaspace offsets include it)
+        new_word = word_ids[1:] != word_ids[:-1]
+        spaced = offsets[1:, 0] > offsets[:-1, 1]
+        spaced |= np.array([text[start:start + 1].isspace() for start in offsets[1:, 0]], dtype=bool)
+        return np.concatenate([[True], new_word & spaced])
+
+    def _windows(self, text, encoding, first, last, word_start):
+        """
+        Cuts the tokens first to last of the text into windows of at most budget tokens, between words
+        unless one word fills a whole window.
+
+        :return: Generator of (text, token count)
+        """
+        offsets = encoding.offsets
+        window = first
+        while window < last:
+            stop = min(window + self.budget, last)
+            if stop < last:
+                # Cut before the last word that starts in the window
+                word_starts = np.flatnonzero(word_start[window + 1:stop + 1])
+                if len(word_starts):
+                    stop = window + 1 + int(word_starts[-1])
+            yield text[offsets[window][0]:offsets[stop - 1][1]].strip(), stop - window
+            window = stop
+
+    def _units(self, paragraph, encoding):
+        """
+        Splits a paragraph into pieces of about budget tokens: the whole paragraph, its sentences,
+        or token windows of a sentence that is too long on its own. The counts are those of the pieces
+        inside the paragraph; tokenized on their own they can differ slightly (see _fit).
+
+        :return: Generator of (text, token count)
+        """
+        count = len(encoding)
+        if count <= self.budget:
+            yield paragraph, count
+            return
+
+        ends = np.array(encoding.offsets, dtype=np.int64).reshape(-1, 2)[:, 1]
+        word_start = self._word_starts(paragraph, encoding)
+        breaks = list(_SENTENCE_BREAK.finditer(paragraph))
+        sentences = zip([0] + [match.end() for match in breaks], [match.start() for match in breaks] + [len(paragraph)])
+        for start, end in sentences:
+            # A sentence owns the tokens that end inside it (ByteLevel and Metaspace tokens start at the space before it)
+            first, last = (int(index) for index in np.searchsorted(ends, [start, end], side='right'))
+            if last - first <= self.budget:
+                yield paragraph[start:end], last - first
+            else:
+                yield from self._windows(paragraph, encoding, first, last, word_start)
+
+    def _fit(self, chunks):
+        """
+        Re-tokenizes packed chunks and splits the ones over budget. The token count of a piece depends on
+        its context for tokenizers that mark the space before a word (ByteLevel BPE, Metaspace), so the
+        sum of the piece counts is not always the count of the chunk.
+
+        :param chunks: List of chunks
+        :return: Generator of chunks of at most budget tokens, in order
+        """
+        for chunk, encoding in zip(chunks, self.tokenizer.encode_batch(chunks, add_special_tokens=False)):
+            if len(encoding) <= self.budget:
+                yield chunk
+                continue
+            word_start = self._word_starts(chunk, encoding)
+            pieces = [text for text, _ in self._windows(chunk, encoding, 0, len(encoding), word_start) if text]
+            if chunk in pieces:
+                # Token windows inside one character (multi-byte characters with a tiny budget) cannot be cut apart
+                logger.warning("A chunk of %d tokens could not be split below %d tokens", len(encoding), self.budget)
+                yield chunk
+                continue
+            yield from self._fit(pieces)
+
+    def iter_chunks(self, paragraphs):
+        """
+        Packs a stream of paragraphs into chunks of at most max_tokens tokens, in order.
+        Every packed chunk is tokenized again and split if it went over the budget.
+
+        :param paragraphs: Iterable of paragraphs
+        :return: Generator of chunks
+        """
+        paragraphs = iter(paragraphs)
+        current, current_count = [], 0
+        while True:
+            batch = list(islice(paragraphs, self.batch_size))
+            if not batch:
+                break
+            batch = [paragraph for paragraph in batch if paragraph.strip()]
+            encodings = self.tokenizer.encode_batch(batch, add_special_tokens=False)
+            packed = []
+            for paragraph, encoding in zip(batch, encodings):
+                for text, count in self._units(paragraph, encoding):
+                    if current and current_count + count > self.budget:
+                        packed.append(' '.join(current))
+                        current, current_count = [], 0
+                    current.append(text)
+                    current_count += count
+            yield from self._fit(packed)
+        if current:
+            yield from self._fit([' '.join(current)])
@@ -1,18 +1,24 @@
+import mmap
 import logging
 from tqdm import tqdm
 import yaml
-from sklearn.cluster import KMeans
 import numpy as np
 
 # Set up logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Label given to chunks that are left out of the clusters as outliers
+OUTLIER_LABEL = -1
+
 class ClusterManager:
     """
     The ClusterManager class is responsible for embedding document chunks
-    and clustering them to identify themes or groups. It uses KMeans clustering
-    and provides utilities for finding representative chunks close to the cluster centers.
+    and clustering them to identify themes or groups. It uses KMeans clustering (or spherical k-means
+    on cosine similarity, see clustering_engine) and provides utilities for finding representative chunks close to the cluster centers.
+    Optionally, chunks in sparse regions of the embedding space (boilerplate, off-topic fragments)
+    are detected first and kept out of the clusters, and the vectors can be compressed (PCA and int8 or float16
+    storage) before clustering.
     """
 
     def __init__(self, embedding_model, config_path):
@@ -25,6 +31,8 @@ class ClusterManager:
         self.embedding_model = embedding_model
         self.config = yaml.safe_load(open(config_path, 'r'))
         self.vectors = []
+        self.outliers = None
+        self.compressor = None
         logger.info("ClusterManager initialized with config from %s", config_path)
 
     def embed_documents_with_progress(self, chunks, batch_size=None):
@@ -47,6 +55,150 @@ class ClusterManager:
 
         logger.info("Completed embedding for %d chunks", len(chunks))
 
+    def embed_documents_to_file(self, chunks, path, batch_size=None):
+        """
+        Embeds document chunks like embed_documents_with_progress, but writes each batch straight into
+        a float32 .npy file that is memory-mapped as self.vectors, so the vectors are never all held in memory.
+
+        :param chunks: List of document chunks to embed.
+        :param path: Path of the .npy file to write.
+        :param batch_size: Number of chunks to process in each batch. If None, uses the config value.
+        :return: The memory-mapped vectors.
+        """
+        if batch_size is None:
+            batch_size = self.config.get('embed_batch_size', 10)
+
+        logger.info("Embedding %d document chunks in batches of %d into %s", len(chunks), batch_size, path)
+
+        vectors = None
+        for i in tqdm(range(0, len(chunks), batch_size), desc="Embedding documents"):
+            batch_embeddings = np.asarray(self.embedding_model.embed_documents(chunks[i:i + batch_size]), dtype=np.float32)
+            if vectors is None:
+                # The dimension is only known once the first batch is embedded
+                vectors = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                                    shape=(len(chunks), batch_embeddings.shape[1]))
+            vectors[i:i + len(batch_embeddings)] = batch_embeddings
+            self.vectors = vectors
+            self.release_vectors()
+
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(0, 0))
+        vectors.flush()
+        self.vectors = vectors
+        logger.info("Completed embedding for %d chunks", len(chunks))
+        return vectors
+
+    def distance_block_size(self, count):
+        """
+        Rows and columns per block of pairwise distances. Normally a block spans every vector; in low-memory
+        mode blocks are square and sized so their temporaries stay within an eighth of memory_limit_mb,
+        whatever the number of vectors.
+
+        :param count: Number of vectors
+        :return: Tuple of rows and columns per block
+        """
+        if not self.config.get('low_memory', False):
+            return 1024, max(count, 1)
+        budget = self.config.get('memory_limit_mb', 1024) * 2 ** 20 // 8
+        # A block holds float32 distances plus about two temporaries of the same size
+        size = int(max(16, min(1024, (budget // 12) ** 0.5)))
+        return size, size
+
+    def release_vectors(self):
+        """
+        Drops the pages of memory-mapped vectors that have been read or written from the resident memory
+        of the process. They stay in the page cache and on disk, so reading them again is cheap.
+        Does nothing for vectors held in memory.
+        """
+        mapping = getattr(self.vectors, '_mmap', None)
+        if mapping is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            mapping.madvise(mmap.MADV_DONTNEED)
+
+    def _read_rows(self, indices, window=1024):
+        """
+        Copies rows of the vectors, a window of rows at a time, releasing the mapped pages after each window.
+        Reading scattered rows of a memory-mapped file also maps the pages around them, so reading all rows
+        at once could make most of the file resident.
+
+        :param indices: Sorted row indices
+        :param window: Rows of the file per window
+        :return: Float32 array of the rows
+        """
+        vectors = self._vector_array()
+        rows = np.empty((len(indices), vectors.shape[1]), dtype=np.float32)
+        bounds = np.searchsorted(indices, np.arange(0, len(vectors) + window, window))
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            if high > low:
+                rows[low:high] = vectors[indices[low:high]]
+                self.release_vectors()
+        return rows
+
+    def sample_vectors(self, size, seed=0):
+        """
+        Copies a random sample of the vectors, reading memory-mapped vectors a window at a time.
+
+        :param size: Number of vectors in the sample
+        :param seed: Random seed
+        :return: Tuple of the sorted row indices and a float32 array of their vectors
+        """
+        count = len(self.vectors)
+        rows = np.sort(np.random.default_rng(seed).choice(count, min(size, count), replace=False))
+        return rows, self._read_rows(rows)
+
+    def _vector_array(self):
+        """
+        :return: The vectors as an array without copying arrays (memory-mapped, compressed or not); lists become float32
+        """
+        if isinstance(self.vectors, np.ndarray):
+            return self.vectors
+        return np.asarray(self.vectors, dtype=np.float32)
+
+    def compress_vectors(self, dimension=None, dtype=None, sample_size=None, block_size=4096):
+        """
+        Replaces the vectors with compressed codes: a PCA projection to fewer dimensions, fitted on all vectors
+        a block at a time, stored as int8 (with a scale factor) or float16. Clustering, outlier detection and
+        representative search then run on the codes. The impact of the compression is measured on a sample
+        of the vectors by compression_quality.
+
+        :param dimension: Dimensions kept by the projection. If None, uses the config value.
+        :param dtype: Storage type of the codes ('int8', 'float16' or 'float32'). If None, uses the config value.
+        :param sample_size: Number of vectors the int8 scale and the quality are measured on. If None, uses the config value.
+        :param block_size: Vectors read at a time
+        :return: Tuple of the codes, the fitted EmbeddingCompressor and the quality measurements
+        """
+        from .compression import EmbeddingCompressor, compression_quality
+
+        if dimension is None:
+            dimension = self.config.get('compression_dimension', 128)
+        if dtype is None:
+            dtype = self.config.get('compression_dtype', 'int8')
+        if sample_size is None:
+            sample_size = self.config.get('compression_eval_sample', 2000)
+
+        vectors = self._vector_array()
+        count = len(vectors)
+        sample = np.sort(np.random.default_rng(0).choice(count, min(sample_size, count), replace=False))
+        full_sample = self._read_rows(sample)
+
+        def blocks():
+            for start in range(0, count, block_size):
+                yield vectors[start:start + block_size]
+                self.release_vectors()
+
+        compressor = EmbeddingCompressor(dimension, dtype).fit(blocks(), full_sample)
+        codes = np.empty((count, compressor.dimension), dtype=compressor.dtype)
+        for start in range(0, count, block_size):
+            codes[start:start + block_size] = compressor.encode(vectors[start:start + block_size])
+            self.release_vectors()
+
+        quality = compression_quality(full_sample, compressor.encode(full_sample), compressor,
+                                      self.config.get('n_clusters', 5))
+        logger.info("Compressed %d vectors from %d to %d bytes each", count,
+                    vectors.shape[1] * vectors.dtype.itemsize, compressor.bytes_per_vector())
+        self.vectors = codes
+        self.compressor = compressor
+        return codes, compressor, quality
+
     def get_vectors(self):
         """
         Returns the embedded vectors generated from document chunks.
@@ -55,31 +207,186 @@ class ClusterManager:
         """
         return self.vectors
 
+    def find_outliers(self, k=None, contamination=None, block_size=None):
+        """
+        Flags chunks whose neighbourhood in the embedding space is sparse.
+        The score of a vector is its mean distance to its k nearest neighbours (Euclidean, or cosine under the
+        spherical engine, so the vector lengths do not matter). At most a contamination
+        fraction of the vectors are flagged, and only those whose score is also well above the typical
+        score (median plus three robust standard deviations), so a document without noise loses little.
+        Distances are computed in blocks, keeping the k nearest neighbours of each row seen so far,
+        so memory stays at one block of rows x columns.
+
+        :param k: Number of neighbours. If None, uses the config value.
+        :param contamination: Maximum fraction of outliers. If None, uses the config value.
+        :param block_size: Optional; tuple of rows and columns per distance block. If None, it is sized by distance_block_size.
+        :return: Boolean array, True for outliers.
+        """
+        if k is None:
+            k = self.config.get('outlier_k', 10)
+        if contamination is None:
+            contamination = self.config.get('outlier_contamination', 0.05)
+
+        vectors = self._vector_array()
+        count = len(vectors)
+        k = min(k, count - 1)
+        if k < 1 or contamination <= 0:
+            return np.zeros(count, dtype=bool)
+        row_block, column_block = block_size or self.distance_block_size(count)
+
+        squared_norms = np.empty(count, dtype=np.float32)
+        for start in range(0, count, column_block):
+            block = vectors[start:start + column_block].astype(np.float32, copy=False)
+            squared_norms[start:start + column_block] = np.einsum('ij,ij->i', block, block)
+            self.release_vectors()
+        # Under the spherical engine the neighbourhoods are measured by cosine distance, like the clusters
+        cosine = self.config.get('clustering_engine', 'sklearn') == 'spherical'
+        if cosine:
+            inverse_norms = 1 / np.maximum(np.sqrt(squared_norms), 1e-12)  # Zero vectors stay zero
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, row_block):
+            end = min(start + row_block, count)
+            rows = vectors[start:end].astype(np.float32, copy=False)
+            if cosine:
+                rows = rows * inverse_norms[start:end, None]
+            nearest = np.full((end - start, k), np.inf, dtype=np.float32)
+            for column in range(0, count, column_block):
+                column_end = min(column + column_block, count)
+                columns = vectors[column:column_end].astype(np.float32, copy=False)
+                if cosine:
+                    distances = 1 - rows @ (columns * inverse_norms[column:column_end, None]).T
+                else:
+                    distances = (squared_norms[start:end, None] + squared_norms[None, column:column_end]
+                                 - 2 * (rows @ columns.T))
+                np.maximum(distances, 0, out=distances)
+                own = np.arange(max(start, column), min(end, column_end))
+                distances[own - start, own - column] = np.inf  # A vector is not its own neighbour
+                nearest = np.partition(np.concatenate([nearest, distances], axis=1), k - 1, axis=1)[:, :k]
+                self.release_vectors()
+            scores[start:end] = (nearest if cosine else np.sqrt(nearest)).mean(axis=1)
+
+        median = np.median(scores)
+        spread = 1.4826 * np.median(np.abs(scores - median))
+        threshold = max(np.quantile(scores, 1 - contamination), median + 3 * spread)
+        outliers = scores > threshold
+        logger.info("Found %d outliers among %d vectors (k=%d)", outliers.sum(), count, k)
+        return outliers
+
     def cluster_document(self, n_clusters=None):
         """
-        Clusters the embedded document vectors using KMeans.
+        Clusters the embedded document vectors using KMeans, or spherical k-means when clustering_engine is 'spherical'.
+        If outlier_detection is enabled, outliers are left out of the fit (so they do not pull the centers)
+        and labelled OUTLIER_LABEL.
 
         :param n_clusters: Number of clusters to form. If None, uses the config value.
         :return: Tuple of cluster labels and cluster centers.
         """
         if n_clusters is None:
             n_clusters = self.config.get('n_clusters', 5)
-        
-        if n_clusters > len(self.vectors):
-            logger.warning("Requested %d clusters, but only %d vectors are available. Adjusting number of clusters.", n_clusters, len(self.vectors))
-            n_clusters = len(self.vectors)
 
-        logger.info("Clustering %d vectors into %d clusters", len(self.vectors), n_clusters)
+        self.outliers = np.zeros(len(self.vectors), dtype=bool)
+        if self.config.get('outlier_detection', False):
+            self.outliers = self.find_outliers()
+        inliers = np.flatnonzero(~self.outliers)
+
+        if n_clusters > len(inliers):
+            logger.warning("Requested %d clusters, but only %d vectors are available. Adjusting number of clusters.", n_clusters, len(inliers))
+            n_clusters = len(inliers)
+
+        logger.info("Clustering %d vectors into %d clusters", len(inliers), n_clusters)
 
+        engine = self.config.get('clustering_engine', 'sklearn')
+        if engine == 'spherical':
+            self.labels = self._cluster_spherical(inliers, n_clusters)
+            logger.info("Clustering completed. %d clusters formed.", n_clusters)
+            return self.labels, self.kmeans.cluster_centers_
+        if engine != 'sklearn':
+            raise ValueError(f"Unknown clustering engine: {engine}")
+
+        if self.config.get('low_memory', False):
+            self.labels = self._cluster_in_blocks(inliers, n_clusters)
+            logger.info("Clustering completed. %d clusters formed.", n_clusters)
+            return self.labels, self.kmeans.cluster_centers_
+
+        from sklearn.cluster import KMeans  # Imported on first use to keep startup fast
+
+        vectors = self.vectors
+        if isinstance(vectors, np.ndarray) and vectors.dtype not in (np.float32, np.float64):
+            # Compressed codes are exact in float32, which KMeans would otherwise widen to float64
+            vectors = vectors.astype(np.float32)
         self.kmeans = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto")
-        self.labels = self.kmeans.fit_predict(self.vectors)
+        if self.outliers.any():
+            inlier_labels = self.kmeans.fit_predict(np.asarray(vectors)[inliers])
+            self.labels = np.full(len(self.vectors), OUTLIER_LABEL, dtype=inlier_labels.dtype)
+            self.labels[inliers] = inlier_labels
+        else:
+            self.labels = self.kmeans.fit_predict(vectors)
 
         logger.info("Clustering completed. %d clusters formed.", n_clusters)
         return self.labels, self.kmeans.cluster_centers_
 
+    def _cluster_in_blocks(self, inliers, n_clusters, passes=3):
+        """
+        Low-memory clustering: fits MiniBatchKMeans on blocks of the inlier vectors and labels the vectors
+        block by block, so only one block is copied out of the (memory-mapped) vectors at a time.
+        Blocks are sized to take at most an eighth of memory_limit_mb.
+
+        :param inliers: Indices of the vectors to cluster
+        :param n_clusters: Number of clusters to form
+        :param passes: Number of passes over the vectors
+        :return: Cluster label for every vector, OUTLIER_LABEL for the others
+        """
+        from sklearn.cluster import MiniBatchKMeans
+
+        self.vectors = self._vector_array()
+        budget = self.config.get('memory_limit_mb', 1024) * 2 ** 20 // 8
+        # The first block initializes the centers, so it has to hold several points per cluster
+        block_size = int(max(3 * n_clusters, 256, min(4096, budget // (8 * self.vectors.shape[1]))))
+
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, batch_size=block_size, n_init=3)
+        order = np.random.default_rng(0).permutation(inliers)
+        for _ in range(passes):
+            for start in range(0, len(order), block_size):
+                block = np.sort(order[start:start + block_size])
+                if len(block) >= n_clusters:
+                    self.kmeans.partial_fit(self._read_rows(block))
+
+        labels = np.full(len(self.vectors), OUTLIER_LABEL, dtype=np.int32)
+        for start in range(0, len(inliers), block_size):
+            block = inliers[start:start + block_size]
+            labels[block] = self.kmeans.predict(self._read_rows(block))
+        return labels
+
+    def _cluster_spherical(self, inliers, n_clusters):
+        """
+        Clusters the inlier vectors by cosine similarity with SphericalKMeans. The vectors are normalized into
+        one float32 copy, or a block at a time on every pass in low-memory mode.
+
+        :param inliers: Indices of the vectors to cluster
+        :param n_clusters: Number of clusters to form
+        :return: Cluster label for every vector, OUTLIER_LABEL for the others
+        """
+        from .spherical_kmeans import SphericalKMeans
+
+        vectors = self._vector_array()
+        low_memory = self.config.get('low_memory', False)
+        block_size = 4096
+        if low_memory:
+            # A block of vectors and its similarities take at most an eighth of memory_limit_mb
+            budget = self.config.get('memory_limit_mb', 1024) * 2 ** 20 // 8
+            block_size = int(max(256, min(4096, budget // (8 * (vectors.shape[1] + n_clusters)))))
+        self.kmeans = SphericalKMeans(n_clusters, max_iter=self.config.get('spherical_max_iter', 100),
+                                      tol=self.config.get('spherical_tol', 1e-4),
+                                      init_sample=self.config.get('spherical_init_sample', 2048),
+                                      block_size=block_size, stream=low_memory, release=self.release_vectors)
+
+        labels = np.full(len(vectors), OUTLIER_LABEL, dtype=np.int32)
+        labels[inliers] = self.kmeans.fit_predict(vectors, inliers if len(inliers) < len(vectors) else None)
+        return labels
+
     def find_n_closest_representatives(self, n=None):
         """
-        Finds the 'n' closest document chunks to each cluster center.
+        Finds the 'n' closest document chunks to each cluster center. Outliers are never chosen.
 
         :param n: Number of closest chunks to return for each cluster. If None, uses the config value.
         :return: List of tuples (cluster_label, indices of closest chunks for each cluster).
@@ -98,9 +405,30 @@ class ClusterManager:
         num_clusters = cluster_centers.shape[0]  # Number of clusters
         representatives_with_labels = []
 
+        center_distances = None
+        if self.config.get('clustering_engine', 'sklearn') == 'spherical':
+            # Cosine distances, the measure the clusters were formed with
+            center_distances = self.kmeans.transform(self._vector_array())
+        elif self.config.get('low_memory', False) or self.compressor is not None:
+            # Distances to all centers at once, a block of vectors at a time, instead of a full copy per center
+            vectors = self._vector_array()
+            centers = cluster_centers.astype(np.float32)
+            center_norms = np.einsum('ij,ij->i', centers, centers)
+            center_distances = np.empty((len(vectors), num_clusters), dtype=np.float32)
+            for start in range(0, len(vectors), 1024):
+                block = vectors[start:start + 1024].astype(np.float32, copy=False)
+                squared = np.einsum('ij,ij->i', block, block)[:, None] - 2 * (block @ centers.T) + center_norms
+                center_distances[start:start + 1024] = np.sqrt(np.maximum(squared, 0))
+                self.release_vectors()
+
         # Loop through each cluster center and find closest chunks
         for i in range(num_clusters):
-            distances = np.linalg.norm(self.vectors - cluster_centers[i], axis=1)
+            if center_distances is not None:
+                distances = center_distances[:, i].copy()
+            else:
+                distances = np.linalg.norm(self.vectors - cluster_centers[i], axis=1)
+            if self.outliers is not None and self.outliers.any():
+                distances[self.outliers] = np.inf
             closest_indices = np.argsort(distances)[:n]
 
             logger.debug("Cluster %d: Closest %d chunks found", i, n)
@@ -0,0 +1,179 @@
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Storage types of the compressed vectors
+COMPRESSION_DTYPES = ('float32', 'float16', 'int8')
+
+
+class EmbeddingCompressor:
+    """
+    The EmbeddingCompressor class shrinks embeddings with a PCA projection learned from the vectors themselves
+    and stores the projected vectors as float32, float16, or int8 with a scale factor.
+
+    The int8 scale factor is shared by every dimension, so the codes are a uniformly scaled copy of the projection:
+    Euclidean distances, nearest neighbours, KMeans assignments and cosine similarities computed on the codes are
+    those of the projection up to that factor. The clustering stages can therefore run on the codes directly,
+    converting a block at a time to float32 for the matrix products.
+    """
+
+    def __init__(self, dimension=128, dtype='int8'):
+        """
+        :param dimension: Dimensions kept by the PCA projection; None or 0 keeps every dimension (no projection).
+        :param dtype: Storage type of the codes: 'float32', 'float16' or 'int8'.
+        """
+        if dtype not in COMPRESSION_DTYPES:
+            raise ValueError(f"Unsupported compression dtype {dtype!r}; expected one of {COMPRESSION_DTYPES}")
+        self.dimension = dimension
+        self.dtype = dtype
+        self.mean = None
+        self.components = None
+        self.scale = 1.0
+        self.explained_variance = 1.0
+
+    def fit(self, blocks, calibration):
+        """
+        Learns the projection from the covariance of the vectors, accumulated a block at a time, and the int8 scale
+        factor from the largest projected value of a calibration sample (larger values are clipped when encoding).
+
+        :param blocks: Iterable of float arrays of vectors, covering every vector once
+        :param calibration: Float array of sample vectors
+        :return: self
+        """
+        count, total, gram = 0, None, None
+        for block in blocks:
+            block = np.asarray(block, dtype=np.float64)
+            if total is None:
+                total, gram = np.zeros(block.shape[1]), np.zeros((block.shape[1], block.shape[1]))
+            count += len(block)
+            total += block.sum(axis=0)
+            gram += block.T @ block
+        if not count:
+            raise ValueError("Cannot fit the compression on zero vectors")
+
+        self.mean = (total / count).astype(np.float32)
+        covariance = gram / count - np.outer(total / count, total / count)
+        if self.dimension and self.dimension < len(covariance):
+            # eigh returns the eigenvalues in ascending order
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            self.components = np.ascontiguousarray(eigenvectors[:, ::-1][:, :self.dimension].T, dtype=np.float32)
+            self.explained_variance = float(eigenvalues[::-1][:self.dimension].sum() / max(eigenvalues.sum(), 1e-12))
+        else:
+            self.components = None
+            self.explained_variance = 1.0
+        self.dimension = len(covariance) if self.components is None else len(self.components)
+
+        if self.dtype == 'int8':
+            largest = float(np.abs(self.project(calibration)).max()) if len(calibration) else 0.0
+            self.scale = largest / 127 if largest > 0 else 1.0
+        logger.info("Fitted %s compression to %d dimensions (%.1f%% of the variance kept)",
+                    self.dtype, self.dimension, 100 * self.explained_variance)
+        return self
+
+    def project(self, vectors):
+        """
+        :param vectors: Float array of vectors
+        :return: Float32 array of the centered, projected vectors
+        """
+        centered = np.asarray(vectors, dtype=np.float32) - self.mean
+        return centered if self.components is None else centered @ self.components.T
+
+    def encode(self, vectors):
+        """
+        :param vectors: Float array of vectors
+        :return: Array of codes of the storage type
+        """
+        projected = self.project(vectors)
+        if self.dtype == 'int8':
+            return np.clip(np.rint(projected / self.scale), -127, 127).astype(np.int8)
+        return projected.astype(self.dtype)
+
+    def decode(self, codes):
+        """
+        :param codes: Array of codes
+        :return: Float32 array of the projected vectors the codes stand for
+        """
+        return np.asarray(codes, dtype=np.float32) * np.float32(self.scale)
+
+    def bytes_per_vector(self):
+        return self.dimension * np.dtype(self.dtype).itemsize
+
+    def state(self):
+        """
+        :return: Dictionary of arrays that from_state restores the compressor from
+        """
+        state = {'mean': self.mean, 'scale': np.float64(self.scale), 'dtype': np.array(self.dtype),
+                 'explained_variance': np.float64(self.explained_variance)}
+        if self.components is not None:
+            state['components'] = self.components
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores a fitted compressor, for example from the compression state saved with the run artifacts.
+
+        :param state: Dictionary (or NpzFile) of arrays written by state
+        :return: The EmbeddingCompressor
+        """
+        components = state['components'] if 'components' in state else None
+        compressor = cls(None if components is None else len(components), str(state['dtype']))
+        compressor.mean = np.asarray(state['mean'], dtype=np.float32)
+        compressor.components = None if components is None else np.asarray(components, dtype=np.float32)
+        compressor.scale = float(state['scale'])
+        compressor.explained_variance = float(state['explained_variance'])
+        compressor.dimension = len(compressor.mean) if components is None else len(components)
+        return compressor
+
+
+def _nearest(vectors, k):
+    """
+    :return: Indices of the k nearest neighbours of every vector among the others
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    squared = np.einsum('ij,ij->i', vectors, vectors)
+    distances = squared[:, None] + squared[None, :] - 2 * (vectors @ vectors.T)
+    np.fill_diagonal(distances, np.inf)
+    return np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+
+def compression_quality(vectors, codes, compressor, n_clusters, k=10):
+    """
+    Compares compressed with full-precision vectors on a sample: the recall of the k nearest neighbours
+    (the share of each vector's true neighbours that are still among its k nearest after compression)
+    and the agreement of KMeans clusters fitted on either, as the adjusted Rand index (1 is identical).
+
+    :param vectors: Float array of full-precision sample vectors
+    :param codes: Codes of the same vectors
+    :param compressor: The EmbeddingCompressor that encoded them
+    :param n_clusters: Number of KMeans clusters
+    :param k: Number of neighbours
+    :return: Dictionary of the measurements
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import adjusted_rand_score
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count = len(vectors)
+    quality = {'sample': count, 'dimension': compressor.dimension, 'dtype': compressor.dtype,
+               'original_dimension': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+               'bytes_per_vector': compressor.bytes_per_vector(),
+               'explained_variance': round(compressor.explained_variance, 4)}
+    quality['compression_ratio'] = round(4 * quality['original_dimension'] / max(quality['bytes_per_vector'], 1), 2)
+    decoded = compressor.decode(codes)
+
+    k = min(k, count - 1)
+    if k >= 1:
+        true, found = _nearest(vectors, k), _nearest(decoded, k)
+        hits = sum(len(np.intersect1d(row_true, row_found, assume_unique=True)) for row_true, row_found in zip(true, found))
+        quality['k'] = k
+        quality['recall_at_k'] = round(hits / (count * k), 4)
+    n_clusters = min(n_clusters, count)
+    if n_clusters >= 2:
+        full_labels = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto").fit_predict(vectors)
+        compressed_labels = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto").fit_predict(decoded)
+        quality['adjusted_rand_index'] = round(float(adjusted_rand_score(full_labels, compressed_labels)), 4)
+    logger.info("Compression quality: %s", quality)
+    return quality
@@ -0,0 +1,178 @@
+import logging
+import numpy as np
+from .clustering import OUTLIER_LABEL
+from .spherical_kmeans import normalize_rows
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TopicTree:
+    """
+    The TopicTree class merges the fine-grained clusters of a clustering pass into a hierarchy
+    (Ward agglomerative clustering of the cluster centroids), so coarser topic levels can be cut
+    from it without embedding or clustering the document again.
+
+    The vectors are only read a block at a time and cast to float32 block by block, so memory-mapped or
+    compressed vectors are never copied whole. With the cosine metric (for the spherical clustering engine)
+    the tree is built from the normalized centroids and representatives are the chunks closest by cosine.
+    """
+
+    def __init__(self, vectors, labels, centers=None, metric='euclidean', block_size=4096, release=None):
+        """
+        Builds the tree from the embedded vectors and their fine cluster labels.
+
+        :param vectors: Embedding vectors of the chunks (any numeric type, memory-mapped or not).
+        :param labels: Fine cluster label of every chunk (OUTLIER_LABEL for outliers).
+        :param centers: Optional; center of every fine cluster, indexed by label (e.g. the KMeans cluster centers).
+                        The tree is then built from the centers alone, without reading the vectors.
+        :param metric: 'euclidean' or 'cosine'.
+        :param block_size: Vectors read at a time.
+        :param release: Optional; called after each block is read, for example to release memory-mapped pages.
+        """
+        if metric not in ('euclidean', 'cosine'):
+            raise ValueError(f"Unknown topic tree metric: {metric}")
+        self.vectors = vectors if isinstance(vectors, np.ndarray) else np.asarray(vectors, dtype=np.float32)
+        self.labels = np.asarray(labels)
+        self.metric = metric
+        self.block_size = block_size
+        self.release = release
+        self.clusters = np.array(sorted(set(self.labels.tolist()) - {OUTLIER_LABEL}))
+        self.sizes = np.array([(self.labels == label).sum() for label in self.clusters])
+        if centers is not None:
+            self.centers = np.asarray(centers, dtype=np.float32)[self.clusters]
+        else:
+            self.centers = self._cluster_means()
+        self.linkage = None
+        if len(self.clusters) > 1:
+            from scipy.cluster.hierarchy import linkage  # Imported on first use to keep startup fast
+            # Ward on unit vectors merges by cosine: their squared distance is twice the cosine distance
+            self.linkage = linkage(self._prepare(self.centers), method='ward')
+        logger.info("Built topic tree over %d clusters", len(self.clusters))
+
+    def _prepare(self, vectors):
+        """
+        :return: The vectors as float32, normalized to unit length with the cosine metric
+        """
+        if self.metric == 'cosine':
+            return normalize_rows(vectors)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _blocks(self):
+        """
+        :return: Generator of (position of the first row, float32 block of vectors prepared for the metric)
+        """
+        for start in range(0, len(self.vectors), self.block_size):
+            yield start, self._prepare(self.vectors[start:start + self.block_size])
+            if self.release is not None:
+                self.release()
+
+    def _cluster_means(self):
+        """
+        :return: Mean vector of every fine cluster (of the normalized vectors with the cosine metric)
+        """
+        index = {int(label): position for position, label in enumerate(self.clusters)}
+        positions = np.array([index.get(int(label), -1) for label in self.labels])
+        sums = np.zeros((len(self.clusters), self.vectors.shape[1]), dtype=np.float64)
+        for start, block in self._blocks():
+            block_positions = positions[start:start + len(block)]
+            members = block_positions >= 0
+            # The cluster sums as a matrix product of the block with its one-hot cluster positions
+            one_hot = np.zeros((len(block), len(self.clusters)), dtype=np.float32)
+            one_hot[np.flatnonzero(members), block_positions[members]] = 1
+            sums += one_hot.T @ block
+        return (sums / np.maximum(self.sizes, 1)[:, None]).astype(np.float32)
+
+    def _distances(self, rows, centers):
+        """
+        :param rows: Float32 vectors prepared for the metric
+        :param centers: Float32 centers
+        :return: Distance of every row to every center
+        """
+        if self.metric == 'cosine':
+            return 1 - rows @ normalize_rows(centers).T
+        squared = np.einsum('ij,ij->i', rows, rows)[:, None] - 2 * (rows @ centers.T) + np.einsum('ij,ij->i', centers, centers)
+        return np.sqrt(np.maximum(squared, 0))
+
+    @property
+    def n_clusters(self):
+        return len(self.clusters)
+
+    def cut(self, n_topics):
+        """
+        Cuts the tree into at most n_topics topics. Topics are numbered from the largest to the smallest.
+
+        :param n_topics: Number of topics.
+        :return: Dictionary of fine cluster label to topic label.
+        """
+        if self.linkage is None or n_topics >= self.n_clusters:
+            groups = np.arange(self.n_clusters)
+        else:
+            from scipy.cluster.hierarchy import fcluster
+            groups = fcluster(self.linkage, t=max(1, n_topics), criterion='maxclust')
+
+        # Renumber the groups by total size so topic 0 is the largest
+        group_sizes = {group: self.sizes[groups == group].sum() for group in np.unique(groups)}
+        order = sorted(group_sizes, key=lambda group: (-group_sizes[group], group))
+        topic_of_group = {group: topic for topic, group in enumerate(order)}
+        return {int(label): topic_of_group[group] for label, group in zip(self.clusters.tolist(), groups)}
+
+    def labels_at(self, n_topics):
+        """
+        :param n_topics: Number of topics.
+        :return: Topic label of every chunk (outliers keep OUTLIER_LABEL).
+        """
+        mapping = self.cut(n_topics)
+        return np.array([mapping.get(int(label), OUTLIER_LABEL) for label in self.labels])
+
+    def topic_centers(self, n_topics):
+        """
+        :param n_topics: Number of topics.
+        :return: Center of every topic: the size-weighted mean of its clusters' centers, i.e. the mean of its chunks.
+        """
+        mapping = self.cut(n_topics)
+        groups = np.array([mapping[int(label)] for label in self.clusters])
+        centers = np.zeros((groups.max() + 1 if len(groups) else 0, self.centers.shape[1]), dtype=np.float64)
+        np.add.at(centers, groups, self.centers * self.sizes[:, None])
+        return (centers / np.bincount(groups, weights=self.sizes)[:, None]).astype(np.float32)
+
+    def representatives_at(self, n_topics, n=3, candidates=None):
+        """
+        Finds the n chunks closest to the center of every topic. Outliers are never chosen.
+
+        :param n_topics: Number of topics.
+        :param n: Number of representatives per topic.
+        :param candidates: Optional; list of tuples (fine cluster label, indices of its representatives). Each topic's
+                           representatives are then picked among those of its clusters, so only those rows of
+                           the vectors are read.
+        :return: Tuple (topic label of every chunk, list of tuples (topic label, indices of the closest chunks)).
+        """
+        topic_labels = self.labels_at(n_topics)
+        centers = self.topic_centers(n_topics)
+        if candidates is not None:
+            mapping = self.cut(n_topics)
+            representatives = []
+            for topic, center in enumerate(centers):
+                indices = np.unique(np.concatenate([np.asarray(rows, dtype=np.int64) for label, rows in candidates
+                                                    if mapping.get(int(label)) == topic] or [np.empty(0, np.int64)]))
+                distances = self._distances(self._prepare(self.vectors[indices]), center[None, :])[:, 0]
+                representatives.append((topic, indices[np.argsort(distances, kind='stable')[:n]]))
+            return topic_labels, representatives
+
+        # Distances of every chunk to all topic centers, a block of vectors at a time
+        distances = np.empty((len(topic_labels), len(centers)), dtype=np.float32)
+        for start, block in self._blocks():
+            distances[start:start + len(block)] = self._distances(block, centers)
+        distances[topic_labels == OUTLIER_LABEL] = np.inf
+        count = min(n, int((topic_labels != OUTLIER_LABEL).sum()))
+        representatives = [(topic, np.argsort(distances[:, topic])[:count]) for topic in range(len(centers))]
+        return topic_labels, representatives
+
+    def describe(self, n_topics):
+        """
+        :param n_topics: Number of topics.
+        :return: Dictionary of topic label to the fine cluster labels merged into it.
+        """
+        topics = {}
+        for label, topic in self.cut(n_topics).items():
+            topics.setdefault(topic, []).append(label)
+        return dict(sorted(topics.items()))
@@ -0,0 +1,191 @@
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors):
+    """
+    :param vectors: Array of vectors of any numeric type
+    :return: Float32 copy of the vectors scaled to unit length (zero vectors stay zero)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+    return vectors / np.maximum(norms, 1e-12)[:, None]
+
+
+class SphericalKMeans:
+    """
+    The SphericalKMeans class clusters vectors by cosine similarity: vectors and centers are L2-normalized,
+    each vector joins the center it is most similar to and each center is the normalized mean of its vectors.
+
+    Assignment steps are float32 matrix products (BLAS) of a block of vectors with all centers, so memory stays
+    at one block of similarities whatever the number of vectors. Centers are initialized with greedy k-means++
+    on a sample (the best of n_init restarts clustered on the sample), and iterations stop early when no vector changes cluster or the mean similarity gains less than tol.
+    The interface follows scikit-learn's KMeans (fit_predict, predict, transform, cluster_centers_, inertia_).
+    """
+
+    def __init__(self, n_clusters, max_iter=100, tol=1e-4, init_sample=2048, n_init=3, block_size=4096, random_state=0,
+                 stream=False, release=None):
+        """
+        :param n_clusters: Number of clusters.
+        :param max_iter: Maximum number of assignment passes over the vectors.
+        :param tol: Stop when the mean cosine similarity to the centers gains less than this in a pass.
+        :param init_sample: Number of vectors k-means++ picks the initial centers from.
+        :param n_init: Number of k-means++ restarts on the init sample.
+        :param block_size: Vectors per matrix product.
+        :param stream: Normalize a block at a time on every pass instead of keeping a normalized float32 copy of
+                       the vectors, for vectors that are memory-mapped or compressed.
+        :param release: Optional; called after each block is read, for example to release memory-mapped pages.
+        """
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.tol = tol
+        self.init_sample = init_sample
+        self.n_init = n_init
+        self.block_size = block_size
+        self.random_state = random_state
+        self.stream = stream
+        self.release = release
+        self.cluster_centers_ = None
+
+    def _blocks(self, vectors, rows=None, normalize=True):
+        """
+        :return: Generator of (position of the first row, block), blocks normalized to float32 if normalize is set
+        """
+        count = len(vectors) if rows is None else len(rows)
+        for start in range(0, count, self.block_size):
+            block = vectors[start:start + self.block_size] if rows is None else vectors[rows[start:start + self.block_size]]
+            yield start, normalize_rows(block) if normalize else block
+            if self.release is not None:
+                self.release()
+
+    def _sample(self, vectors, rows, rng):
+        """
+        :return: Normalized float32 copy of at most init_sample random vectors
+        """
+        count = len(vectors) if rows is None else len(rows)
+        picked = np.sort(rng.choice(count, min(count, self.init_sample), replace=False))
+        sample = normalize_rows(vectors[picked if rows is None else rows[picked]])
+        if self.release is not None:
+            self.release()
+        return sample
+
+    def _init_centers(self, sample, rng):
+        """
+        Greedy k-means++: each new center is the best of a few candidates drawn with probability proportional
+        to their cosine distance (half the squared Euclidean distance on the unit sphere) to the closest center so far.
+        """
+        trials = 2 + int(np.log(self.n_clusters))
+        centers = [sample[rng.integers(len(sample))]]
+        closest = np.maximum(1 - sample @ centers[0], 0)
+        for _ in range(1, self.n_clusters):
+            total = closest.sum()
+            probabilities = closest / total if total > 0 else None
+            candidates = rng.choice(len(sample), size=trials, p=probabilities)
+            distances = np.minimum(closest[:, None], np.maximum(1 - sample @ sample[candidates].T, 0))
+            best = int(np.argmin(distances.sum(axis=0)))
+            closest = distances[:, best]
+            centers.append(sample[candidates[best]])
+        return np.stack(centers)
+
+    def _lloyd(self, vectors, rows, centers, normalize):
+        """
+        Alternates assignment and update passes from the given centers until no vector changes cluster,
+        the mean similarity gains less than tol or max_iter passes are done.
+
+        :return: Tuple of the centers, the labels and similarities of the last assignment, and the number of passes
+        """
+        count = len(vectors) if rows is None else len(rows)
+        labels = np.full(count, -1, dtype=np.int32)
+        similarities = np.empty(count, dtype=np.float32)
+        previous = -np.inf
+        for iteration in range(self.max_iter):
+            # Assignment to the current centers, accumulating the sums the next centers are computed from
+            sums = np.zeros(centers.shape, dtype=np.float64)
+            changed = 0
+            for start, block in self._blocks(vectors, rows, normalize=normalize):
+                block_similarities = block @ centers.T
+                block_labels = block_similarities.argmax(axis=1).astype(np.int32)
+                end = start + len(block)
+                changed += int(np.count_nonzero(labels[start:end] != block_labels))
+                labels[start:end] = block_labels
+                similarities[start:end] = block_similarities[np.arange(len(block)), block_labels]
+                # The cluster sums as one more matrix product, of the block with its one-hot labels
+                one_hot = np.zeros((len(block), len(centers)), dtype=np.float32)
+                one_hot[np.arange(len(block)), block_labels] = 1
+                sums += (block.T @ one_hot).T
+
+            mean_similarity = float(similarities.mean(dtype=np.float64))
+            if not changed or mean_similarity - previous < self.tol or iteration + 1 == self.max_iter:
+                break
+            previous = mean_similarity
+            centers = self._update_centers(sums, vectors, rows, similarities)
+        return centers, labels, similarities, iteration + 1
+
+    def fit_predict(self, vectors, rows=None):
+        """
+        Clusters the vectors. Each of the n_init restarts runs on the init sample only, and the centers of the
+        best one (highest mean similarity) are refined on all vectors.
+
+        :param vectors: Array of vectors (any numeric type, memory-mapped or not)
+        :param rows: Optional; sorted indices of the vectors to cluster, the others are left out
+        :return: Cluster label of every clustered vector
+        """
+        rng = np.random.default_rng(self.random_state)
+        if not self.stream:
+            # One normalized copy serves every pass
+            vectors = normalize_rows(vectors if rows is None else vectors[rows])
+            rows = None
+
+        sample = self._sample(vectors, rows, rng)
+        best_similarity, centers = -np.inf, None
+        for _ in range(self.n_init):
+            sample_centers, _, similarities, _ = self._lloyd(sample, None, self._init_centers(sample, rng), False)
+            if similarities.mean() > best_similarity:
+                best_similarity, centers = similarities.mean(), sample_centers
+
+        centers, labels, similarities, self.n_iter_ = self._lloyd(vectors, rows, centers, self.stream)
+        self.cluster_centers_ = centers
+        self.labels_ = labels
+        self.inertia_ = float(len(labels) - similarities.sum(dtype=np.float64))
+        logger.info("Spherical k-means stopped after %d passes, mean cosine similarity %.4f",
+                    self.n_iter_, similarities.mean())
+        return labels
+
+    def _update_centers(self, sums, vectors, rows, similarities):
+        """
+        :return: The normalized cluster sums; an empty cluster is moved to the vector least similar to its center
+        """
+        norms = np.linalg.norm(sums, axis=1)
+        empty = np.flatnonzero(norms == 0)
+        centers = (sums / np.maximum(norms, 1e-12)[:, None]).astype(np.float32)
+        if len(empty):
+            farthest = np.argsort(similarities)[:len(empty)]
+            source = farthest if rows is None else rows[farthest]
+            centers[empty] = normalize_rows(vectors[np.sort(source)])
+            similarities[farthest] = 1.0  # Not picked again before the next pass
+            logger.debug("Moved %d empty clusters", len(empty))
+        return centers
+
+    def fit(self, vectors, rows=None):
+        self.fit_predict(vectors, rows)
+        return self
+
+    def transform(self, vectors):
+        """
+        :param vectors: Array of vectors
+        :return: Float32 array of the cosine distance (1 - similarity) of every vector to every center
+        """
+        distances = np.empty((len(vectors), self.n_clusters), dtype=np.float32)
+        for start, block in self._blocks(vectors):
+            distances[start:start + len(block)] = 1 - block @ self.cluster_centers_.T
+        return distances
+
+    def predict(self, vectors):
+        """
+        :param vectors: Array of vectors
+        :return: Label of the center most similar to every vector
+        """
+        return self.transform(vectors).argmin(axis=1).astype(np.int32)
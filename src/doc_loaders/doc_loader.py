@@ -1,6 +1,8 @@
-from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader, DirectoryLoader
 # from .multimedia_loader import MultimediaLoader
+import glob
+import os
 import logging
+from .tabular_loader import TabularLoader, is_tabular
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -19,20 +21,71 @@ class DocumentLoader:
         self.glob = filter
         self.text = ""
 
+    def is_tabular(self) -> bool:
+        """
+        Whether the source is a CSV or Excel file, or a directory filtered to such files.
+        """
+        if self.type == "directory":
+            return bool(self.glob) and is_tabular(self.glob)
+        return self.type in ("csv", "excel") or is_tabular(self.source)
+
+    def iter_blocks(self, target_words: int = 100, chunk_rows: int = 10000):
+        """
+        Streams a tabular source as text blocks of at most target_words words, one file at a time.
+
+        Parameters
+        ----------
+        target_words : int
+            Words per block.
+        chunk_rows : int
+            Rows read from a CSV file at a time.
+        """
+        for path in self._tabular_paths():
+            yield from TabularLoader(path, target_words, chunk_rows).iter_blocks()
+
+    def _tabular_paths(self) -> list:
+        if self.type == "directory":
+            return sorted(glob.glob(os.path.join(self.source, self.glob), recursive=True))
+        return [self.source]
+
+    def iter_pages(self, window: int = 50):
+        """
+        Streams the text of the source one page at a time, so a large PDF is never held in memory as a whole.
+        Sources without pages yield their whole text once.
+
+        Parameters
+        ----------
+        window : int
+            Pages read with one PDF reader. The reader caches every object it parses,
+            so a fresh one is opened for each window of pages.
+        """
+        if not self.source.lower().endswith('.pdf') or self.source.lower().startswith('http'):
+            yield self()
+            return
+        from pypdf import PdfReader
+        with open(self.source, 'rb') as f:
+            count = len(PdfReader(f).pages)
+            for start in range(0, count, window):
+                reader = PdfReader(f)
+                for number in range(start, min(start + window, count)):
+                    yield reader.pages[number].extract_text()
+
     def __call__(self) -> str:
         self.load()
         return self.text
 
     def load(self) -> None:
         """
-        Load text content from the source. Detects if the source is a PDF or a webpage.
+        Load text content from the source. Detects if the source is a PDF, a webpage or a CSV/Excel file.
 
         Raises
         ------
         ValueError
             If the source is not a valid PDF file or a URL.
         """
-        if self.source.lower().endswith('.pdf'):
+        if self.is_tabular():
+            self._load_tabular()
+        elif self.source.lower().endswith('.pdf'):
             self._load_pdf()
         elif self.source.lower().startswith('http'):
             self._load_webpage()
@@ -48,6 +101,7 @@ class DocumentLoader:
         """
         Load text content from a PDF file.
         """
+        from langchain_community.document_loaders import PyPDFLoader
         loader = PyPDFLoader(self.source)
         docs = loader.load()
         self.text = ''.join(doc.page_content for doc in docs)
@@ -56,11 +110,20 @@ class DocumentLoader:
         """
         Load text content from a webpage.
         """
+        from langchain_community.document_loaders import WebBaseLoader
         loader = WebBaseLoader(self.source)
         docs = loader.load()
         self.text = docs[0].page_content if docs else ""
     
+    def _load_tabular(self) -> None:
+        """
+        Load a CSV or Excel file (or a directory of them) as text, one block of rows per paragraph.
+        The summarizer streams the blocks with iter_blocks instead.
+        """
+        self.text = '\n\n'.join(self.iter_blocks())
+
     def _load_directory(self) -> None:
+        from langchain_community.document_loaders import DirectoryLoader
         loader = DirectoryLoader(self.source, self.glob)
         docs = loader.load()
         print(docs)
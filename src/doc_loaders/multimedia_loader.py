@@ -7,8 +7,6 @@ import tempfile
 from tqdm import tqdm
 import logging
 from src.chunking.audiochunking import split_audio
-import fast_whisper
-from pytubefix import YouTube
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,8 +24,19 @@ class MultimediaLoader:
         """
         self.source = source
         self.text = ""
-        self.model = whisper.load_model("tiny")
-        
+        self._model = None
+
+    @property
+    def model(self):
+        """
+        The Whisper model, loaded (and imported) the first time audio is transcribed.
+        """
+        if self._model is None:
+            import whisper
+            logger.info("Loading Whisper model...")
+            self._model = whisper.load_model("tiny")
+        return self._model
+
     def __call__(self) -> str:
         """
         Call the object to load the text from the source.
@@ -72,6 +81,7 @@ class MultimediaLoader:
             raise ValueError("Invalid YT URL. Must be a valid YouTube URL.")
         
         logger.info("Loading YouTube video...")
+        from pytubefix import YouTube
         yt = YouTube(self.source)
         audio = yt.streams.filter(only_audio=True).first()
         
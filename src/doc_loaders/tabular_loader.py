@@ -0,0 +1,133 @@
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Streams CSV and Excel files as text. Rows are read a chunk at a time (pandas chunked reader for CSV,
+# openpyxl read-only mode for Excel), rendered as "column: value" lines and grouped into blocks of at most
+# target_words words that go straight to embedding, so a large workbook is never held in memory as a whole.
+
+CSV_EXTENSIONS = ('.csv',)
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+TABULAR_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS
+
+
+def is_tabular(path):
+    """
+    :return: Whether the path is a CSV or Excel file, judged by its extension
+    """
+    return path.lower().endswith(TABULAR_EXTENSIONS)
+
+
+def format_value(value):
+    """
+    Formats a cell for the text rendering: whole floats lose their '.0' and midnight timestamps their time.
+
+    :return: The cell as text ('' for an empty cell)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return text[:-9] if text.endswith(" 00:00:00") else text
+
+
+def render_row(header, row):
+    """
+    Renders a row as "column: value" pairs, leaving out empty cells.
+
+    :param header: Column names
+    :param row: Cell values, in column order
+    :return: The row as one line of text ('' if every cell is empty)
+    """
+    cells = []
+    for name, value in zip(header, row):
+        text = format_value(value)
+        if text:
+            cells.append(f"{name}: {text}")
+    return "; ".join(cells) + "." if cells else ""
+
+
+class TabularLoader:
+    """
+    The TabularLoader class streams the rows of a CSV or Excel file and groups them into text blocks
+    of at most target_words words. A block never spans two sheets and a row is never split,
+    so a row longer than target_words becomes a block of its own.
+    """
+
+    def __init__(self, source, target_words=100, chunk_rows=10000):
+        """
+        :param source: Path to a CSV or Excel (.xlsx, .xlsm) file
+        :param target_words: Words per block
+        :param chunk_rows: Rows read from a CSV file at a time
+        """
+        self.source = source
+        self.target_words = target_words
+        self.chunk_rows = chunk_rows
+
+    def iter_rows(self):
+        """
+        Yields (sheet name, header, row) for every row of the file, reading it incrementally.
+        A CSV file is one sheet named after the file.
+        """
+        if self.source.lower().endswith(EXCEL_EXTENSIONS):
+            yield from self._iter_excel_rows()
+        elif self.source.lower().endswith(CSV_EXTENSIONS):
+            yield from self._iter_csv_rows()
+        else:
+            raise ValueError(f"Unsupported tabular file: {self.source}")
+
+    def _iter_csv_rows(self):
+        import pandas as pd
+        sheet = os.path.splitext(os.path.basename(self.source))[0]
+        for frame in pd.read_csv(self.source, dtype=str, keep_default_na=False, chunksize=self.chunk_rows):
+            header = [str(column) for column in frame.columns]
+            for row in frame.itertuples(index=False, name=None):
+                yield sheet, header, row
+
+    def _iter_excel_rows(self):
+        from openpyxl import load_workbook
+        # Read-only mode parses the sheets lazily instead of building the whole workbook in memory
+        workbook = load_workbook(self.source, read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                rows = worksheet.iter_rows(values_only=True)
+                header = None
+                for row in rows:
+                    if header is None:
+                        if any(value is not None for value in row):
+                            header = [format_value(value) or f"Column {index + 1}" for index, value in enumerate(row)]
+                        continue
+                    yield worksheet.title, header, row
+        finally:
+            workbook.close()
+
+    def iter_blocks(self):
+        """
+        Yields text blocks of at most target_words words: the sheet name on the first line,
+        followed by one line per row.
+        """
+        sheet, lines, words = None, [], 0
+        for row_sheet, header, row in self.iter_rows():
+            line = render_row(header, row)
+            if not line:
+                continue
+            line_words = len(line.split())
+            if lines and (row_sheet != sheet or words + line_words > self.target_words):
+                yield "\n".join([sheet] + lines)
+                lines, words = [], 0
+            sheet = row_sheet
+            lines.append(line)
+            words += line_words
+        if lines:
+            yield "\n".join([sheet] + lines)
+
+    def __call__(self):
+        """
+        :return: List of text blocks
+        """
+        blocks = list(self.iter_blocks())
+        logger.info("Loaded %d text blocks from %s", len(blocks), self.source)
+        return blocks
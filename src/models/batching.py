@@ -0,0 +1,169 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _EmbeddingRequest:
+    """
+    Texts from one caller, with the vectors received so far.
+    """
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.vectors = [None] * len(texts)
+        self.sent = 0  # Number of texts already handed to a batch
+        self.remaining = len(texts)  # Number of texts still waiting for a vector
+        self.enqueued = time.monotonic()
+        self.lock = threading.Lock()
+
+    def unsent(self):
+        return len(self.texts) - self.sent
+
+    def receive(self, offset, vectors):
+        with self.lock:
+            self.vectors[offset:offset + len(vectors)] = vectors
+            self.remaining -= len(vectors)
+            done = self.remaining == 0
+        if done and not self.future.done():
+            self.future.set_result(self.vectors)
+
+    def fail(self, error):
+        if not self.future.done():
+            self.future.set_exception(error)
+
+
+class EmbeddingDispatcher:
+    """
+    The EmbeddingDispatcher class coalesces embed_documents calls from many threads into full
+    batches for a shared embedding model. A batch is sent as soon as it is full, or when the oldest
+    waiting request has waited max_wait seconds, and each caller gets back exactly its own vectors.
+    It has the same embed_documents/embed_query methods as the embedding model it wraps.
+    """
+
+    def __init__(self, embedding_model, max_batch_size=64, max_wait=0.01, max_concurrent_batches=1):
+        """
+        Starts the background dispatch thread.
+
+        :param embedding_model: The embedding model to send the coalesced batches to.
+        :param max_batch_size: Maximum number of texts per call to the embedding model.
+        :param max_wait: Maximum seconds a request waits for other requests to fill a batch.
+        :param max_concurrent_batches: Number of batches that may be in flight at once.
+        """
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix='embed-batch')
+        self.in_flight = threading.BoundedSemaphore(max_concurrent_batches)
+        self.batches_sent = 0
+        self.texts_sent = 0
+        self._stats_lock = threading.Lock()
+        # Guards _closed, so no request can be queued behind the stop sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch_loop, name='embedding-dispatcher', daemon=True)
+        self._thread.start()
+
+    def embed_documents(self, texts):
+        """
+        Embeds texts together with whatever other callers are embedding at the same time.
+
+        :param texts: List of texts to embed.
+        :return: List of embedding vectors, in the order of the texts.
+        """
+        if not texts:
+            return []
+        request = _EmbeddingRequest(list(texts))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingDispatcher is closed")
+            self.requests.put(request)
+        return request.future.result()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def _dispatch_loop(self):
+        pending = []
+        stopping = False  # Set once the stop sentinel is read; everything queued before it is still sent
+        while True:
+            if not pending:
+                request = self.requests.get()
+                if request is None:
+                    return
+                pending.append(request)
+            # Requests left over from a full batch keep their place and their original deadline
+            deadline = pending[0].enqueued + self.max_wait
+
+            # Gather requests until a batch is full or the oldest request's deadline passes
+            while not stopping and sum(request.unsent() for request in pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+
+            # Take up to max_batch_size texts, oldest requests first; large requests span several batches
+            batch, routes = [], []
+            for request in pending:
+                take = min(request.unsent(), self.max_batch_size - len(batch))
+                if take <= 0:
+                    break
+                batch.extend(request.texts[request.sent:request.sent + take])
+                routes.append((request, request.sent, take))
+                request.sent += take
+            pending = [request for request in pending if request.unsent() > 0]
+
+            self.in_flight.acquire()
+            self.executor.submit(self._send_batch, batch, routes)
+            if stopping and not pending:
+                return
+
+    def _send_batch(self, batch, routes):
+        try:
+            vectors = self.embedding_model.embed_documents(batch)
+            with self._stats_lock:
+                self.batches_sent += 1
+                self.texts_sent += len(batch)
+            position = 0
+            for request, offset, take in routes:
+                request.receive(offset, vectors[position:position + take])
+                position += take
+        except Exception as e:
+            logger.error("Embedding batch of %d texts failed: %s", len(batch), e)
+            for request, _, _ in routes:
+                request.fail(e)
+        finally:
+            self.in_flight.release()
+
+    def close(self):
+        """
+        Stops accepting requests, sends what is pending and stops the dispatch thread.
+        Requests that could not be sent any more fail with RuntimeError instead of blocking their callers.
+        """
+        with self._lock:
+            already_closed = self._closed
+            self._closed = True
+            if not already_closed:
+                self.requests.put(None)
+        self._thread.join()
+        self.executor.shutdown(wait=True)
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.fail(RuntimeError("EmbeddingDispatcher is closed"))
@@ -0,0 +1,101 @@
+import re
+import time
+import hashlib
+import numpy as np
+
+# Deterministic local stand-ins for the LLM and embedding backends, used by the benchmarks and tests.
+# They need no network, always give the same output for the same input and can simulate latency.
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _stable_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class FakeResponse:
+    """
+    Minimal stand-in for a chat model response message.
+    """
+
+    def __init__(self, content, input_tokens, output_tokens):
+        self.content = content
+        self.usage_metadata = {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                               'total_tokens': input_tokens + output_tokens}
+
+
+class FakeLLM:
+    """
+    Deterministic LLM stand-in. The response is derived from a hash of the prompt and
+    each call sleeps for a fixed latency plus a per-output-token delay.
+    """
+
+    def __init__(self, latency=0.0, seconds_per_token=0.0, output_words=5):
+        """
+        :param latency: Seconds to sleep for every call.
+        :param seconds_per_token: Additional seconds to sleep per generated token.
+        :param output_words: Number of words in each response.
+        """
+        self.latency = latency
+        self.seconds_per_token = seconds_per_token
+        self.output_words = output_words
+        self.calls = 0
+
+    def get_num_tokens(self, text):
+        return len(WORD_PATTERN.findall(text))
+
+    def invoke(self, prompt):
+        self.calls += 1
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        words = WORD_PATTERN.findall(prompt) or ["empty"]
+        seed = _stable_hash(prompt)
+        picked = [words[(seed >> (i * 7)) % len(words)] for i in range(self.output_words)]
+        content = "<p>" + " ".join(picked) + "</p>"
+
+        time.sleep(self.latency + self.seconds_per_token * self.output_words)
+        return FakeResponse(content, len(words), self.output_words)
+
+
+class FakeEmbeddings:
+    """
+    Deterministic embedding stand-in using signed feature hashing of the words in each text,
+    so texts that share words get similar vectors and clustering behaves realistically.
+    """
+
+    def __init__(self, dimension=256, latency=0.0, seconds_per_text=0.0):
+        """
+        :param dimension: Size of the embedding vectors.
+        :param latency: Seconds to sleep for every call.
+        :param seconds_per_text: Additional seconds to sleep per embedded text.
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.seconds_per_text = seconds_per_text
+        self.calls = 0
+        self._word_cache = {}
+
+    def _word_slot(self, word):
+        slot = self._word_cache.get(word)
+        if slot is None:
+            h = _stable_hash(word)
+            slot = self._word_cache[word] = (h % self.dimension, 1.0 if (h >> 32) & 1 else -1.0)
+        return slot
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension)
+        for word in WORD_PATTERN.findall(text.lower()):
+            index, sign = self._word_slot(word)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[_stable_hash(text) % self.dimension] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency + self.seconds_per_text * len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
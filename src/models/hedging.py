@@ -0,0 +1,168 @@
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """
+    Call outcomes and a sliding window of successful latencies for one provider.
+    """
+
+    def __init__(self, window=200):
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.hedges = 0
+        self.fallbacks = 0
+
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+    def summary(self):
+        return {'calls': self.calls, 'wins': self.wins, 'errors': self.errors, 'hedges': self.hedges,
+                'fallbacks': self.fallbacks, 'latency_seconds_p50': self.percentile(50),
+                'latency_seconds_p95': self.percentile(95), 'latency_seconds_p99': self.percentile(99)}
+
+
+class HedgedLLM:
+    """
+    The HedgedLLM class sends each prompt to an ordered list of LLM providers.
+    The first provider is tried first; if it has not answered after its recent latency percentile,
+    the prompt is also sent to the next provider (a hedged request) and the first answer wins.
+    A provider that fails hands the prompt to the next provider straight away (a fallback).
+    """
+
+    def __init__(self, providers, scheduler=None, hedging=True, hedge_percentile=95, hedge_initial_delay=5.0,
+                 hedge_min_delay=0.5, min_samples=10, max_hedges=1, max_workers=8, window=200):
+        """
+        :param providers: Ordered list of (name, llm) tuples; the name is also the scheduler's rate-limit key
+        :param scheduler: Optional; LLMScheduler that paces and retries the calls of each provider
+        :param hedging: If False, later providers are only used as fallbacks on errors
+        :param hedge_percentile: Latency percentile of a provider after which the next provider is also tried
+        :param hedge_initial_delay: Hedge delay used until a provider has min_samples latencies
+        :param hedge_min_delay: Lower bound on the hedge delay, so fast providers are not hedged on jitter
+        :param min_samples: Latencies needed before the percentile is trusted
+        :param max_hedges: Maximum hedged requests per prompt (fallbacks are not limited)
+        :param max_workers: Threads available for in-flight requests across all prompts
+        :param window: Number of recent latencies kept per provider
+        """
+        if not providers:
+            raise ValueError("HedgedLLM needs at least one provider")
+        self.providers = list(providers)
+        self.scheduler = scheduler
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-hedge')
+        self.lock = threading.Lock()
+        self.provider_stats = {name: ProviderStats(window) for name, _ in self.providers}
+
+    def hedge_delay(self, name):
+        """
+        :return: Seconds to wait on a provider before hedging to the next one
+        """
+        with self.lock:
+            stats = self.provider_stats[name]
+            if len(stats.latencies) < self.min_samples:
+                return self.hedge_initial_delay
+            return max(self.hedge_min_delay, stats.percentile(self.hedge_percentile))
+
+    def _attempt(self, name, llm, prompt, priority, tokens, results):
+        start = time.perf_counter()
+        try:
+            if self.scheduler is not None:
+                response = self.scheduler.call(name, lambda: llm.invoke(prompt), priority=priority, tokens=tokens)
+            else:
+                response = llm.invoke(prompt)
+        except Exception as e:
+            with self.lock:
+                self.provider_stats[name].errors += 1
+            results.put((name, None, e))
+            return
+        # Latencies of requests that lost the race are kept too, they are what the hedge delay is tuned on
+        with self.lock:
+            self.provider_stats[name].latencies.append(time.perf_counter() - start)
+        results.put((name, response, None))
+
+    def invoke(self, prompt, priority='default', tokens=0, prepare=None):
+        """
+        Sends the prompt to the providers until one answers.
+
+        :param prompt: The prompt text
+        :param priority: Scheduler priority class
+        :param tokens: Estimated tokens of the request, for the scheduler
+        :param prepare: Optional; called with (name, llm) to get the client the prompt is sent to,
+                        for example the client bound to a JSON output format
+        :return: Tuple (name of the winning provider, response)
+        """
+        # Answers of losing requests arrive after we return and are dropped with the queue
+        results = queue.Queue()
+        next_index = 0
+        in_flight = 0
+        hedges = 0
+        last_error = None
+
+        def launch(reason):
+            nonlocal next_index, in_flight
+            name, llm = self.providers[next_index]
+            if prepare is not None:
+                llm = prepare(name, llm)
+            with self.lock:
+                stats = self.provider_stats[name]
+                stats.calls += 1
+                if reason == 'hedge':
+                    stats.hedges += 1
+                elif reason == 'fallback':
+                    stats.fallbacks += 1
+            self.executor.submit(self._attempt, name, llm, prompt, priority, tokens, results)
+            next_index += 1
+            in_flight += 1
+            return name
+
+        current = launch('primary')
+        while True:
+            can_hedge = self.hedging and hedges < self.max_hedges and next_index < len(self.providers)
+            try:
+                name, response, error = results.get(timeout=self.hedge_delay(current) if can_hedge else None)
+            except queue.Empty:
+                hedges += 1
+                logger.info("%s is slow, hedging to %s", current, self.providers[next_index][0])
+                current = launch('hedge')
+                continue
+
+            in_flight -= 1
+            if error is None:
+                with self.lock:
+                    self.provider_stats[name].wins += 1
+                return name, response
+
+            last_error = error
+            if next_index < len(self.providers):
+                logger.warning("%s failed, falling back to %s: %s", name, self.providers[next_index][0], error)
+                current = launch('fallback')
+            elif in_flight == 0:
+                raise last_error
+
+    def stats(self):
+        """
+        :return: Dictionary of provider name to its call, win, hedge and fallback counts and latency percentiles
+        """
+        with self.lock:
+            return {name: stats.summary() for name, stats in self.provider_stats.items()}
+
+    def get_num_tokens(self, text):
+        return self.providers[0][1].get_num_tokens(text)
+
+    def shutdown(self, wait=False):
+        self.executor.shutdown(wait=wait)
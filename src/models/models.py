@@ -1,17 +1,46 @@
 import os
+import time
 import yaml
 import logging
+import importlib
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_ollama import ChatOllama
-from langchain_openai import OpenAI
-from langchain_openai import AzureOpenAI
+from .fakes import FakeLLM, FakeEmbeddings
+from .onnx_embeddings import OnnxEmbeddings
+from .scheduler import LLMScheduler
+from .hedging import HedgedLLM
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Provider classes are imported on first use so that importing this module (and every
+# script or worker that imports it) does not pay for provider packages it never uses.
+_LAZY_PROVIDERS = {
+    'ChatGroq': ('langchain_groq', 'ChatGroq'),
+    'OllamaEmbeddings': ('langchain_community.embeddings', 'OllamaEmbeddings'),
+    'ChatOllama': ('langchain_ollama', 'ChatOllama'),
+    'OpenAI': ('langchain_openai', 'OpenAI'),
+    'AzureOpenAI': ('langchain_openai', 'AzureOpenAI'),
+}
+
+def __getattr__(name):
+    """
+    Imports a provider class the first time it is accessed as a module attribute.
+    """
+    if name not in _LAZY_PROVIDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_PROVIDERS[name]
+    value = getattr(importlib.import_module(module_name), attribute)
+    globals()[name] = value
+    return value
+
+def _provider(name):
+    """
+    Returns a provider class, importing it if needed. Names already bound in the module
+    (including test doubles patched in) take precedence.
+    """
+    return globals().get(name) or __getattr__(name)
+
 class ModelManager:
     def __init__(self, config_path):
         """
@@ -30,15 +59,29 @@ class ModelManager:
 
         self.llm = None
         self.embedding_model = None
-        
-        if self.config['llm_provider'] == 'groq':
+        # Optional PipelineMetrics (or anything with record_call) that every model call is reported to
+        self.metrics = None
+        # Paces, prioritises and retries LLM calls per provider; shared by shallow copies of the manager
+        self.scheduler = LLMScheduler.from_config(self.config)
+        # HedgedLLM over llm_providers, if more than one provider is configured
+        self.llm_pool = None
+        # Provider ('groq', 'ollama', ...) of each llm_providers entry, by name
+        self.llm_pool_providers = {}
+
+        if len(self.config.get('llm_providers') or []) > 1:
+            self.load_llm_providers()
+
+        elif self.config['llm_provider'] == 'groq':
             self.load_llm_groq()
             
-        if self.config['llm_provider'] == 'ollama':
+        elif self.config['llm_provider'] == 'ollama':
             self.load_llm_ollama()
             
-        if self.config['llm_provider'] == 'openai':
+        elif self.config['llm_provider'] == 'openai':
             self.load_llm_openai()
+
+        elif self.config['llm_provider'] == 'fake':
+            self.load_llm_fake()
         
         
     # def get_llm_response(self):
@@ -49,6 +92,28 @@ class ModelManager:
     #     if self.config['llm_provider'] == 'openai':
     #         return self.llm_openai(prompt)
 
+    def create_llm(self, provider, model=None):
+        """
+        Creates a new LLM client for a provider.
+        :param provider: 'groq', 'ollama', 'openai' or 'fake'.
+        :param model: Optional; model name, defaults to llm_model from the configuration.
+        :return: The LLM client.
+        """
+        # Retries are left to the LLMScheduler, which backs off and honours Retry-After; retries inside the
+        # clients would multiply its attempts and hide rate limits from it
+        if provider == 'groq':
+            return _provider('ChatGroq')(model_name=model or self.config['llm_model'], api_key=os.getenv("GROQ_API_KEY"),
+                                         max_retries=0)
+        if provider == 'ollama':
+            return _provider('ChatOllama')(model=model or self.config['llm_model'], temperature=0)
+        if provider == 'openai':
+            # The Azure deployment selects the model
+            return _provider('AzureOpenAI')(deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT"), max_retries=0)
+        if provider == 'fake':
+            return FakeLLM(latency=self.config.get('fake_llm_latency', 0.0),
+                           seconds_per_token=self.config.get('fake_llm_seconds_per_token', 0.0))
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
     def load_llm_groq(self):
         """
         Lazily loads the LLM Groq model based on the configuration if it hasn't been loaded yet.
@@ -57,10 +122,7 @@ class ModelManager:
         if not self.llm:
             try:
                 logger.info("Loading Groq LLM model...")
-                self.llm = ChatGroq(
-                    model_name=self.config['llm_model'],
-                    api_key=os.getenv("GROQ_API_KEY")
-                )
+                self.llm = self.create_llm('groq')
                 logger.info("Groq LLM model loaded successfully.")
                 
             except KeyError as e:
@@ -85,9 +147,7 @@ class ModelManager:
                 print("AZURE_OPENAI_DEPLOYMENT:", os.getenv("AZURE_OPENAI_DEPLOYMENT"))
                 load_dotenv()
                 # print("AZURE_OPENAI_DEPLOYMENT:", os.getenv("AZURE_OPENAI_DEPLOYMENT"))
-                self.llm = AzureOpenAI(
-                    deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT"),  # The deployment name of the model
-                    )
+                self.llm = self.create_llm('openai')
                 logger.info("OpenAI model loaded successfully.")
                 
             except KeyError as e:
@@ -106,10 +166,7 @@ class ModelManager:
             try:
                 logger.info("Loading Ollama LLM model...")
                 
-                self.llm = ChatOllama(
-                                model=self.config['llm_model'],
-                                temperature=0,
-                                )
+                self.llm = self.create_llm('ollama')
                 logger.info("Ollama LLM model loaded successfully.")
                           
             except KeyError as e:
@@ -119,6 +176,49 @@ class ModelManager:
                 logger.error("Error loading Ollama LLM model: %s", e)
                 raise
 
+    def load_llm_fake(self):
+        """
+        Loads the deterministic offline LLM stand-in used for benchmarks and tests.
+        :return: The loaded fake LLM.
+        """
+        if not self.llm:
+            logger.info("Loading fake LLM model...")
+            self.llm = self.create_llm('fake')
+        return self.llm
+
+    def load_llm_providers(self):
+        """
+        Loads every provider of the ordered llm_providers list behind a HedgedLLM.
+        Entries are provider names or {provider, model, name} mappings; the first entry is the primary provider.
+        The name (the provider by default) labels the statistics and selects the llm_rate_limits entry.
+        :return: The HedgedLLM.
+        :raises ValueError: If none of the providers could be loaded.
+        """
+        if not self.llm_pool:
+            providers, failures = [], []
+            for entry in self.config['llm_providers']:
+                entry = entry if isinstance(entry, dict) else {'provider': entry}
+                try:
+                    logger.info("Loading %s LLM model...", entry['provider'])
+                    name = entry.get('name', entry['provider'])
+                    providers.append((name, self.create_llm(entry['provider'], entry.get('model'))))
+                    self.llm_pool_providers[name] = entry['provider']
+                except Exception as e:
+                    # A provider that cannot be loaded is left out rather than stopping the others
+                    logger.error("Error loading %s LLM model, leaving it out: %s", entry['provider'], e)
+                    failures.append(f"{entry['provider']}: {e}")
+            if not providers:
+                raise ValueError("None of the llm_providers could be loaded (" + "; ".join(failures) + ")")
+            self.llm_pool = HedgedLLM(providers, scheduler=self.scheduler,
+                                      hedging=self.config.get('llm_hedging', True),
+                                      hedge_percentile=self.config.get('llm_hedge_percentile', 95),
+                                      hedge_initial_delay=self.config.get('llm_hedge_initial_delay', 5.0),
+                                      hedge_min_delay=self.config.get('llm_hedge_min_delay', 0.5),
+                                      max_hedges=self.config.get('llm_max_hedges', 1))
+            # The primary client still serves token counting and direct use
+            self.llm = providers[0][1]
+        return self.llm_pool
+
     def load_embedding_model(self):
         """
         Lazily loads the Hugging Face embedding model based on the configuration if it hasn't been loaded yet.
@@ -127,7 +227,20 @@ class ModelManager:
         if not self.embedding_model:
             try:
                 logger.info("Loading embedding model...")
-                self.embedding_model = OllamaEmbeddings(model=self.config['embedding_model'])
+                provider = self.config.get('embedding_provider', 'ollama')
+                if provider == 'onnx':
+                    self.embedding_model = OnnxEmbeddings(
+                        model_path=self.config['onnx_model_path'],
+                        max_seq_length=self.config.get('onnx_max_seq_length', 256),
+                        batch_size=self.config.get('onnx_batch_size', 32),
+                        num_threads=self.config.get('onnx_num_threads'),
+                        quantize=self.config.get('onnx_quantize', True))
+                elif provider == 'fake':
+                    self.embedding_model = FakeEmbeddings(dimension=self.config.get('fake_embedding_dimension', 256),
+                                                          latency=self.config.get('fake_embedding_latency', 0.0),
+                                                          seconds_per_text=self.config.get('fake_embedding_seconds_per_text', 0.0))
+                else:
+                    self.embedding_model = _provider('OllamaEmbeddings')(model=self.config['embedding_model'])
                 logger.info("Embedding model loaded successfully.")
             except KeyError as e:
                 logger.error("Missing required config key for embedding model: %s", e)
@@ -137,6 +250,80 @@ class ModelManager:
                 raise
         return self.embedding_model
 
+    def structured_llm(self, provider, llm, schema):
+        """
+        Binds an LLM client to the provider's JSON output mode: Groq's JSON object mode, or Ollama's
+        structured outputs constrained to the JSON schema. Other clients (the Azure completion model and
+        the fake LLM) have no such mode and are returned unchanged; the prompt still asks for the JSON.
+        :param provider: 'groq', 'ollama', 'openai' or 'fake'.
+        :param llm: The LLM client.
+        :param schema: JSON schema of the expected response.
+        :return: The client to send the prompt to.
+        """
+        if provider == 'groq':
+            return llm.bind(response_format={'type': 'json_object'})
+        if provider == 'ollama':
+            return llm.bind(format=schema)
+        return llm
+
+    def invoke_llm(self, prompt, priority='default', schema=None):
+        """
+        Sends a prompt to the loaded LLM through the rate-limit-aware scheduler and records latency and token usage.
+        With several llm_providers the prompt is hedged across them and the call is recorded under the winning provider.
+        Latency includes time spent waiting for the provider's rate limits and on retries.
+        :param prompt: The prompt text.
+        :param priority: Scheduler priority class: 'summary', 'default' or 'theme'.
+        :param schema: Optional; JSON schema of the response, requested through the provider's JSON output mode
+                       (see structured_llm). The response text still has to be parsed and validated.
+        :return: The text content of the response.
+        """
+        provider = self.config.get('llm_provider')
+        # Rate limits count prompt and completion tokens; estimate both before the call
+        tokens = len(prompt) // 4 + self.config.get('llm_expected_output_tokens', 512)
+        start = time.perf_counter()
+        try:
+            if self.llm_pool is not None:
+                prepare = None
+                if schema is not None:
+                    prepare = lambda name, llm: self.structured_llm(self.llm_pool_providers.get(name, name), llm, schema)
+                provider, response = self.llm_pool.invoke(prompt, priority=priority, tokens=tokens, prepare=prepare)
+            else:
+                llm = self.llm if schema is None else self.structured_llm(provider, self.llm, schema)
+                response = self.scheduler.call(provider, lambda: llm.invoke(prompt), priority=priority, tokens=tokens)
+        except Exception as e:
+            self._record_call('llm', provider, time.perf_counter() - start, error=str(e))
+            raise
+
+        # Chat models return a message with usage metadata, completion models return plain text
+        usage = getattr(response, 'usage_metadata', None) or {}
+        self._record_call('llm', provider, time.perf_counter() - start,
+                          input_tokens=usage.get('input_tokens'), output_tokens=usage.get('output_tokens'))
+        return getattr(response, 'content', response)
+
+    def embed_documents(self, texts):
+        """
+        Embeds a batch of texts with the loaded embedding model and records latency.
+        Embedding backends do not report token usage, so input tokens are estimated at 4 characters per token.
+        This also lets the ModelManager be passed wherever an embedding model is expected.
+        :param texts: List of texts to embed.
+        :return: List of embedding vectors.
+        """
+        provider = self.config.get('embedding_provider', 'ollama')
+        start = time.perf_counter()
+        try:
+            vectors = self.load_embedding_model().embed_documents(texts)
+        except Exception as e:
+            self._record_call('embedding', provider, time.perf_counter() - start, items=len(texts), error=str(e))
+            raise
+        self._record_call('embedding', provider, time.perf_counter() - start, items=len(texts),
+                          input_tokens=sum(len(text) for text in texts) // 4)
+        return vectors
+
+    def _record_call(self, kind, provider, latency_seconds, items=1, input_tokens=None, output_tokens=None, error=None):
+        if self.metrics is not None:
+            self.metrics.record_call(kind, provider, latency_seconds, items=items, input_tokens=input_tokens,
+                                     output_tokens=output_tokens, error=error)
+
     def count_tokens(self, text):
         """
         Counts the number of tokens in the given text using the Groq LLM.
@@ -0,0 +1,142 @@
+import os
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model_int8.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+class OnnxEmbeddings:
+    """
+    The OnnxEmbeddings class runs a sentence-embedding model in-process on CPU with ONNX Runtime.
+    Texts are tokenized with a fast Hugging Face tokenizer, embedded in batches, mean-pooled over
+    the attention mask and L2-normalized. It exposes the same embed_documents/embed_query methods
+    as the LangChain embedding classes, so it can be used wherever those are.
+
+    The model directory must contain model.onnx and tokenizer.json (see export_onnx_model).
+    """
+
+    def __init__(self, model_path, max_seq_length=256, batch_size=32, num_threads=None, quantize=True):
+        """
+        Loads the tokenizer and creates the ONNX Runtime session.
+
+        :param model_path: Directory with model.onnx and tokenizer.json.
+        :param max_seq_length: Texts are truncated to this many tokens.
+        :param batch_size: Number of texts per inference call.
+        :param num_threads: Threads ONNX Runtime uses per inference call. If None or 0, uses all cores.
+        :param quantize: Whether to run an int8 dynamically quantized copy of the model (created on first use).
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = model_path
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        onnx_file = os.path.join(model_path, MODEL_FILE)
+        if quantize:
+            onnx_file = quantize_onnx_model(model_path)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_file, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info("Loaded ONNX embedding model %s with %d threads", onnx_file, options.intra_op_num_threads)
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            inputs['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+        # Mean pooling over the real (non-padding) tokens, then L2 normalization
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        """
+        Embeds a list of texts.
+
+        :param texts: List of texts to embed.
+        :return: List of embedding vectors (lists of floats), in the order of the texts.
+        """
+        if not texts:
+            return []
+        # Batch texts of similar length together so less work is spent on padding
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        embeddings = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[i] for i in batch_indices])
+            if embeddings.shape[1] == 0:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[batch_indices] = batch
+        return embeddings.tolist()
+
+    def embed_query(self, text):
+        """
+        Embeds a single text.
+
+        :param text: The text to embed.
+        :return: Embedding vector as a list of floats.
+        """
+        return self.embed_documents([text])[0]
+
+
+def quantize_onnx_model(model_path):
+    """
+    Creates an int8 dynamically quantized copy of model.onnx next to it, unless it already exists.
+
+    :param model_path: Directory with model.onnx.
+    :return: Path to the quantized model.
+    """
+    quantized_file = os.path.join(model_path, QUANTIZED_MODEL_FILE)
+    if not os.path.exists(quantized_file):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        logger.info("Quantizing %s to int8...", os.path.join(model_path, MODEL_FILE))
+        quantize_dynamic(os.path.join(model_path, MODEL_FILE), quantized_file, weight_type=QuantType.QInt8)
+    return quantized_file
+
+
+def export_onnx_model(model_name, model_path):
+    """
+    Exports a sentence-transformers model to model.onnx and tokenizer.json in model_path.
+    Needs torch and sentence-transformers, which are only used for the export.
+
+    :param model_name: Name or path of the sentence-transformers model (e.g. 'all-MiniLM-L6-v2').
+    :param model_path: Directory to write the exported model to.
+    :return: model_path
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(model_path, exist_ok=True)
+    transformer = SentenceTransformer(model_name, device='cpu')[0]
+    transformer.tokenizer.save_pretrained(model_path)  # Writes tokenizer.json for fast tokenizers
+
+    model = transformer.auto_model.eval()
+    dummy = transformer.tokenizer(["An example sentence."], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(dummy[name] for name in input_names), os.path.join(model_path, MODEL_FILE),
+                          input_names=input_names, output_names=['last_hidden_state'],
+                          dynamic_axes=dynamic_axes, opset_version=14)
+    logger.info("Exported %s to %s", model_name, model_path)
+    return model_path
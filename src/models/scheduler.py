@@ -0,0 +1,232 @@
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from email.utils import parsedate_to_datetime
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lower values are served first when callers are waiting for the same provider
+PRIORITY_CLASSES = {'summary': 0, 'default': 1, 'theme': 2}
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# (package, class) of connection and timeout errors; subclasses such as APITimeoutError match too
+RETRYABLE_ERROR_TYPES = {
+    ('groq', 'APIConnectionError'),
+    ('openai', 'APIConnectionError'),
+    ('httpx', 'TransportError'),
+    ('requests', 'ConnectionError'),
+    ('requests', 'Timeout'),
+}
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to capacity units and refills at rate units per second.
+    A rate of None means unlimited.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """
+        :return: Seconds until amount units can be taken (0 if they can be taken now)
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)  # A request larger than the bucket waits for a full bucket
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ProviderLimiter:
+    """
+    Request and token buckets for one provider, handed out in priority order.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, burst=None):
+        """
+        :param requests_per_minute: Request limit, or None/0 for unlimited
+        :param tokens_per_minute: Token limit, or None/0 for unlimited
+        :param burst: Optional; bucket capacity as a fraction of the per-minute limits (default 1.0)
+        """
+        burst = burst or 1.0
+        self.requests = TokenBucket(requests_per_minute / 60 if requests_per_minute else None,
+                                    max(1.0, (requests_per_minute or 0) * burst))
+        self.tokens = TokenBucket(tokens_per_minute / 60 if tokens_per_minute else None,
+                                  max(1.0, (tokens_per_minute or 0) * burst))
+        self.condition = threading.Condition()
+        self.waiting = []
+        self.counter = itertools.count()
+
+    def acquire(self, priority, tokens):
+        """
+        Blocks until this caller is the highest-priority waiter and both buckets have room.
+
+        :param priority: Priority value (lower is served first)
+        :param tokens: Estimated tokens of the request
+        """
+        with self.condition:
+            entry = (priority, next(self.counter))
+            heapq.heappush(self.waiting, entry)
+            while True:
+                if self.waiting[0] == entry:
+                    now = time.monotonic()
+                    wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                    if wait <= 0:
+                        heapq.heappop(self.waiting)
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        self.condition.notify_all()
+                        return
+                    self.condition.wait(timeout=wait)
+                else:
+                    self.condition.wait()
+
+    def pause(self, seconds):
+        """
+        Holds back every caller of this provider, e.g. after the provider sent Retry-After.
+        """
+        with self.condition:
+            self.requests.pause(seconds)
+            self.condition.notify_all()
+
+
+def error_status_code(error):
+    """
+    Extracts an HTTP status code from provider SDK, httpx or urllib errors.
+    """
+    for candidate in (error, getattr(error, 'response', None)):
+        for attribute in ('status_code', 'code', 'status'):
+            value = getattr(candidate, attribute, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def error_retry_after(error):
+    """
+    Extracts the Retry-After delay (seconds or HTTP date) from an error's response headers.
+
+    :return: Seconds to wait, or None if the error carries no Retry-After header
+    """
+    for candidate in (getattr(error, 'response', None), error):
+        headers = getattr(candidate, 'headers', None)
+        value = headers.get('retry-after') if headers is not None else None
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def is_retryable(error):
+    """
+    Rate limits, transient server errors, timeouts and connection failures are retried. Connection and
+    timeout errors of the provider SDKs and of httpx are matched by class, without importing those packages.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any((cls.__module__.split('.')[0], cls.__name__) in RETRYABLE_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    return error_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class LLMScheduler:
+    """
+    The LLMScheduler class paces LLM calls per provider with request and token buckets,
+    serves waiting calls by priority class (final summaries before theme calls), and retries
+    rate-limited or transient failures with jittered exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, rate_limits=None, max_retries=5, base_delay=1.0, max_delay=60.0):
+        """
+        :param rate_limits: Dictionary of provider name to {requests_per_minute, tokens_per_minute, burst}
+        :param max_retries: Retries after the first attempt before the error is raised
+        :param base_delay: Backoff delay for the first retry, doubled on every further retry
+        :param max_delay: Upper bound on the backoff delay
+        """
+        self.rate_limits = rate_limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds a scheduler from the llm_rate_limits and llm_retry_* config values.
+        """
+        return cls(rate_limits=config.get('llm_rate_limits'), max_retries=config.get('llm_max_retries', 5),
+                   base_delay=config.get('llm_retry_base_delay', 1.0), max_delay=config.get('llm_retry_max_delay', 60.0))
+
+    def limiter(self, provider):
+        """
+        :return: The ProviderLimiter of a provider, created on first use
+        """
+        with self.lock:
+            if provider not in self.limiters:
+                self.limiters[provider] = ProviderLimiter(**(self.rate_limits.get(provider) or {}))
+            return self.limiters[provider]
+
+    def backoff(self, attempt):
+        """
+        :return: Full-jitter exponential backoff delay for the given retry attempt (0-based)
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, provider, fn, priority='default', tokens=0):
+        """
+        Runs fn once the provider's limits allow it, retrying retryable failures.
+
+        :param provider: Provider name used to look up the rate limits
+        :param fn: Callable making the request
+        :param priority: Priority class name (see PRIORITY_CLASSES)
+        :param tokens: Estimated tokens of the request
+        :return: The return value of fn
+        """
+        limiter = self.limiter(provider)
+        priority_value = PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES['default'])
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(priority_value, tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                retry_after = error_retry_after(e)
+                if retry_after is not None:
+                    # Everyone waiting on this provider has to respect the server's delay
+                    logger.warning("%s asked to retry after %.2fs (attempt %d): %s", provider, retry_after, attempt + 1, e)
+                    limiter.pause(retry_after)
+                else:
+                    delay = self.backoff(attempt)
+                    logger.warning("%s call failed, retrying in %.2fs (attempt %d): %s", provider, delay, attempt + 1, e)
+                    time.sleep(delay)
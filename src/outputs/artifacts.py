@@ -0,0 +1,203 @@
+import os
+import json
+import shutil
+import logging
+import uuid
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+CHUNKS_FILE = 'chunks.bin'
+CHUNK_OFFSETS_FILE = 'chunk_offsets.npy'
+VECTORS_FILE = 'vectors.npy'
+LABELS_FILE = 'labels.npy'
+COMPRESSION_FILE = 'compression.npz'
+FORMAT_VERSION = 1
+
+
+def save_run_artifacts(artifacts_dir, chunks, vectors, labels, representatives=None, themes=None, timings=None, report_data=None,
+                       compression=None):
+    """
+    Persists the outputs of a pipeline run in a columnar layout so they can be reloaded without re-embedding.
+
+    Chunk texts are stored as one UTF-8 blob plus an int64 offsets table, vectors as a float32 .npy
+    matrix (compressed int8 or float16 vectors keep their type) and labels as an int32 .npy array.
+    The small per-cluster values go into manifest.json, and the state of the compressor, if any, into compression.npz.
+    Plain .npy files are used rather than Parquet so load_run_artifacts can memory-map them without a copy.
+
+    :param artifacts_dir: Directory to write the artifacts to (created if missing, replaced as a whole if it exists)
+    :param chunks: List of chunk texts
+    :param vectors: Embedding vectors, one row per chunk
+    :param labels: Cluster label for each chunk
+    :param representatives: List of (cluster_label, indices of closest chunks) tuples
+    :param themes: Dictionary of cluster label to theme
+    :param timings: Dictionary of stage name to seconds
+    :param report_data: Other JSON-serializable report values (summary, counts, ...)
+    :param compression: Optional; the EmbeddingCompressor the vectors were compressed with
+    :return: The artifacts directory
+    """
+    # Check everything before the first write, so invalid inputs leave no partial artifacts behind
+    vectors = np.asarray(vectors)
+    if vectors.dtype not in (np.int8, np.float16):
+        vectors = vectors.astype(np.float32, copy=False)
+    labels = np.asarray(labels)
+    if len(vectors) != len(chunks) or len(labels) != len(chunks):
+        raise ValueError(f"Got {len(chunks)} chunks, {len(vectors)} vectors and {len(labels)} labels; they must match")
+    if len(chunks) and vectors.ndim != 2:
+        raise ValueError(f"Vectors must be a 2-D matrix, got {vectors.ndim} dimension(s)")
+    if labels.ndim != 1 or (len(labels) and not (np.issubdtype(labels.dtype, np.number)
+                                                 and np.array_equal(labels, labels.astype(np.int64)))):
+        raise ValueError("Labels must be a 1-D sequence of whole numbers")
+
+    # The artifacts are written to a new directory next to the target and swapped in once complete,
+    # so a failed write never leaves a mix of old and new files
+    target = os.path.abspath(artifacts_dir)
+    staging_dir = _sibling_dir(target, 'new')
+    previous_dir = None
+    try:
+        os.makedirs(staging_dir)
+        _write_artifacts(staging_dir, chunks, vectors, labels, representatives, themes, timings, report_data, compression)
+        if os.path.exists(target):
+            previous_dir = _sibling_dir(target, 'old')
+            os.replace(target, previous_dir)
+        os.replace(staging_dir, target)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if previous_dir is not None and not os.path.exists(target):
+            os.replace(previous_dir, target)  # Put the previous artifacts back
+        raise
+    if previous_dir is not None:
+        shutil.rmtree(previous_dir, ignore_errors=True)
+
+    logger.info("Saved artifacts for %d chunks to %s", len(chunks), artifacts_dir)
+    return artifacts_dir
+
+
+def _sibling_dir(path, kind):
+    """
+    :return: A unique, hidden path next to the given directory
+    """
+    return os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}-{kind}-{uuid.uuid4().hex[:12]}')
+
+
+def _write_artifacts(artifacts_dir, chunks, vectors, labels, representatives, themes, timings, report_data, compression):
+    """
+    Writes the artifact files of save_run_artifacts into an existing, empty directory.
+    """
+    # Chunks: one blob and the byte offset where each chunk starts (plus the end of the last one)
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+    with open(os.path.join(artifacts_dir, CHUNKS_FILE), 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(os.path.join(artifacts_dir, CHUNK_OFFSETS_FILE), offsets)
+
+    np.save(os.path.join(artifacts_dir, VECTORS_FILE), vectors)
+    np.save(os.path.join(artifacts_dir, LABELS_FILE), labels.astype(np.int32))
+    if compression is not None:
+        np.savez(os.path.join(artifacts_dir, COMPRESSION_FILE), **compression.state())
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'num_chunks': len(chunks),
+        'embedding_dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        'vector_dtype': vectors.dtype.name,
+        'compression': compression is not None,
+        'representatives': [[int(label), [int(i) for i in indices]] for label, indices in (representatives or [])],
+        'themes': {str(label): theme for label, theme in (themes or {}).items()},
+        'timings': timings or {},
+        'report_data': report_data or {},
+    }
+    with open(os.path.join(artifacts_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, default=_to_builtin)
+
+
+def load_run_artifacts(artifacts_dir):
+    """
+    Loads artifacts written by save_run_artifacts. Vectors, labels and chunk texts are memory-mapped,
+    so nothing is copied into memory until it is used.
+
+    :param artifacts_dir: Directory the artifacts were written to
+    :return: RunArtifacts instance
+    """
+    return RunArtifacts(artifacts_dir)
+
+
+def _to_builtin(value):
+    """
+    JSON fallback for NumPy scalars and arrays.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RunArtifacts:
+    """
+    Read-only, memory-mapped view over the artifacts of a pipeline run.
+    """
+
+    def __init__(self, artifacts_dir):
+        """
+        Opens the artifacts in the given directory.
+
+        :param artifacts_dir: Directory the artifacts were written to
+        """
+        self.artifacts_dir = artifacts_dir
+        with open(os.path.join(artifacts_dir, MANIFEST_FILE), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifacts format version: {self.manifest.get('format_version')}")
+
+        self.vectors = np.load(os.path.join(artifacts_dir, VECTORS_FILE), mmap_mode='r')
+        self.labels = np.load(os.path.join(artifacts_dir, LABELS_FILE), mmap_mode='r')
+        self.chunk_offsets = np.load(os.path.join(artifacts_dir, CHUNK_OFFSETS_FILE), mmap_mode='r')
+
+        chunks_path = os.path.join(artifacts_dir, CHUNKS_FILE)
+        # np.memmap cannot map an empty file
+        self._chunk_bytes = np.memmap(chunks_path, dtype=np.uint8, mode='r') if os.path.getsize(chunks_path) else np.zeros(0, np.uint8)
+
+        self.representatives = [(label, np.asarray(indices)) for label, indices in self.manifest['representatives']]
+        self.themes = {int(label): theme for label, theme in self.manifest['themes'].items()}
+        self.timings = self.manifest['timings']
+        # State of the compressor the vectors were compressed with (EmbeddingCompressor.from_state restores it), or None
+        self.compression = None
+        if self.manifest.get('compression'):
+            with np.load(os.path.join(artifacts_dir, COMPRESSION_FILE)) as state:
+                self.compression = {key: state[key] for key in state.files}
+
+    def __len__(self):
+        return self.manifest['num_chunks']
+
+    def get_chunk(self, index):
+        """
+        Decodes a single chunk text from the mapped blob.
+
+        :param index: Position of the chunk
+        :return: Chunk text
+        """
+        start, end = self.chunk_offsets[index], self.chunk_offsets[index + 1]
+        return self._chunk_bytes[start:end].tobytes().decode('utf-8')
+
+    def get_chunks(self):
+        """
+        Decodes all chunk texts.
+
+        :return: List of chunk texts
+        """
+        return [self.get_chunk(i) for i in range(len(self))]
+
+    def report_data(self):
+        """
+        Rebuilds the data dictionary expected by create_final_report.
+
+        :return: Dictionary of report values with labels and themes restored
+        """
+        data = dict(self.manifest['report_data'])
+        data['labels'] = self.labels.tolist()
+        data['themes'] = self.themes
+        return data
@@ -0,0 +1,59 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .report_generate import create_final_report, get_report_styles, resolve_image_path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _warm_worker():
+    """
+    Process pool initializer: builds the cached styles and font metrics once per worker.
+    """
+    get_report_styles()
+
+
+def render_report(data: dict, report_path: str) -> dict:
+    """
+    Renders a single report and measures how long it took.
+
+    :param data: Dictionary containing necessary values for the report
+    :param report_path: Path to save the report PDF
+    :return: Dictionary with the report path, render time in seconds and error message (if any)
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        create_final_report(data, report_path=report_path)
+    except Exception as e:
+        logger.error("Failed to render report %s: %s", report_path, e)
+        error = str(e)
+    return {'report_path': report_path, 'seconds': time.perf_counter() - start, 'error': error}
+
+
+def render_reports(jobs, max_workers=None):
+    """
+    Renders many reports in a process pool. Each worker builds the report styles and fonts once
+    and reuses them for every report it renders.
+
+    :param jobs: Iterable of (data, report_path) tuples
+    :param max_workers: Number of worker processes. If None, uses the number of CPUs.
+    :return: List of per-report results from render_report, in the order of the jobs
+    """
+    # Background plots cannot cross process boundaries, so resolve them here
+    jobs = [(dict(data, umap_image_path=resolve_image_path(data['umap_image_path'])) if 'umap_image_path' in data else data,
+             report_path) for data, report_path in jobs]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    logger.info("Rendering %d reports with %d workers", len(jobs), max_workers)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_worker) as executor:
+        futures = [executor.submit(render_report, data, report_path) for data, report_path in jobs]
+        results = [future.result() for future in futures]
+
+    failed = sum(1 for result in results if result['error'])
+    logger.info("Rendered %d reports in %.2fs (%d failed)", len(results), time.perf_counter() - start, failed)
+    return results
@@ -0,0 +1,125 @@
+import re
+import html
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+
+
+def split_sentences(text, min_words=4):
+    """
+    Splits text into sentences at ., ! or ? followed by whitespace and an upper-case letter or digit.
+
+    :param text: Text to split
+    :param min_words: Fragments with fewer words are dropped
+    :return: List of sentences
+    """
+    sentences = (sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text))
+    return [sentence for sentence in sentences if len(sentence.split()) >= min_words]
+
+
+def textrank(vectors, damping=0.85, tolerance=1e-6, max_iterations=100):
+    """
+    Ranks items by PageRank centrality on the cosine-similarity graph of their vectors.
+    Negative similarities are dropped and every item links to every other item with its similarity as weight.
+
+    :param vectors: Array of shape (items, dimension)
+    :param damping: PageRank damping factor
+    :param tolerance: Stops when the L1 change of the scores falls below this
+    :param max_iterations: Upper bound on power iterations
+    :return: Array of scores summing to 1
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count = len(vectors)
+    if count <= 1:
+        return np.ones(count, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.maximum(norms, 1e-12)
+    similarity = np.clip(unit @ unit.T, 0, None)
+    np.fill_diagonal(similarity, 0)
+
+    # Column-stochastic transition matrix; items without any positive similarity jump uniformly
+    out_weight = similarity.sum(axis=1)
+    transition = np.where(out_weight[:, None] > 0, similarity / np.maximum(out_weight, 1e-12)[:, None], 1.0 / count).T
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(max_iterations):
+        updated = (1 - damping) / count + damping * (transition @ scores)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores / scores.sum()
+
+
+def central_sentences(chunk, top_n):
+    """
+    Picks the sentences of a chunk that are closest to the chunk as a whole (TF-IDF cosine).
+
+    :param chunk: Chunk text
+    :param top_n: Number of sentences to pick
+    :return: The picked sentences in their original order
+    """
+    sentences = split_sentences(chunk)
+    if len(sentences) <= top_n:
+        return sentences
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    try:
+        matrix = TfidfVectorizer(stop_words='english').fit_transform(sentences + [chunk])
+    except ValueError:
+        return sentences[:top_n]
+    # TF-IDF rows are L2-normalised, so the dot product with the chunk row is the cosine similarity
+    similarity = (matrix[:-1] @ matrix[-1].T).toarray().ravel()
+    picked = np.sort(np.argsort(-similarity, kind='stable')[:top_n])
+    return [sentences[i] for i in picked]
+
+
+def create_extractive_summary(chunks, vectors, representatives, themes=None, sentences_per_cluster=2,
+                              title="Extractive summary"):
+    """
+    Builds a summary from the document's own sentences, without calling an LLM.
+    The representative chunks are ranked with TextRank over the chunk embeddings that were computed for clustering;
+    clusters are ordered by the centrality of their best representative, and each contributes the sentences
+    of that representative closest to the chunk as a whole. Sentences are compared by TF-IDF cosine rather
+    than embedded, so no embedding calls are made here. Clusters whose representatives were all used already are left out.
+
+    :param chunks: The chunked text from the document
+    :param vectors: Embedding vectors of the chunks
+    :param representatives: List of tuples (cluster label, indices of the representative chunks)
+    :param themes: Optional; dictionary of cluster label to theme, used as section headings
+    :param sentences_per_cluster: Number of sentences taken from each cluster
+    :param title: Heading of the summary
+    :return: Summary in the simple HTML subset create_final_report understands (h1, h2, p, ul, li)
+    """
+    themes = themes or {}
+    candidates = sorted({int(index) for _, indices in representatives for index in indices})
+    if not candidates:
+        return f"<h1>{html.escape(title)}</h1><p>No content available.</p>"
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scores = dict(zip(candidates, textrank(vectors[candidates]).tolist()))
+
+    # Clusters are visited by the centrality of their best representative; a chunk that also represents
+    # an earlier cluster is not repeated, so such a cluster falls back to its next best representative
+    ranked = [(cluster_label, sorted((int(index) for index in indices), key=lambda index: -scores[index]))
+              for cluster_label, indices in representatives]
+    ranked.sort(key=lambda item: -scores[item[1][0]] if item[1] else 0)
+    used = set()
+    sections = []
+    for cluster_label, indices in ranked:
+        best = next((index for index in indices if index not in used), None)
+        if best is not None:
+            used.add(best)
+            sections.append((cluster_label, best))
+
+    parts = [f"<h1>{html.escape(title)}</h1>"]
+    for cluster_label, best in sections:
+        sentences = central_sentences(chunks[best], sentences_per_cluster) or [chunks[best]]
+        heading = themes.get(cluster_label, f"Cluster {cluster_label}")
+        parts.append(f"<h2>{html.escape(str(heading))}</h2>")
+        parts.append("<ul>" + "".join(f"<li>{html.escape(sentence, quote=False)}</li>" for sentence in sentences) + "</ul>")
+    logger.info("Extractive summary built from %d clusters", len(sections))
+    return "".join(parts)
@@ -1,12 +1,76 @@
 import os
-from reportlab.pdfgen import canvas
+import struct
+import logging
+from functools import lru_cache
+from concurrent.futures import Future
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from PIL import Image as PILImage
+from reportlab.pdfbase import pdfmetrics
 from reportlab.lib import colors
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLUSTER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('BOX', (0, 0), (-1, -1), 2, colors.black),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+# Chunk numbers per row of the cluster table; a row has to fit on one page
+CHUNKS_PER_ROW = 200
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """
+    Returns the ReportLab stylesheet used by the reports, built once per process.
+    The fonts the styles refer to are loaded at the same time so later reports reuse their metrics.
+
+    :return: ReportLab StyleSheet1 with the sample styles
+    """
+    styles = getSampleStyleSheet()
+    for font_name in ('Helvetica', 'Helvetica-Bold', styles['Title'].fontName, styles['Normal'].fontName):
+        pdfmetrics.getFont(font_name)
+    return styles
+
+def read_image_size(image_path):
+    """
+    Reads the pixel size of an image from its header without decoding the pixel data.
+    PNG headers are parsed directly, other formats go through PIL's lazy open.
+
+    :param image_path: Path to the image file
+    :return: Tuple (width, height)
+    """
+    with open(image_path, 'rb') as f:
+        header = f.read(24)
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR':
+        return struct.unpack('>II', header[16:24])
+    with PILImage.open(image_path) as img:
+        return img.size
+
+def resolve_image_path(image_path):
+    """
+    Waits for an image that may still be rendering in the background.
+
+    :param image_path: A path, or a Future resolving to one
+    :return: The image path, or None if rendering failed
+    """
+    if isinstance(image_path, Future):
+        try:
+            return image_path.result()
+        except Exception as e:
+            logger.error("UMAP visualization failed, report will not include it: %s", e)
+            return None
+    return image_path
+
 def handle_li_tags(html_text, list_type="ul"):
     """
     Converts <li> HTML tags into ReportLab-compatible bullets or numbered lists.
@@ -49,25 +113,24 @@ def create_final_report(data: dict, report_path='reports/final_report.pdf'):
     # 1. Retrieve data from the dictionary
     summary = convert_html_to_reportlab_compatible(data.get('summary', 'No summary available'))
 
-    chunk_words = data.get('chunk_words', [])
     total_chunks = data.get('total_chunks', 0)
     total_words = data.get('total_words', 0)
     total_tokens = data.get('total_tokens', 0)
     tokens_sent_tokens = data.get('tokens_sent_tokens', 0)
-    umap_image_path = data.get('umap_image_path', 'reports/umap_clusters.png')
     labels = data.get('labels', [])
     themes = data.get('themes', {})
+    outliers = data.get('outliers')
+    compression = data.get('compression')
 
-    # Convert chunk words to a comma-separated string
-    chunk_words_str = ", ".join(map(str, chunk_words))
+    # The UMAP plot may still be rendering in the background; wait for it only now
+    umap_image_path = resolve_image_path(data.get('umap_image_path', 'reports/umap_clusters.png'))
 
     # 2. Create PDF document
     doc = SimpleDocTemplate(report_path, pagesize=letter)
 
     # 3. Define styles
-    c = canvas.Canvas(report_path, pagesize=letter)
     width, height = letter
-    styles = getSampleStyleSheet()
+    styles = get_report_styles()
     normal_style = styles['Normal']
     title_style = styles['Title']
 
@@ -83,10 +146,23 @@ def create_final_report(data: dict, report_path='reports/final_report.pdf'):
     content.append(Paragraph(f"Total Words: {total_words}", normal_style))
     content.append(Paragraph(f"Total Tokens: {total_tokens}", normal_style))
     content.append(Paragraph(f"Tokens Sent to LLM: {tokens_sent_tokens}", normal_style))
+    if outliers:
+        content.append(Paragraph(f"Outlier Chunks: {outliers}", normal_style))
+    if compression:
+        # Agreement with full precision, measured on a sample of the chunks
+        line = (f"Embedding Compression: {compression['original_dimension']} to {compression['dimension']} dimensions, "
+                f"{compression['dtype']} ({compression['compression_ratio']}x smaller), "
+                f"{100 * compression['explained_variance']:.1f}% of the variance kept")
+        if 'recall_at_k' in compression:
+            line += f"; recall@{compression['k']} {compression['recall_at_k']:.3f}"
+        if 'adjusted_rand_index' in compression:
+            line += f", cluster agreement (ARI) {compression['adjusted_rand_index']:.3f}"
+        content.append(Paragraph(f"{line} on {compression['sample']} chunks", normal_style))
     content.append(Spacer(1, 0.25 * inch))
 
     # Add the chunk words with wrapping
     # Commented for now...
+    #chunk_words_str = ", ".join(map(str, data.get('chunk_words', [])))
     #chunk_words_para = Paragraph(f"Words per chunk: {chunk_words_str}", normal_style)
     #content.append(chunk_words_para)
     #content.append(Spacer(1, 0.25 * inch))
@@ -100,66 +176,43 @@ def create_final_report(data: dict, report_path='reports/final_report.pdf'):
     # 5. Create the topic visualization
     clusters = {}
     for chunk_idx, cluster_label in enumerate(labels):
-        if cluster_label not in clusters:
-            clusters[cluster_label] = []
-        clusters[cluster_label].append(f"{chunk_idx + 1}")
+        clusters.setdefault(cluster_label, []).append(chunk_idx + 1)
 
-    # Sort the clusters by cluster label and also sort the chunk numbers within each cluster
-    sorted_clusters = {cluster_label: sorted(chunks, key=lambda x: int(x)) for cluster_label, chunks in sorted(clusters.items())}
-
-    print(sorted_clusters)
     # Create the data table for the PDF
     data_table = [["Theme", "Chunks"]]
     
-    # Fill table with clusters, their themes, and chunk lists
-    for cluster_label, chunks in clusters.items():
-        theme = themes.get(cluster_label, f"Cluster {cluster_label}")
-        theme_paragraph = Paragraph(theme, styles['Normal'])
-        chunk_list = ", ".join(chunks)  # Concatenate all chunks into a single string
-        chunks_paragraph = Paragraph(chunk_list, styles['Normal'])
-        data_table.append([theme_paragraph, chunks_paragraph])
-        
-    #print(data_table)
-    # Generate the PDF report
-    doc = SimpleDocTemplate(report_path, pagesize=letter)
+    # Fill table with clusters, their themes, and chunk lists, sorted by cluster label
+    for cluster_label, chunks in sorted(clusters.items()):
+        # Outliers (label -1) are left out of the clusters but still listed
+        theme = themes.get(cluster_label, "Outliers" if cluster_label == -1 else f"Cluster {cluster_label}")
+        # A cell cannot break across pages, so long chunk lists continue on extra rows below the theme
+        for start in range(0, len(chunks), CHUNKS_PER_ROW):
+            chunk_list = ", ".join(map(str, chunks[start:start + CHUNKS_PER_ROW]))
+            data_table.append([Paragraph(theme, normal_style) if start == 0 else "", Paragraph(chunk_list, normal_style)])
 
     # Add a title to the PDF
-    title = Paragraph("Document Cluster Overview", styles['Title'])
+    title = Paragraph("Document Cluster Overview", title_style)
     content.append(title)
     
-    # Create the table
-    table = Table(data_table, colWidths=[2 * inch, 4 * inch])
-    
-    # Add some style to the table
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('BOX', (0, 0), (-1, -1), 2, colors.black),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    # Ensure text wrapping within each cell
-    table.wrapOn(c, width, height)
-    table.drawOn(c, 1 * inch, height - 6 * inch)  
+    # Create the table; text wraps within each cell when the document is built
+    table = Table(data_table, colWidths=[2 * inch, 4 * inch], repeatRows=1)
+    table.setStyle(CLUSTER_TABLE_STYLE)
     
     content.append(table)
     content.append(PageBreak())
     
     # 6. Insert UMAP cluster image (if it exists)
-    if os.path.exists(umap_image_path):
+    if umap_image_path and os.path.exists(umap_image_path):
         content.append(Paragraph("Topic themes and clusters", title_style))
         content.append(Spacer(1, 0.2 * inch))
         
-        # GEt the aspect ratio of the image
-        img = PILImage.open(umap_image_path)
-        aspect_ratio = img.width / img.height
+        # Get the aspect ratio of the image from its header
+        image_width, image_height = read_image_size(umap_image_path)
+        aspect_ratio = image_width / image_height
         img_width = width * 0.8
         img_height = img_width / aspect_ratio
         
-        print(f"Image size: {img_width} x {img_height}")
+        logger.debug("Image size: %s x %s", img_width, img_height)
 
         # Adjust image width and height to fit the page, keeping aspect ratio
         umap_image = Image(umap_image_path, img_width, img_height )
@@ -167,6 +220,6 @@ def create_final_report(data: dict, report_path='reports/final_report.pdf'):
         content.append(Spacer(1, 0.5 * inch))
         #content.append(PageBreak())
 
-    # 6. Build the document
+    # 7. Build the document
     doc.build(content)
-    print(f"Report saved at {report_path}")
\ No newline at end of file
+    logger.info("Report saved at %s", report_path)
@@ -0,0 +1,361 @@
+import os
+import copy
+import shutil
+import asyncio
+import uuid
+import time
+import logging
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+import yaml
+import numpy as np
+from models.models import ModelManager
+from models.batching import EmbeddingDispatcher
+from visualize.visualize import Visualizer
+from summarize import Summarizer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while every worker is busy and the pending queue is full.
+    """
+
+
+class Job:
+    """
+    A single summarization request and its outcome.
+    """
+
+    def __init__(self, source, type, resume, output_dir):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.type = type
+        self.resume = resume
+        self.output_dir = os.path.join(output_dir, self.id)
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def describe(self):
+        """
+        :return: JSON-serializable status of the job
+        """
+        return {'job_id': self.id, 'source': self.source, 'type': self.type, 'status': self.status,
+                'created_at': self.created_at, 'started_at': self.started_at, 'finished_at': self.finished_at,
+                'error': self.error}
+
+    def artifacts(self):
+        """
+        :return: Sorted list of files the job wrote, relative to its output directory
+        """
+        if not os.path.isdir(self.output_dir):
+            return []
+        files = []
+        for root, _, names in os.walk(self.output_dir):
+            files.extend(os.path.relpath(os.path.join(root, name), self.output_dir) for name in names)
+        return sorted(files)
+
+
+class JobManager:
+    """
+    The JobManager class runs jobs on a bounded pool of worker threads. At most
+    max_workers jobs run at once and at most max_pending wait; further submissions
+    are rejected with QueueFullError so callers can back off.
+    """
+
+    def __init__(self, runner, output_dir='reports/jobs', max_workers=2, max_pending=8, history=1000):
+        """
+        :param runner: Callable taking a Job and returning its JSON-serializable result
+        :param output_dir: Directory under which each job gets its own output directory
+        :param max_workers: Number of jobs that run concurrently
+        :param max_pending: Number of jobs that may wait for a worker
+        :param history: Number of finished jobs to remember
+        """
+        self.runner = runner
+        self.output_dir = output_dir
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='summarize')
+        self.slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, source, type, resume=False):
+        """
+        Queues a job.
+
+        :return: The queued Job
+        :raises QueueFullError: If all workers are busy and the pending queue is full
+        """
+        if not self.slots.acquire(blocking=False):
+            raise QueueFullError("Too many jobs in progress, retry later")
+        job = Job(source, type, resume, self.output_dir)
+        with self.lock:
+            if self.closed:
+                self.slots.release()
+                raise QueueFullError("The service is shutting down")
+            self.jobs[job.id] = job
+            forgotten = self._forget_old_jobs()
+            future = self.executor.submit(self._run, job)
+        future.add_done_callback(lambda future: self._cancelled(job, future))
+        for old_job in forgotten:
+            shutil.rmtree(old_job.output_dir, ignore_errors=True)
+        logger.info("Queued job %s for %s", job.id, source)
+        return job
+
+    def _run(self, job):
+        with self.lock:
+            job.status, job.started_at = 'running', time.time()
+        try:
+            os.makedirs(job.output_dir, exist_ok=True)
+            result = self.runner(job)
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            self._finish(job, 'failed', error=str(e))
+        else:
+            self._finish(job, 'done', result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        """
+        Frees the job's slot and records its outcome.
+        """
+        # The slot is free before the job shows up as finished, so a caller seeing it finished can submit again
+        self.slots.release()
+        with self.lock:
+            job.result, job.error = result, error
+            job.status, job.finished_at = status, time.time()
+
+    def _cancelled(self, job, future):
+        """
+        Marks a job that was still queued at shutdown as failed.
+        """
+        if future.cancelled():
+            self._finish(job, 'failed', error="Cancelled at shutdown")
+
+    def _forget_old_jobs(self):
+        """
+        Drops the oldest finished jobs beyond the history size. Called with the lock held.
+
+        :return: The dropped jobs, whose output directories the caller removes
+        """
+        finished = [job for job in self.jobs.values() if job.status in ('done', 'failed')]
+        forgotten = sorted(finished, key=lambda job: job.finished_at)[:max(0, len(finished) - self.history)]
+        for job in forgotten:
+            del self.jobs[job.id]
+        return forgotten
+
+    def get(self, job_id):
+        """
+        :return: The Job with the given id, or None
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def counts(self):
+        """
+        :return: Number of known jobs per status
+        """
+        with self.lock:
+            counts = dict.fromkeys(JOB_STATUSES, 0)
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting jobs and cancels the queued ones (they are marked failed).
+
+        :param wait: Whether to wait for the running jobs to finish
+        """
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def to_jsonable(value):
+    """
+    Converts pipeline output (NumPy values, int dictionary keys, pending plots) to JSON-serializable values.
+    """
+    if isinstance(value, Future):
+        try:
+            return value.result()
+        except Exception:
+            return None
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class SummarizationRunner:
+    """
+    Runs jobs through the full pipeline. The models are loaded once and shared by all workers;
+    each worker thread gets its own Summarizer because the pipeline keeps per-run state.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.model_manager = ModelManager(config_path)
+        self.model_manager.load_embedding_model()
+        self.dispatcher = None
+        config = self.model_manager.config
+        if config.get('embedding_dispatch', True):
+            # Coalesce the small embedding batches of concurrent jobs into full batches
+            self.dispatcher = EmbeddingDispatcher(
+                self.model_manager.embedding_model,
+                max_batch_size=config.get('embedding_dispatch_batch_size', 64),
+                max_wait=config.get('embedding_dispatch_max_wait_ms', 10) / 1000,
+                max_concurrent_batches=config.get('embedding_dispatch_concurrency', 1))
+            self.model_manager.embedding_model = self.dispatcher
+        self.visualizer = Visualizer(config_path)
+        self._local = threading.local()
+
+    def summarizer(self):
+        """
+        :return: The Summarizer of the calling worker thread
+        """
+        if not hasattr(self._local, 'summarizer'):
+            # A shallow copy shares the loaded models but keeps per-run metrics separate
+            self._local.summarizer = Summarizer(self.config_path, model_manager=copy.copy(self.model_manager),
+                                                visualizer=self.visualizer)
+        return self._local.summarizer
+
+    def __call__(self, job):
+        from outputs.report_generate import create_final_report
+
+        data = self.summarizer()(job.source, job.type, artifacts_dir=os.path.join(job.output_dir, 'artifacts'),
+                                 resume=job.resume, output_dir=job.output_dir)
+        create_final_report(data, report_path=os.path.join(job.output_dir, 'report.pdf'))
+        return to_jsonable(data)
+
+    def shutdown(self):
+        self.visualizer.shutdown()
+        if self.model_manager.llm_pool is not None:
+            self.model_manager.llm_pool.shutdown()
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+
+
+def create_app(config_path='config/config.yaml', runner=None):
+    """
+    Builds the FastAPI application.
+
+    :param config_path: Path to the YAML configuration file
+    :param runner: Optional; callable that runs a Job. If not provided, a SummarizationRunner with warm models is used.
+    :return: FastAPI app
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
+    from pydantic import BaseModel
+
+    with open(config_path, 'r') as file:
+        config = yaml.safe_load(file)
+    runner = runner or SummarizationRunner(config_path)
+    jobs = JobManager(runner, output_dir=config.get('service_output_dir', 'reports/jobs'),
+                      max_workers=config.get('service_workers', 2), max_pending=config.get('service_max_pending', 8))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Running jobs finish before the runner closes the models they use; the wait runs off the event loop
+        await asyncio.to_thread(jobs.shutdown, wait=True)
+        if hasattr(runner, 'shutdown'):
+            runner.shutdown()
+
+    app = FastAPI(title="BrahmaSumm", lifespan=lifespan)
+    app.state.jobs = jobs
+
+    class JobRequest(BaseModel):
+        source: str
+        type: str = "web"
+        resume: bool = False
+
+    def get_job(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        return job
+
+    @app.post("/jobs", status_code=202)
+    def submit_job(request: JobRequest):
+        try:
+            job = jobs.submit(request.source, request.type, resume=request.resume)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={'detail': str(e)}, headers={'Retry-After': '5'})
+        return job.describe()
+
+    @app.get("/jobs/{job_id}")
+    def job_status(job_id: str):
+        return get_job(job_id).describe()
+
+    @app.get("/jobs/{job_id}/result")
+    def job_result(job_id: str):
+        job = get_job(job_id)
+        if job.status != 'done':
+            raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+        return job.result
+
+    @app.get("/jobs/{job_id}/artifacts")
+    def job_artifacts(job_id: str):
+        return {'artifacts': get_job(job_id).artifacts()}
+
+    @app.get("/jobs/{job_id}/artifacts/{name:path}")
+    def job_artifact(job_id: str, name: str):
+        job = get_job(job_id)
+        path = os.path.realpath(os.path.join(job.output_dir, name))
+        if not path.startswith(os.path.realpath(job.output_dir) + os.sep) or not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="Unknown artifact")
+        return FileResponse(path)
+
+    @app.get("/health")
+    def health():
+        return {'status': 'ok', 'jobs': jobs.counts()}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        lines = ["# HELP brahmasumm_jobs Jobs known to the service by status.", "# TYPE brahmasumm_jobs gauge"]
+        lines += [f'brahmasumm_jobs{{status="{status}"}} {count}' for status, count in jobs.counts().items()]
+        # Per-provider outcomes of hedged LLM calls, for tuning the hedge percentile against tail latency
+        llm_pool = getattr(getattr(runner, 'model_manager', None), 'llm_pool', None)
+        if llm_pool is not None:
+            provider_stats = llm_pool.stats()
+            for key in ('calls', 'wins', 'errors', 'hedges', 'fallbacks'):
+                lines += [f"# HELP brahmasumm_llm_provider_{key}_total LLM provider {key} across hedged calls.",
+                          f"# TYPE brahmasumm_llm_provider_{key}_total counter"]
+                lines += [f'brahmasumm_llm_provider_{key}_total{{provider="{name}"}} {stats[key]}'
+                          for name, stats in provider_stats.items()]
+            lines += ["# HELP brahmasumm_llm_provider_latency_seconds Recent LLM provider latency percentiles.",
+                      "# TYPE brahmasumm_llm_provider_latency_seconds gauge"]
+            lines += [f'brahmasumm_llm_provider_latency_seconds{{provider="{name}",quantile="0.{q}"}} {stats[f"latency_seconds_p{q}"]}'
+                      for name, stats in provider_stats.items() for q in (50, 95, 99)
+                      if stats[f"latency_seconds_p{q}"] is not None]
+        return "\n".join(lines) + "\n"
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    config_path = 'config/config.yaml'
+    with open(config_path, 'r') as file:
+        config = yaml.safe_load(file)
+    uvicorn.run(create_app(config_path), host=config.get('service_host', '127.0.0.1'), port=config.get('service_port', 8000))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,61 @@
+import os
+import time
 import logging
+import tempfile
 import yaml
-import json
 from models.models import ModelManager
 from chunking.textchunking import ChunkManager
 from doc_loaders.doc_loader import DocumentLoader
-from clustering.clustering import ClusterManager
+from clustering.clustering import ClusterManager, OUTLIER_LABEL
+from clustering.hierarchy import TopicTree
 from visualize.visualize import Visualizer
-from outputs.report_generate import create_final_report
+from outputs.artifacts import save_run_artifacts
+from outputs.extractive_summary import create_extractive_summary
+from utils.checkpoint import CheckpointStore
+from utils.metrics import PipelineMetrics, current_rss_bytes
+from utils.structured_output import CLUSTER_THEMES_SCHEMA, parse_cluster_themes
+from topic_themes.themes import KeywordThemes
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def describe_source(source, type):
+    """
+    :return: What kind of source the text comes from, in words, for the theme prompts
+    """
+    if DocumentLoader(source, type).is_tabular():
+        return "a table"
+    if source.lower().endswith('.pdf'):
+        return "a PDF document"
+    if type == 'directory':
+        return "a collection of documents"
+    if source.lower().startswith('http'):
+        return "a web page"
+    return "a document"
+
 class Summarizer:
-    def __init__(self, config_path):
+    # Kind of source the current document is, set for each run; used in the theme prompts
+    source_description = "a document"
+
+    def __init__(self, config_path, model_manager=None, visualizer=None):
         """
         Initializes the Summarizer class with models, chunking manager, clustering, and visualization.
         Loads the prompts and the necessary models as per the configuration.
+
+        :param config_path: Path to the YAML configuration file
+        :param model_manager: Optional; an already loaded ModelManager to reuse (e.g. warm models in the service)
+        :param visualizer: Optional; a Visualizer to share between summarizers
         """
-        self.model_manager = ModelManager(config_path)
+        self.model_manager = model_manager or ModelManager(config_path)
+        self.config = self.model_manager.config
         self.prompts = self.load_prompts()
         # self.model_manager.load_llm()
         self.model_manager.load_embedding_model()
         self.chunk_manager = ChunkManager(config_path)
-        self.cluster_manager = ClusterManager(self.model_manager.embedding_model, config_path)
-        self.visualizer = Visualizer(config_path)
+        # Embedding goes through the ModelManager so every call is instrumented
+        self.cluster_manager = ClusterManager(self.model_manager, config_path)
+        self.visualizer = visualizer or Visualizer(config_path)
+        self.keyword_themes = KeywordThemes(config_path)
 
     def load_prompts(self):
         """
@@ -35,65 +67,200 @@ class Summarizer:
         with open('config/prompts.yaml', 'r') as file:
             return yaml.safe_load(file)
 
-    def __call__(self, source: str, type: str) -> dict:
+    def __call__(self, source: str, type: str, artifacts_dir: str = None, resume: bool = None, output_dir: str = 'reports') -> dict:
         """
         Processes the input document through loading, chunking, clustering, and summarizing.
         It returns a dictionary with all necessary data for report generation.
 
         :param source: The source document (URL or file path)
+        :param artifacts_dir: Optional; directory to persist chunks, vectors, labels and themes to.
+                              If not provided, the 'artifacts_dir' config value is used (if any).
+        :param resume: Optional; restart from the last checkpointed stage of a previous failed run of the same source.
+                       If not provided, the 'resume' config value is used.
+        :param output_dir: Directory to write the UMAP plot to
         :return: A dictionary containing the final summary, analysis, UMAP cluster details, and themes.
         """
-        # Step 1: Load the document
-        logger.info("Loading document...")
-        doc_loader = DocumentLoader(source,type)
-        text = doc_loader()
+        metrics = PipelineMetrics()
+        self.model_manager.metrics = metrics
+        self.source_description = describe_source(source, type)
+
+        if resume is None:
+            resume = self.config.get('resume', False)
+        # Every stage is checkpointed while the run is in progress and the checkpoints are removed once it succeeds,
+        # so only a failed run leaves them behind in checkpoint_dir; they are read back only when resuming
+        checkpoints = None
+        if self.config.get('checkpoint_dir'):
+            checkpoints = CheckpointStore(self.config['checkpoint_dir'], self.config, source, type)
+        # In low-memory mode pages are streamed into the chunker, no full-text copy is kept
+        # and the vectors are spilled to a memory-mapped file
+        low_memory = self.config.get('low_memory', False)
+        memory_limit = self.config.get('memory_limit_mb', 1024) * 2 ** 20
+
+        def run_stage(name, compute, checkpoint=True):
+            """Returns the checkpointed output of a stage when resuming, otherwise computes and checkpoints it."""
+            with metrics.stage(name):
+                if checkpoints is not None and resume:
+                    value = checkpoints.load(name)
+                    if value is not None:
+                        logger.info("Resuming stage '%s' from checkpoint", name)
+                        return value
+                value = compute()
+                if checkpoints is not None and checkpoint:
+                    checkpoints.save(name, value)
+                if low_memory and current_rss_bytes() > memory_limit:
+                    logger.warning("Memory use after stage '%s' is %.0f MB, above memory_limit_mb",
+                                   name, current_rss_bytes() / 2 ** 20)
+                return value
+
+        # Step 1: Load the document (skipped entirely when the chunks are checkpointed)
+        def load():
+            logger.info("Loading document...")
+            doc_loader = DocumentLoader(source,type)
+            return doc_loader()
 
         # Step 2: Preprocess and chunk the document
-        logger.info("Chunking text...")
-        self.processed_text = self.chunk_manager.preprocess_text(text)
-        self.chunk_manager.flexible_chunk(self.processed_text)
-        chunks = self.chunk_manager.get_chunks()
+        def chunk():
+            doc_loader = DocumentLoader(source, type)
+            if doc_loader.is_tabular():
+                # Rows are streamed from the file straight into blocks of target_words words,
+                # so the whole table is never loaded or joined into one text
+                logger.info("Streaming table rows into chunks...")
+                blocks = doc_loader.iter_blocks(self.chunk_manager.target_words,
+                                                self.config.get('tabular_chunk_rows', 10000))
+                if self.chunk_manager.chunk_mode == 'tokens':
+                    # Every row is a paragraph, packed into chunks of at most chunk_max_tokens tokens
+                    return None, list(self.chunk_manager.iter_chunks(block + "\n" for block in blocks))
+                return None, [self.chunk_manager.preprocess_text(block) for block in blocks]
+            if low_memory:
+                logger.info("Streaming pages into chunks...")
+                return None, list(self.chunk_manager.iter_chunks(doc_loader.iter_pages()))
+            text = run_stage('load', load)
+            logger.info("Chunking text...")
+            processed_text = self.chunk_manager.preprocess_text(text)
+            self.chunk_manager.chunk(processed_text)
+            return processed_text, self.chunk_manager.get_chunks()
+
+        self.processed_text, chunks = run_stage('chunk', chunk)
+        self.chunk_manager.chunks = chunks
+        metrics.set_items('chunk', len(chunks))
 
         # Step 3: Embed the document and run clustering
-        logger.info("Embedding and clustering...")
-        self.cluster_manager.embed_documents_with_progress(chunks)
-        labels, cluster_centers = self.cluster_manager.cluster_document()
-        logger.info(f"Number of clusters: {len(cluster_centers)}")
+        def embed():
+            logger.info("Embedding and clustering...")
+            if low_memory:
+                handle, path = tempfile.mkstemp(prefix='vectors-', suffix='.npy', dir=self.config.get('low_memory_dir'))
+                os.close(handle)
+                try:
+                    return self.cluster_manager.embed_documents_to_file(chunks, path)
+                finally:
+                    # The mapping stays readable once the file is unlinked, and the disk space is freed with it
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        logger.warning("Could not remove the vector spill file %s", path)
+            self.cluster_manager.vectors = []
+            self.cluster_manager.embed_documents_with_progress(chunks)
+            return self.cluster_manager.vectors
+
+        # Memory-mapped vectors are not checkpointed: pickling them would copy the whole file into memory
+        self.cluster_manager.vectors = run_stage('embed', embed, checkpoint=not low_memory)
+        metrics.set_items('embed', len(chunks))
+
+        # Step 3b: Optionally compress the vectors; everything after this point works on the compressed vectors
+        compression = None
+        self.cluster_manager.compressor = None
+        if self.config.get('embedding_compression', False):
+            codes, self.cluster_manager.compressor, compression = run_stage('compress', self.cluster_manager.compress_vectors)
+            self.cluster_manager.vectors = codes
+            metrics.set_items('compress', len(chunks))
 
         # Step 4: Find representatives and themes for each cluster
-        representatives = self.cluster_manager.find_n_closest_representatives()
-        logger.info("Finding themes for each cluster...")
-        themes, cluster_content = self.find_themes_for_clusters_slow(chunks, representatives)
-        
-      
-        # Step 5: Generate UMAP visualization
+        def cluster():
+            labels, cluster_centers = self.cluster_manager.cluster_document()
+            logger.info(f"Number of clusters: {len(cluster_centers)}")
+            with metrics.stage('representatives', items=len(cluster_centers)):
+                representatives = self.cluster_manager.find_n_closest_representatives()
+            return labels, representatives, cluster_centers
+
+        labels, representatives, cluster_centers = run_stage('cluster', cluster)
+        metrics.set_items('cluster', len(labels))
+
+        # Step 4b: Merge the clusters into fewer topics for a coarser summary. The clusters are cut from
+        # a topic tree, so resuming with another summary_detail reuses the embedding and clustering checkpoints.
+        summary_detail = self.config.get('summary_detail', 'large')
+        n_topics = (self.config.get('summary_detail_topics') or {}).get(summary_detail)
+        topic_groups = None
+        if n_topics and n_topics < len(representatives):
+            with metrics.stage('topics'):
+                # In low-memory mode the tree is built from the cluster centers, and the topic representatives
+                # are picked among the cluster representatives, so the vectors are not read again
+                topic_tree = TopicTree(self.cluster_manager.vectors, labels,
+                                       centers=cluster_centers if low_memory else None,
+                                       metric='cosine' if self.config.get('clustering_engine') == 'spherical' else 'euclidean',
+                                       release=self.cluster_manager.release_vectors)
+                topic_groups = topic_tree.describe(n_topics)
+                labels, representatives = topic_tree.representatives_at(
+                    n_topics, n=self.config.get('n_closest_representatives', 3),
+                    candidates=representatives if low_memory else None)
+            logger.info("Merged clusters into %d topics for summary_detail '%s'", len(representatives), summary_detail)
+
+        def find_themes():
+            logger.info("Finding themes for each cluster...")
+            theme_provider = self.config.get('theme_provider', 'llm')
+            if theme_provider == 'keywords':
+                return self.find_keyword_themes_for_clusters(chunks, labels, representatives)
+            # In hybrid mode the cluster keywords are passed to the LLM as a hint
+            keywords = self.keyword_themes.extract_keywords(chunks, labels) if theme_provider == 'hybrid' else None
+            if self.config.get('theme_mode', 'single') == 'single':
+                return self.find_themes_for_clusters(chunks, representatives, keywords)
+            return self.find_themes_for_clusters_slow(chunks, representatives, keywords)
+
+        themes, cluster_content = run_stage('themes', find_themes)
+        metrics.set_items('themes', len(themes))
+
+        # Step 5: Start the UMAP visualization in the background so the summary does not wait on it
         logger.info("Creating the visualization...")
-        #print("Labels:", labels)
-        #print("Themes keys:", themes.keys())
-        
-        self.visualizer.plot_clusters_with_umap(
-            self.cluster_manager.vectors, 
-            themes, 
-            labels, 
-            n_neighbors=25, 
-            min_dist=0.001, 
-            spread=0.8, 
-            length=12, 
-            width=8, 
-            output_image='reports/umap_clusters.png'
-        )
-
-        # Step 6: Generate the final summary using LLM
+        umap_kwargs = dict(n_neighbors=25, min_dist=0.001, spread=0.8, length=12, width=8,
+                           output_image=os.path.join(output_dir, 'umap_clusters.png'))
+        plot_vectors, plot_labels = self.cluster_manager.vectors, labels
+        max_points = self.config.get('umap_max_points', 5000)
+        if low_memory and max_points and len(labels) > max_points:
+            # Plot a random sample, so the plot never needs a full in-memory copy of the vectors
+            rows, plot_vectors = self.cluster_manager.sample_vectors(max_points)
+            plot_labels = labels[rows]
+            logger.info("Plotting a sample of %d of %d chunks", max_points, len(labels))
+        if self.config.get('visualize_in_background', True):
+            umap_image_path = self.visualizer.plot_clusters_in_background(
+                plot_vectors, themes, plot_labels, **umap_kwargs)
+            submitted = time.perf_counter()
+            umap_image_path.add_done_callback(
+                lambda future: metrics.record_stage('umap', time.perf_counter() - submitted, items=len(labels)))
+        else:
+            with metrics.stage('umap', items=len(labels)):
+                umap_image_path = self.visualizer.plot_clusters_with_umap(
+                    plot_vectors, themes, plot_labels, **umap_kwargs)
+
+        # Step 6: Generate the final summary using LLM, or extract it from the representatives for a quick gist
         logger.info("Creating the final summary...")
-        self.combined_content = " ".join(cluster_content.values())
-        prompt = self.prompts['create_summary_prompt'].format(combined_content=self.combined_content)
-        
-        final_summary = self.model_manager.llm.invoke(prompt).content
+        with metrics.stage('summary'):
+            if self.config.get('summary_mode', 'llm') == 'extractive':
+                self.combined_content = ""  # Nothing is sent to the LLM
+                final_summary = create_extractive_summary(
+                    chunks, self.cluster_manager.vectors, representatives, themes,
+                    sentences_per_cluster=self.config.get('extractive_sentences_per_cluster', 2))
+            else:
+                self.combined_content = " ".join(cluster_content.values())
+                prompt = self.prompts['create_summary_prompt'].format(combined_content=self.combined_content)
+                final_summary = self.model_manager.invoke_llm(prompt, priority='summary')
       
         # Step 7: Perform analysis on the document
-        chunk_words, total_chunks, total_words, total_tokens, tokens_sent_tokens = self.get_analysis()
+        with metrics.stage('analysis'):
+            chunk_words, total_chunks, total_words, total_tokens, tokens_sent_tokens = self.get_analysis()
 
         # Step 8: Populate the data dictionary
+        # A background UMAP plot only shows up in the metrics if it finished before this point
+        self.metrics = metrics
+        timings = {name: record.get('wall_seconds') for name, record in metrics.stages.items()}
         data = {
             'summary': final_summary,
             'labels': labels,
@@ -102,12 +269,29 @@ class Summarizer:
             'total_words': total_words,
             'total_tokens': total_tokens,
             'tokens_sent_tokens': tokens_sent_tokens,
+            'outliers': list(labels).count(OUTLIER_LABEL),
+            'summary_detail': summary_detail,
+            # Fine cluster labels merged into each topic, if the clusters were merged
+            'topic_groups': topic_groups,
             'themes': themes,
-            'umap_image_path': 'reports/umap_clusters.png'
+            # May be a Future while the plot is still rendering; create_final_report resolves it
+            'umap_image_path': umap_image_path,
+            # Nearest-neighbour recall and cluster agreement of the compressed vectors, if they were compressed
+            'compression': compression,
+            'timings': timings,
+            'metrics': metrics.summary()
         }
-        
-        
 
+        # Step 9: Persist the run so it can be re-plotted or re-reported without re-embedding
+        artifacts_dir = artifacts_dir or self.config.get('artifacts_dir')
+        if artifacts_dir:
+            report_data = {key: value for key, value in data.items() if key not in ('labels', 'themes', 'umap_image_path')}
+            save_run_artifacts(artifacts_dir, chunks, self.cluster_manager.vectors, labels,
+                               representatives=representatives, themes=themes, timings=timings, report_data=report_data,
+                               compression=self.cluster_manager.compressor)
+
+        if checkpoints is not None:
+            checkpoints.clear()
         return data
 
     def get_analysis(self):
@@ -116,7 +300,11 @@ class Summarizer:
 
         :return: Tuple containing chunk words, total chunks, total words, total tokens, and tokens sent to LLM
         """
-        total_tokens = self.model_manager.count_tokens(self.processed_text)
+        if self.processed_text is None:
+            # Tabular sources and low-memory runs are chunked without ever building the full text
+            total_tokens = sum(self.model_manager.count_tokens(chunk) for chunk in self.chunk_manager.get_chunks())
+        else:
+            total_tokens = self.model_manager.count_tokens(self.processed_text)
         chunk_words = self.chunk_manager.get_word_count_per_chunk()
         total_chunks = self.chunk_manager.get_total_chunks()
         total_words = self.chunk_manager.get_total_words()
@@ -124,23 +312,46 @@ class Summarizer:
         
         return chunk_words, total_chunks, total_words, total_tokens, tokens_sent_tokens
 
-    def find_suitable_theme(self, chunk_text):
+    def find_suitable_theme(self, chunk_text, keywords=None):
         """
         Uses LLM to extract the most relevant theme from the given chunk.
 
         :param chunk_text: A chunk of text from the document
+        :param keywords: Optional; keywords of the chunk's cluster, appended to the prompt as a hint
         :return: The extracted theme for the given chunk
         """
-        prompt = self.prompts['find_suitable_theme_prompt'].format(chunk_text=chunk_text)
+        prompt = self.prompts['find_suitable_theme_prompt'].format(chunk_text=chunk_text, source=self.source_description)
+        if keywords:
+            prompt += self.prompts['theme_keywords_hint'].format(keywords=", ".join(keywords))
         logger.info("Finding suitable theme for chunk: %s", chunk_text)
-        return self.model_manager.llm.invoke(prompt).content
+        return self.model_manager.invoke_llm(prompt, priority='theme')
+
+    def find_keyword_themes_for_clusters(self, chunks, labels, representatives):
+        """
+        Labels each cluster with its class-based TF-IDF keywords, without calling the LLM,
+        and combines the chunks for each representative.
+
+        :param chunks: The chunked text from the document
+        :param labels: The cluster label of every chunk
+        :param representatives: The representative chunks closest to the cluster centers
+        :return: A dictionary of themes for each cluster and combined content for each cluster
+        """
+        keyword_themes = self.keyword_themes.find_themes(chunks, labels)
+        themes = {}
+        cluster_content = {}
+        for cluster_label, representative_indices in representatives:
+            themes[cluster_label] = keyword_themes.get(cluster_label, f"Cluster {cluster_label}")
+            cluster_content[cluster_label] = " ".join([chunks[index] for index in representative_indices])
+        logger.info("Found keyword themes: %s", themes)
+        return themes, cluster_content
 
-    def find_themes_for_clusters_slow(self, chunks, representatives):
+    def find_themes_for_clusters_slow(self, chunks, representatives, keywords=None):
         """
         Finds a suitable theme for each cluster and combines the chunks for each representative.
 
         :param chunks: The chunked text from the document
         :param representatives: The representative chunks closest to the cluster centers
+        :param keywords: Optional; dictionary of cluster label to keywords, passed to the LLM as a hint
         :return: A dictionary of themes for each cluster and combined content for each cluster
         """
         themes = {}
@@ -148,7 +359,7 @@ class Summarizer:
 
         for cluster_label, representative_indices in representatives:
             first_representative_chunk = chunks[representative_indices[0]]
-            theme = self.find_suitable_theme(first_representative_chunk)
+            theme = self.find_suitable_theme(first_representative_chunk, (keywords or {}).get(cluster_label))
             
             themes[cluster_label] = theme  # Store the theme in the dictionary
             logger.info("Found theme for cluster %s: %s", cluster_label, theme)
@@ -160,74 +371,56 @@ class Summarizer:
         print(themes)
         return themes, cluster_content
       
-    # TODO: Fix this -- current unused due to various issues in formatting
-    def find_themes_for_clusters(self, chunks, representatives):
+    def find_themes_for_clusters(self, chunks, representatives, keywords=None):
         """
         Finds suitable themes for all clusters in a single LLM call and combines the chunks for each representative.
+        The response is parsed and validated entry by entry; only clusters without a valid theme
+        are sent to the LLM again, one at a time.
 
         :param chunks: The chunked text from the document
         :param representatives: The representative chunks closest to the cluster centers
+        :param keywords: Optional; dictionary of cluster label to keywords, passed to the LLM as a hint
         :return: A dictionary of themes for each cluster and combined content for each cluster
         """
-        # Step 1: Prepare the text chunks for the LLM prompt
-        clusters_data = {}
+        keywords = keywords or {}
+
+        # Step 1: Every cluster is represented by its closest chunk, but its content combines all representatives
         cluster_content = {}
-        themes = {}
-        
+        cluster_texts = []
         for cluster_label, representative_indices in representatives:
-            # Get the first representative chunk to represent the cluster
-            first_representative_chunk = chunks[representative_indices[0]]
-            
-            # For theme we just need the first representative, but the full list of chunks for the cluster
-            combined_chunks = " ".join([chunks[index] for index in representative_indices])
-            cluster_content[cluster_label] = combined_chunks
-            
-            # Prepare the data for each cluster
-            clusters_data[cluster_label] = {
-                "representative_text": first_representative_chunk,
-                "combined_text": " ".join([chunks[index] for index in representative_indices])
-            }
-
-        # Step 2: Build the LLM prompt
-        prompt = self.prompts['find_suitable_theme_prompt_multiple'].format(first_representative_chunk=first_representative_chunk)
-        
-        # Step 3: Call the LLM once for all clusters
-        response = self.model_manager.llm.invoke(prompt).content
-
-        
-        print(response)
-
-        # Step 4: Process and clean the response
-        # LLM might return extra text alongside JSON, so let's clean it
-        start_idx = response.find("{")  # Find the start of the JSON
-        end_idx = response.find("}")  # Find the end of the JSON
-        if start_idx == -1 or end_idx == -1:
-            print("No valid JSON found in the LLM response")
-            return {}, {}
-        
-        # Extract the JSON part of the response
-        json_response = response[start_idx:end_idx+1]
-
-        # Step 5: Parse the JSON response
+            cluster_content[cluster_label] = " ".join([chunks[index] for index in representative_indices])
+            cluster_text = f"Cluster {cluster_label}:\n{chunks[representative_indices[0]]}"
+            if keywords.get(cluster_label):
+                cluster_text += f"\nKeywords: {', '.join(keywords[cluster_label])}"
+            cluster_texts.append(cluster_text)
+
+        # Step 2: Call the LLM once for all clusters
+        prompt = self.prompts['find_suitable_theme_prompt_multiple'].format(clusters="\n\n".join(cluster_texts),
+                                                                            source=self.source_description)
         try:
-            parsed_response = json.loads(json_response)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON: {e}")
-            return {}, {}
-
-
-         # Step 6: Initialize dictionaries for themes and summaries
-        # Iterate over the parsed response and store the themes and summaries
-        for cluster_label, cluster_data in parsed_response.items():
-            theme = cluster_data.get("theme", "No theme available")
-            themes[cluster_label] = theme
+            response = self.model_manager.invoke_llm(prompt, priority='theme', schema=CLUSTER_THEMES_SCHEMA)
+            found = parse_cluster_themes(response, list(cluster_content))
+        except Exception as e:
+            logger.warning("Combined theme request failed, finding themes per cluster: %s", e)
+            found = {}
+        logger.info("Found %d of %d themes in a single call", len(found), len(cluster_content))
+
+        # Step 3: Fall back to one call per cluster for entries that were missing or invalid
+        themes = {}
+        for cluster_label, representative_indices in representatives:
+            if cluster_label not in found:
+                logger.info("No valid theme for cluster %s in the combined response, asking separately", cluster_label)
+                found[cluster_label] = self.find_suitable_theme(chunks[representative_indices[0]],
+                                                                keywords.get(cluster_label))
+            themes[cluster_label] = found[cluster_label]
+            logger.info("Found theme for cluster %s: %s", cluster_label, themes[cluster_label])
 
-        
-        print(themes)
         return themes, cluster_content
       
 
 def main():
+    from outputs.report_generate import create_final_report  # Only needed when a report is written
+
     config_path = 'config/config.yaml'
     summarizer = Summarizer(config_path)
     print(summarizer.find_suitable_theme("Who is John Galt!"))
@@ -240,6 +433,7 @@ def main():
     create_final_report(data,report_path='reports/final_report.pdf')
     
     print(data["summary"])
+    summarizer.visualizer.shutdown()
 
     chunk_words, total_chunks, total_words, total_tokens, tokens_sent_tokens = summarizer.get_analysis()
     print(f"Total chunks: {total_chunks}\n Total words: {total_words}\n Total tokens in original text: {total_tokens}\n Total tokens sent to LLM: {tokens_sent_tokens}")
@@ -0,0 +1,98 @@
+import logging
+import yaml
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class KeywordThemes:
+    """
+    The KeywordThemes class labels clusters without an LLM. It scores terms with class-based TF-IDF:
+    the chunks of each cluster are treated as one document, so a term scores high when it is frequent
+    in its own cluster and rare across the other clusters. Labels are the top keyphrases of each cluster.
+    """
+
+    def __init__(self, config_path):
+        """
+        Initializes KeywordThemes with the keyword settings from the configuration file.
+
+        :param config_path: Path to the YAML configuration file.
+        """
+        self.config = yaml.safe_load(open(config_path, 'r'))
+        self.top_n = self.config.get('theme_keywords_top_n', 3)
+        self.ngram_range = tuple(self.config.get('theme_keywords_ngram_range', [1, 2]))
+
+    def score_terms(self, chunks, labels):
+        """
+        Computes class-based TF-IDF scores of every term for every cluster.
+
+        :param chunks: List of chunk texts.
+        :param labels: Cluster label of every chunk.
+        :return: Tuple (cluster labels, vocabulary array, sparse matrix of scores with one row per cluster)
+        """
+        from sklearn.feature_extraction.text import CountVectorizer
+        from scipy import sparse
+
+        labels = np.asarray(labels)
+        clusters, cluster_index = np.unique(labels, return_inverse=True)
+        vectorizer = CountVectorizer(ngram_range=self.ngram_range, stop_words='english',
+                                     token_pattern=r"(?u)\b[^\W\d_][\w'-]+\b")
+        counts = vectorizer.fit_transform(chunks)
+
+        # Sum the term counts of each cluster's chunks with one sparse product: (clusters x chunks) @ (chunks x terms)
+        membership = sparse.csr_matrix((np.ones(len(labels)), (cluster_index, np.arange(len(labels)))),
+                                       shape=(len(clusters), len(labels)))
+        cluster_counts = (membership @ counts).tocsr().astype(np.float64)
+
+        # c-TF-IDF: term frequency within the cluster times log(1 + average cluster size / term frequency overall)
+        cluster_sizes = np.asarray(cluster_counts.sum(axis=1)).ravel()
+        term_totals = np.asarray(cluster_counts.sum(axis=0)).ravel()
+        idf = np.log1p(cluster_sizes.mean() / np.maximum(term_totals, 1))
+        scores = sparse.diags(1 / np.maximum(cluster_sizes, 1)) @ cluster_counts @ sparse.diags(idf)
+        return clusters, vectorizer.get_feature_names_out(), scores.tocsr()
+
+    def extract_keywords(self, chunks, labels, top_n=None):
+        """
+        Finds the top keyphrases of every cluster. A phrase that overlaps a higher-scoring one is skipped.
+
+        :param chunks: List of chunk texts.
+        :param labels: Cluster label of every chunk.
+        :param top_n: Optional; number of keyphrases per cluster. If None, uses the config value.
+        :return: Dictionary of cluster label to a list of keyphrases, best first.
+        """
+        top_n = top_n or self.top_n
+        if not len(chunks):
+            return {}
+        try:
+            clusters, vocabulary, scores = self.score_terms(chunks, labels)
+        except ValueError:
+            # Only stop words or no words at all
+            logger.warning("No keywords found in the chunks")
+            return {label: [] for label in np.unique(labels).tolist()}
+
+        keywords = {}
+        for row, label in enumerate(clusters.tolist()):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            terms, values = scores.indices[start:end], scores.data[start:end]
+            chosen = []
+            for term in terms[np.argsort(-values, kind='stable')]:
+                phrase = vocabulary[term]
+                if any(f" {phrase} " in f" {other} " or f" {other} " in f" {phrase} " for other in chosen):
+                    continue
+                chosen.append(phrase)
+                if len(chosen) == top_n:
+                    break
+            keywords[label] = chosen
+        return keywords
+
+    def find_themes(self, chunks, labels, top_n=None):
+        """
+        Labels every cluster with its top keyphrases.
+
+        :param chunks: List of chunk texts.
+        :param labels: Cluster label of every chunk.
+        :param top_n: Optional; number of keyphrases per label. If None, uses the config value.
+        :return: Dictionary of cluster label to a short comma-separated label.
+        """
+        return {label: ", ".join(phrases) or f"Cluster {label}"
+                for label, phrases in self.extract_keywords(chunks, labels, top_n).items()}
@@ -0,0 +1,129 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in order, with the config keys each one depends on.
+# A stage's checkpoint is also invalidated by changes to the keys of any earlier stage.
+STAGE_CONFIG_KEYS = {
+    'load': ['asr_model', 'asr_chunk'],
+    'chunk': ['target_words', 'chunk_flexibility', 'chunk_mode', 'chunk_max_tokens', 'chunk_tokenizer_path',
+              'onnx_model_path', 'low_memory'],
+    'embed': ['embedding_provider', 'embedding_model', 'onnx_model_path', 'onnx_quantize', 'onnx_max_seq_length'],
+    'compress': ['embedding_compression', 'compression_dimension', 'compression_dtype', 'compression_eval_sample'],
+    'cluster': ['n_clusters', 'n_closest_representatives', 'outlier_detection', 'outlier_k', 'outlier_contamination',
+                'clustering_engine', 'spherical_max_iter', 'spherical_tol', 'spherical_init_sample'],
+    'themes': ['summary_detail', 'summary_detail_topics', 'llm_provider', 'llm_model', 'llm_providers', 'theme_mode',
+               'theme_provider', 'theme_keywords_top_n', 'theme_keywords_ngram_range'],
+}
+STAGES = list(STAGE_CONFIG_KEYS)
+# Bumped when the output of a stage changes shape, so checkpoints written by older versions are discarded
+CHECKPOINT_VERSION = 2
+
+
+def source_fingerprint(source, type):
+    """
+    Identifies a source document. Local files are identified by path, size and modification time,
+    anything else (URLs) by the source string itself.
+
+    :param source: The source document (URL or file path)
+    :param type: The source type passed to the loader
+    :return: Hex digest identifying the source
+    """
+    parts = [type, source]
+    if os.path.exists(source):
+        stat = os.stat(source)
+        parts = [type, os.path.abspath(source), str(stat.st_size), str(stat.st_mtime_ns)]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def stage_config_hash(config, stage):
+    """
+    Hashes the config values the given stage and all earlier stages depend on.
+
+    :param config: The loaded configuration dictionary
+    :param stage: Name of the stage
+    :return: Hex digest of the relevant config values
+    """
+    keys = []
+    for name in STAGES[:STAGES.index(stage) + 1]:
+        keys.extend(STAGE_CONFIG_KEYS[name])
+    relevant = {key: config.get(key) for key in keys}
+    relevant['checkpoint_version'] = CHECKPOINT_VERSION
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """
+    The CheckpointStore class saves the output of each pipeline stage for a source document,
+    so a failed run can resume from the last completed stage instead of starting over.
+    """
+
+    def __init__(self, checkpoint_dir, config, source, type):
+        """
+        Initializes the store for one source document.
+
+        :param checkpoint_dir: Root directory for all checkpoints
+        :param config: The loaded configuration dictionary
+        :param source: The source document (URL or file path)
+        :param type: The source type passed to the loader
+        """
+        self.config = config
+        self.directory = os.path.join(checkpoint_dir, source_fingerprint(source, type))
+
+    def _path(self, stage):
+        return os.path.join(self.directory, f"{stage}.pkl")
+
+    def save(self, stage, value):
+        """
+        Saves the output of a stage, replacing any previous checkpoint atomically.
+
+        :param stage: Name of the stage
+        :param value: Picklable stage output
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(stage) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'config_hash': stage_config_hash(self.config, stage), 'value': value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(stage))
+        logger.debug("Saved checkpoint for stage %s", stage)
+
+    def load(self, stage):
+        """
+        Loads the output of a stage if a checkpoint exists for the current config.
+        Checkpoints written with different relevant config values are deleted.
+
+        :param stage: Name of the stage
+        :return: The saved stage output, or None if there is no valid checkpoint
+        """
+        path = self._path(stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+
+        if checkpoint['config_hash'] != stage_config_hash(self.config, stage):
+            logger.info("Config changed since stage %s was checkpointed, discarding it", stage)
+            os.remove(path)
+            return None
+        return checkpoint['value']
+
+    def clear(self):
+        """
+        Removes all checkpoints for this source document, and its directory once it is empty.
+        """
+        for stage in STAGES:
+            if os.path.exists(self._path(stage)):
+                os.remove(self._path(stage))
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass  # Missing, or still holds files of a concurrent run
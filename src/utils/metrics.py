@@ -0,0 +1,236 @@
+import sys
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def peak_rss_bytes():
+    """
+    Returns the peak resident set size of this process so far.
+
+    :return: Peak RSS in bytes, or None if it cannot be measured on this platform
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes():
+    """
+    Returns the current resident set size of this process.
+
+    :return: RSS in bytes; the peak RSS where the current value cannot be read (outside Linux)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        return peak_rss_bytes()
+
+
+class PipelineMetrics:
+    """
+    The PipelineMetrics class collects per-stage wall time, CPU time, peak memory and item counts,
+    plus latency and token counts for every LLM and embedding call made during a run.
+
+    A stage's peak memory is the highest RSS seen while it ran (nested stages included), sampled by a
+    background thread every sample_interval seconds while any stage is open, and at the start and end of
+    every stage. It is not the process-lifetime peak, so a stage that frees its memory does not inflate
+    the stages after it.
+    """
+
+    def __init__(self, sample_interval=0.01):
+        """
+        :param sample_interval: Seconds between RSS samples while a stage is running
+        """
+        self.stages = {}
+        self.calls = []
+        self.sample_interval = sample_interval
+        self._stack = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop_sampling = None
+
+    def _sample_rss(self):
+        """
+        Raises the peak of every open stage to the current RSS.
+        """
+        rss = current_rss_bytes()
+        if rss is None:
+            return
+        with self._lock:
+            for frame in self._stack:
+                frame['peak_rss'] = max(frame['peak_rss'] or 0, rss)
+
+    def _sample_until(self, stop):
+        while not stop.wait(self.sample_interval):
+            self._sample_rss()
+
+    @contextmanager
+    def stage(self, name, items=None):
+        """
+        Measures a pipeline stage. Time spent in stages nested inside it is not counted towards it.
+
+        :param name: Name of the stage
+        :param items: Optional; number of items the stage processes (can also be set with set_items)
+        """
+        frame = {'child_wall': 0.0, 'child_cpu': 0.0, 'peak_rss': None}
+        with self._lock:
+            self._stack.append(frame)
+            if self._sampler is None:
+                self._stop_sampling = threading.Event()
+                self._sampler = threading.Thread(target=self._sample_until, args=(self._stop_sampling,),
+                                                 name='rss-sampler', daemon=True)
+                self._sampler.start()
+        self._sample_rss()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            self._sample_rss()
+            sampler = None
+            with self._lock:
+                self._stack.pop()
+                if not self._stack:
+                    sampler, self._sampler = self._sampler, None
+                    self._stop_sampling.set()
+            if sampler is not None:
+                sampler.join()
+            if self._stack:
+                self._stack[-1]['child_wall'] += wall
+                self._stack[-1]['child_cpu'] += cpu
+            record = self.stages.setdefault(name, {'items': None})
+            record.update({
+                'wall_seconds': wall - frame['child_wall'],
+                'cpu_seconds': cpu - frame['child_cpu'],
+                'peak_rss_bytes': frame['peak_rss'],
+            })
+            if items is not None:
+                record['items'] = items
+            logger.debug("Stage %s took %.3fs", name, record['wall_seconds'])
+
+    def set_items(self, name, items):
+        """
+        Records the number of items a stage processed.
+
+        :param name: Name of the stage
+        :param items: Number of items
+        """
+        self.stages.setdefault(name, {'items': None})['items'] = items
+
+    def record_stage(self, name, wall_seconds, items=None):
+        """
+        Records a stage that ran elsewhere (for example in a background process).
+
+        :param name: Name of the stage
+        :param wall_seconds: Wall time of the stage
+        :param items: Optional; number of items the stage processed
+        """
+        self.stages[name] = {'items': items, 'wall_seconds': wall_seconds, 'cpu_seconds': None, 'peak_rss_bytes': None}
+
+    def record_call(self, kind, provider, latency_seconds, items=1, input_tokens=None, output_tokens=None, error=None):
+        """
+        Records a single LLM or embedding call.
+
+        :param kind: 'llm' or 'embedding'
+        :param provider: Name of the provider that served the call
+        :param latency_seconds: Latency of the call
+        :param items: Number of prompts or texts in the call
+        :param input_tokens: Input tokens, if known
+        :param output_tokens: Output tokens, if known
+        :param error: Error message if the call failed
+        """
+        self.calls.append({'kind': kind, 'provider': provider, 'latency_seconds': latency_seconds, 'items': items,
+                           'input_tokens': input_tokens, 'output_tokens': output_tokens, 'error': error})
+
+    def summary(self):
+        """
+        Aggregates the collected measurements.
+
+        :return: Dictionary with a 'stages' entry and a 'calls' entry aggregated per kind and provider
+        """
+        calls = {}
+        for call in self.calls:
+            key = f"{call['kind']}:{call['provider']}"
+            entry = calls.setdefault(key, {'kind': call['kind'], 'provider': call['provider'], 'calls': 0, 'errors': 0,
+                                           'items': 0, 'input_tokens': 0, 'output_tokens': 0, 'latencies': []})
+            entry['calls'] += 1
+            entry['errors'] += call['error'] is not None
+            entry['items'] += call['items'] or 0
+            entry['input_tokens'] += call['input_tokens'] or 0
+            entry['output_tokens'] += call['output_tokens'] or 0
+            entry['latencies'].append(call['latency_seconds'])
+
+        for entry in calls.values():
+            latencies = np.array(entry.pop('latencies'))
+            entry['latency_seconds_total'] = float(latencies.sum())
+            entry['latency_seconds_p50'] = float(np.percentile(latencies, 50))
+            entry['latency_seconds_p95'] = float(np.percentile(latencies, 95))
+            entry['latency_seconds_max'] = float(latencies.max())
+
+        return {'stages': {name: dict(record) for name, record in self.stages.items()}, 'calls': calls}
+
+    def to_json(self, indent=2):
+        """
+        Exports the aggregated measurements as JSON.
+
+        :return: JSON string
+        """
+        return json.dumps(self.summary(), indent=indent)
+
+    def to_prometheus(self, prefix='brahmasumm'):
+        """
+        Exports the aggregated measurements in the Prometheus text exposition format.
+
+        :param prefix: Prefix for all metric names
+        :return: Prometheus text format string
+        """
+        summary = self.summary()
+        lines = []
+
+        def metric(name, help_text, metric_type, samples):
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for labels, value in samples:
+                label_str = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_str}}} {value}")
+
+        stages = summary['stages'].items()
+        metric('stage_wall_seconds', 'Wall time per pipeline stage.', 'gauge',
+               [({'stage': name}, record.get('wall_seconds')) for name, record in stages])
+        metric('stage_cpu_seconds', 'CPU time per pipeline stage.', 'gauge',
+               [({'stage': name}, record.get('cpu_seconds')) for name, record in stages])
+        metric('stage_peak_rss_bytes', 'Peak process RSS while each stage ran.', 'gauge',
+               [({'stage': name}, record.get('peak_rss_bytes')) for name, record in stages])
+        metric('stage_items', 'Items processed per pipeline stage.', 'gauge',
+               [({'stage': name}, record.get('items')) for name, record in stages])
+
+        calls = [({'kind': entry['kind'], 'provider': entry['provider']}, entry) for entry in summary['calls'].values()]
+        metric('model_calls_total', 'LLM and embedding calls.', 'counter',
+               [(labels, entry['calls']) for labels, entry in calls])
+        metric('model_call_errors_total', 'Failed LLM and embedding calls.', 'counter',
+               [(labels, entry['errors']) for labels, entry in calls])
+        metric('model_call_latency_seconds_sum', 'Total latency of LLM and embedding calls.', 'counter',
+               [(labels, entry['latency_seconds_total']) for labels, entry in calls])
+        metric('model_call_latency_seconds_max', 'Slowest LLM or embedding call.', 'gauge',
+               [(labels, entry['latency_seconds_max']) for labels, entry in calls])
+        metric('model_tokens_total', 'Tokens sent to and received from models.', 'counter',
+               [(dict(labels, direction='input'), entry['input_tokens']) for labels, entry in calls] +
+               [(dict(labels, direction='output'), entry['output_tokens']) for labels, entry in calls])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,138 @@
+import re
+import json
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JSON_START = re.compile(r'[\[{]')
+
+# Shape of the combined theme response requested by find_suitable_theme_prompt_multiple. It is passed to the
+# provider's JSON output mode where there is one (see ModelManager.structured_llm) and every entry of the
+# response is validated against it.
+CLUSTER_THEMES_SCHEMA = {
+    'type': 'object',
+    'required': ['themes'],
+    'properties': {
+        'themes': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['cluster', 'theme'],
+                'properties': {'cluster': {'type': 'integer'}, 'theme': {'type': 'string', 'minLength': 1}},
+            },
+        },
+    },
+}
+
+
+_JSON_TYPES = {'object': dict, 'array': list, 'string': str, 'integer': int, 'number': (int, float), 'boolean': bool}
+
+
+def schema_errors(value, schema, path='$'):
+    """
+    Validates a decoded JSON value against the subset of JSON Schema used in this module
+    (type, required, properties, items and minLength).
+
+    :param value: Decoded JSON value
+    :param schema: The schema
+    :param path: Location of the value, for the messages
+    :return: List of error messages, empty if the value is valid
+    """
+    expected = schema.get('type')
+    if expected is not None:
+        # bool is a subclass of int, but not a JSON integer or number
+        if not isinstance(value, _JSON_TYPES[expected]) or (isinstance(value, bool) and expected != 'boolean'):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    errors = []
+    if isinstance(value, dict):
+        errors += [f"{path}: missing {key!r}" for key in schema.get('required', []) if key not in value]
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors += schema_errors(value[key], subschema, f"{path}.{key}")
+    if isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            errors += schema_errors(item, schema['items'], f"{path}[{index}]")
+    if isinstance(value, str) and len(value) < schema.get('minLength', 0):
+        errors.append(f"{path}: shorter than {schema['minLength']} characters")
+    return errors
+
+
+def extract_json(text, expected=(dict, list)):
+    """
+    Finds the first JSON object or array in an LLM response.
+    Models often wrap JSON in prose or markdown fences, so every '{' or '[' is tried as a start
+    and decoded with raw_decode, which stops at the matching close and handles nested values.
+
+    :param text: Raw response text
+    :param expected: Type or tuple of types the decoded value must have
+    :return: The decoded value, or None if the text contains no JSON value of the expected type
+    """
+    decoder = json.JSONDecoder()
+    for match in JSON_START.finditer(text):
+        try:
+            value, _ = decoder.raw_decode(text, match.start())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, expected):
+            return value
+    return None
+
+
+def _cluster_id(value):
+    """
+    Accepts 3, "3" and "Cluster 3" as the cluster id 3.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        match = re.fullmatch(r'\s*(?:cluster\s*)?(-?\d+)\s*', value, flags=re.IGNORECASE)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def parse_cluster_themes(text, cluster_labels, max_words=12):
+    """
+    Parses a combined theme response and validates every entry against CLUSTER_THEMES_SCHEMA.
+    Entries are validated one by one so a single bad entry does not discard the others;
+    a bare list of entries or a {cluster: theme} mapping is accepted as well, and cluster ids
+    written as "3" or "Cluster 3" are read as 3 before validation.
+
+    :param text: Raw response text
+    :param cluster_labels: Labels of the clusters that were asked for
+    :param max_words: Themes longer than this are rejected
+    :return: Dictionary of cluster label to theme for every valid entry
+    """
+    value = extract_json(text)
+    if isinstance(value, dict) and isinstance(value.get('themes'), list):
+        entries = value['themes']
+    elif isinstance(value, list):
+        entries = value
+    elif isinstance(value, dict):
+        entries = [{'cluster': key, 'theme': item.get('theme') if isinstance(item, dict) else item}
+                   for key, item in value.items()]
+    else:
+        logger.warning("No JSON themes found in the LLM response")
+        return {}
+
+    entry_schema = CLUSTER_THEMES_SCHEMA['properties']['themes']['items']
+    labels = {int(label): label for label in cluster_labels}
+    themes = {}
+    for entry in entries:
+        if isinstance(entry, dict) and 'cluster' in entry:
+            cluster = _cluster_id(entry['cluster'])
+            entry = dict(entry, cluster=entry['cluster'] if cluster is None else cluster)
+        errors = schema_errors(entry, entry_schema)
+        if errors:
+            logger.warning("Discarding invalid theme entry %s: %s", entry, "; ".join(errors))
+            continue
+        cluster, theme = entry['cluster'], entry['theme'].strip().strip('"\'').strip()
+        # What the schema cannot express: a known cluster, answered once, with a short one-line theme
+        if cluster not in labels or labels[cluster] in themes or not theme or '\n' in theme or len(theme.split()) > max_words:
+            logger.warning("Discarding invalid theme entry: %s", entry)
+            continue
+        themes[labels[cluster]] = theme
+    return themes
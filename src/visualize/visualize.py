@@ -1,10 +1,70 @@
-import umap
-import matplotlib.pyplot as plt
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def render_umap_plot(vectors, themes, labels, n_neighbors=25, min_dist=0.001, spread=0.8, length=12, width=5, output_image='umap_clusters.png', show=False):
+    """
+    Fits UMAP on the vectors and saves a scatter plot of the clusters to a PNG file.
+    Unless show is set, the non-interactive Agg backend is used so no display is needed.
+    Kept at module level so it can run in a worker process.
+
+    :return: Path of the saved PNG file
+    """
+    # UMAP (numba) and matplotlib are slow to import, so only load them when a plot is made
+    import umap
+    import matplotlib.pyplot as plt
+
+    if not show:
+        plt.switch_backend('Agg')
+
+    # Step 1: Apply UMAP to reduce the dimensionality of vectors
+    umap_model = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, spread=spread, random_state=42)
+    embedding = umap_model.fit_transform(vectors)  # This gives a 2D embedding
+
+    # Step 2: Prepare to plot the clusters
+    fig = plt.figure(figsize=(length, width))
+
+    # Step 3: Plot each cluster with its corresponding theme label
+    labels = np.asarray(labels)
+    for cluster_label in np.unique(labels):
+        # Get the 2D UMAP coordinates for the vectors that belong to this cluster
+        cluster_embedding = embedding[labels == cluster_label]
+
+        # Get the theme for this cluster, fall back to cluster number if missing
+        theme_label = themes.get(cluster_label, "Outliers" if cluster_label == -1 else f"Cluster {cluster_label}")
+
+        # Plot the cluster points with the correct theme label
+        plt.scatter(cluster_embedding[:, 0], cluster_embedding[:, 1], label=theme_label, s=50)
+
+    # Step 4: Add labels and title to the plot
+    plt.title('Clusters Visualized with UMAP', fontsize=12)
+    plt.legend(loc='best', title="Themes")
+    plt.grid(True)
+
+    # Step 5: Save the plot to a PNG file
+    plt.savefig(output_image, format='png')
+
+    # Step 6: Show the plot (optional)
+    if show:
+        plt.show()
+    plt.close(fig)
+    return output_image
+
 
 class Visualizer:
     def __init__(self, config_path):
-        pass
-    
+        with open(config_path, 'r') as file:
+            self.config = yaml.safe_load(file)
+        self.executor = None
+        self._executor_lock = threading.Lock()
+
     def print_labels_in_grid(self,labels):
         """
         Print the cluster labels in a grid format.
@@ -25,7 +85,7 @@ class Visualizer:
             print(labels[i:i+row_length])
             
 
-    def plot_clusters_with_umap(self, vectors, themes, labels, n_neighbors=25, min_dist=0.001, spread=0.8, length=12, width=5, output_image='umap_clusters.png'):
+    def plot_clusters_with_umap(self, vectors, themes, labels, n_neighbors=25, min_dist=0.001, spread=0.8, length=12, width=5, output_image='umap_clusters.png', show=False):
         """
         Plot clusters using UMAP and label them with their corresponding themes, then save to PNG.
 
@@ -38,42 +98,38 @@ class Visualizer:
         :param length: The length of the plot figure
         :param width: The width of the plot figure
         :param output_image: Path to save the PNG file of the plot
+        :param show: Whether to also display the plot (needs a GUI backend)
+        :return: Path of the saved PNG file
         """
-        # Step 1: Apply UMAP to reduce the dimensionality of vectors
-        umap_model = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, spread=spread, random_state=42)
-        embedding = umap_model.fit_transform(vectors)  # This gives a 2D embedding
-
-        # Step 2: Prepare to plot the clusters
-        plt.figure(figsize=(length, width))
-
-        # Step 3: Plot each cluster with its corresponding theme label
-        unique_labels = list(set(labels))  # Get unique cluster labels
-
-        for cluster_label in unique_labels:
-            # Get the indices of vectors that belong to this cluster
-            cluster_indices = [i for i, lbl in enumerate(labels) if lbl == cluster_label]
+        return render_umap_plot(vectors, themes, labels, n_neighbors=n_neighbors, min_dist=min_dist, spread=spread,
+                                length=length, width=width, output_image=output_image, show=show)
 
-            # Get the 2D UMAP coordinates for this cluster
-            cluster_embedding = embedding[cluster_indices]
-
-            # Get the theme for this cluster, fall back to cluster number if missing
-            theme_key = f"Cluster {cluster_label}"
-            theme_label = themes.get(cluster_label, f"Cluster {cluster_label}")
+    def plot_clusters_in_background(self, vectors, themes, labels, **kwargs):
+        """
+        Starts the UMAP plot in a separate process on a headless backend and returns immediately.
 
-            # Debugging: Check if the theme matches the cluster
-            #print(f"Plotting cluster {cluster_label}: Theme = {theme_label}")
-            #print(f"Cluster {cluster_label} theme exists: {theme_key in themes}")
+        Accepts the same keyword arguments as plot_clusters_with_umap (except show).
 
-            # Plot the cluster points with the correct theme label
-            plt.scatter(cluster_embedding[:, 0], cluster_embedding[:, 1], label=theme_label, s=50)
+        :return: A concurrent.futures.Future resolving to the path of the saved PNG file
+        """
+        with self._executor_lock:
+            if self.executor is None:
+                # Spawn keeps the worker free of the parent's threads and GUI state
+                self.executor = ProcessPoolExecutor(max_workers=self.config.get('visualize_workers', 1),
+                                                    mp_context=multiprocessing.get_context('spawn'))
+            executor = self.executor
 
-        # Step 4: Add labels and title to the plot
-        plt.title('Clusters Visualized with UMAP', fontsize=12)
-        plt.legend(loc='best', title="Themes")
-        plt.grid(True)
+        logger.info("Submitting UMAP visualization to a background process")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        labels = np.asarray(labels)
+        return executor.submit(render_umap_plot, vectors, dict(themes), labels, **kwargs)
 
-        # Step 5: Save the plot to a PNG file
-        plt.savefig(output_image, format='png')
+    def shutdown(self, wait=True):
+        """
+        Shuts down the background plotting process, if one was started.
 
-        # Step 6: Show the plot (optional)
-        plt.show()
\ No newline at end of file
+        :param wait: Whether to wait for pending plots to finish
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
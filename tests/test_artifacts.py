@@ -0,0 +1,77 @@
+import os
+import pytest
+import numpy as np
+from src.outputs.artifacts import save_run_artifacts, load_run_artifacts
+from src.outputs.report_generate import create_final_report
+
+@pytest.fixture
+def run_outputs():
+    chunks = ["First chunk about taxes.", "Second chunk: café, naïve, 東京.", "", "Fourth chunk."]
+    vectors = np.random.default_rng(0).normal(size=(4, 8))
+    labels = np.array([0, 1, 1, 0])
+    representatives = [(0, np.array([0, 3])), (1, np.array([1, 2]))]
+    themes = {np.int32(0): "Taxes", np.int32(1): "Travel"}
+    timings = {'embed': 1.5, 'cluster': 0.2}
+    report_data = {'summary': '<p>Summary</p>', 'total_chunks': 4, 'total_words': 12}
+    return chunks, vectors, labels, representatives, themes, timings, report_data
+
+def test_round_trip(run_outputs, tmp_path):
+    chunks, vectors, labels, representatives, themes, timings, report_data = run_outputs
+    save_run_artifacts(str(tmp_path), chunks, vectors, labels, representatives, themes, timings, report_data)
+
+    artifacts = load_run_artifacts(str(tmp_path))
+
+    assert len(artifacts) == 4
+    assert artifacts.get_chunks() == chunks, "Chunk texts (including non-ASCII and empty) should round-trip"
+    assert artifacts.vectors.dtype == np.float32, "Vectors should be stored as float32"
+    np.testing.assert_allclose(artifacts.vectors, vectors.astype(np.float32))
+    assert artifacts.labels.tolist() == labels.tolist()
+    assert [(label, indices.tolist()) for label, indices in artifacts.representatives] == [(0, [0, 3]), (1, [1, 2])]
+    assert artifacts.themes == {0: "Taxes", 1: "Travel"}
+    assert artifacts.timings == timings
+
+def test_vectors_are_memory_mapped(run_outputs, tmp_path):
+    chunks, vectors, labels, *_ = run_outputs
+    save_run_artifacts(str(tmp_path), chunks, vectors, labels)
+
+    artifacts = load_run_artifacts(str(tmp_path))
+
+    assert isinstance(artifacts.vectors, np.memmap), "Vectors should be reloaded without copying"
+    assert isinstance(artifacts.labels, np.memmap), "Labels should be reloaded without copying"
+
+def test_mismatched_lengths(run_outputs, tmp_path):
+    chunks, vectors, labels, *_ = run_outputs
+    with pytest.raises(ValueError):
+        save_run_artifacts(str(tmp_path), chunks, vectors[:2], labels)
+
+def test_report_from_artifacts(run_outputs, tmp_path):
+    save_run_artifacts(str(tmp_path), *run_outputs)
+    report_path = str(tmp_path / "report.pdf")
+
+    create_final_report(load_run_artifacts(str(tmp_path)).report_data(), report_path=report_path)
+
+    assert os.path.exists(report_path), "A report should be rebuilt from the saved artifacts"
+
+def test_invalid_inputs_leave_previous_artifacts(run_outputs, tmp_path):
+    chunks, vectors, labels, *_ = run_outputs
+    artifacts_dir = str(tmp_path / "artifacts")
+    save_run_artifacts(artifacts_dir, chunks, vectors, labels)
+
+    with pytest.raises(ValueError):
+        save_run_artifacts(artifacts_dir, chunks[:2], vectors[:2], labels)
+    with pytest.raises(AttributeError):
+        save_run_artifacts(artifacts_dir, [None] * 4, vectors, labels)  # Fails while writing the chunks
+
+    assert load_run_artifacts(artifacts_dir).get_chunks() == chunks, "The previous artifacts should be untouched"
+    assert os.listdir(tmp_path) == ["artifacts"], "No staging directories should be left behind"
+
+def test_rewrite_replaces_the_whole_directory(run_outputs, tmp_path):
+    chunks, vectors, labels, *_ = run_outputs
+    artifacts_dir = str(tmp_path / "artifacts")
+    save_run_artifacts(artifacts_dir, chunks, vectors, labels)
+    (tmp_path / "artifacts" / "stale.txt").write_text("from an older run")
+
+    assert save_run_artifacts(artifacts_dir, chunks[:1], vectors[:1], labels[:1]) == artifacts_dir
+    assert len(load_run_artifacts(artifacts_dir)) == 1
+    assert not (tmp_path / "artifacts" / "stale.txt").exists()
+    assert sorted(os.listdir(tmp_path)) == ["artifacts"]
@@ -0,0 +1,93 @@
+import time
+import threading
+import pytest
+from src.models.batching import EmbeddingDispatcher
+from src.models.fakes import FakeEmbeddings
+
+class RecordingEmbeddings(FakeEmbeddings):
+    """
+    FakeEmbeddings that remembers the size of every batch it receives.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(dimension=16, **kwargs)
+        self.batch_sizes = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        return super().embed_documents(texts)
+
+def test_results_are_routed_to_each_caller():
+    model = RecordingEmbeddings(latency=0.01)
+    dispatcher = EmbeddingDispatcher(model, max_batch_size=32, max_wait=0.05)
+    requests = [[f"document {caller} chunk {i}" for i in range(10)] for caller in range(8)]
+    results = [None] * len(requests)
+
+    def caller(index):
+        results[index] = dispatcher.embed_documents(requests[index])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dispatcher.close()
+
+    reference = FakeEmbeddings(dimension=16)
+    for texts, vectors in zip(requests, results):
+        assert vectors == reference.embed_documents(texts), "Each caller should get the vectors of its own texts"
+    assert max(model.batch_sizes) <= 32
+    assert len(model.batch_sizes) < len(requests), "Concurrent requests should be coalesced into fewer batches"
+
+def test_large_request_spans_batches():
+    model = RecordingEmbeddings()
+    dispatcher = EmbeddingDispatcher(model, max_batch_size=4, max_wait=0.01, max_concurrent_batches=3)
+    texts = [f"text {i}" for i in range(10)]
+
+    assert dispatcher.embed_documents(texts) == FakeEmbeddings(dimension=16).embed_documents(texts)
+    assert sorted(model.batch_sizes) == [2, 4, 4]
+    dispatcher.close()
+
+def test_single_caller_waits_at_most_max_wait():
+    dispatcher = EmbeddingDispatcher(FakeEmbeddings(dimension=16), max_batch_size=64, max_wait=0.05)
+    start = time.perf_counter()
+    dispatcher.embed_documents(["only one text"])
+    assert time.perf_counter() - start < 0.5, "A lone request should be sent once its wait deadline passes"
+    dispatcher.close()
+
+def test_errors_are_propagated():
+    class BrokenEmbeddings:
+        def embed_documents(self, texts):
+            raise ConnectionError("embedding server down")
+
+    dispatcher = EmbeddingDispatcher(BrokenEmbeddings(), max_wait=0.001)
+    with pytest.raises(ConnectionError):
+        dispatcher.embed_documents(["text"])
+    dispatcher.close()
+
+def test_leftover_requests_keep_their_deadline():
+    model = RecordingEmbeddings(latency=0.3)
+    dispatcher = EmbeddingDispatcher(model, max_batch_size=4, max_wait=1.0)
+    start = time.perf_counter()
+    # The third batch waits for the second to finish; its texts must not then wait a fresh max_wait
+    dispatcher.embed_documents([f"text {i}" for i in range(10)])
+    assert time.perf_counter() - start < 1.45, "Leftover texts should be sent once the request has waited max_wait"
+    assert sorted(model.batch_sizes) == [2, 4, 4]
+    dispatcher.close()
+
+def test_close_sends_queued_requests_and_rejects_new_ones():
+    model = RecordingEmbeddings(latency=0.02)
+    dispatcher = EmbeddingDispatcher(model, max_batch_size=64, max_wait=0.5)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(dispatcher.embed_documents([f"text {i}"])))
+               for i in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    dispatcher.close()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert len(results) == 5, "Requests queued before close should still be answered"
+    assert dispatcher.texts_sent == 5
+    with pytest.raises(RuntimeError):
+        dispatcher.embed_documents(["too late"])
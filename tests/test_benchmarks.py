@@ -0,0 +1,60 @@
+import os
+import numpy as np
+from src.models.fakes import FakeLLM, FakeEmbeddings
+from benchmarks.synthetic import generate_document
+from benchmarks.run_benchmarks import make_config, run_size, compare
+
+def test_fake_embeddings_are_deterministic():
+    texts = ["Taxes and wages grew.", "Insulin prices fell.", ""]
+    first = FakeEmbeddings(dimension=64).embed_documents(texts)
+    second = FakeEmbeddings(dimension=64).embed_documents(texts)
+
+    assert first == second, "The same texts should always get the same vectors"
+    assert all(len(vector) == 64 for vector in first)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0), "Vectors should be unit length"
+
+def test_fake_llm_is_deterministic():
+    first, second = FakeLLM(), FakeLLM()
+    assert first.invoke("Find a theme for taxes").content == second.invoke("Find a theme for taxes").content
+    assert first.invoke("Find a theme").usage_metadata['output_tokens'] == 5
+
+def test_generate_document():
+    document = generate_document(5000, seed=1)
+
+    assert document == generate_document(5000, seed=1), "Documents should be reproducible from the seed"
+    assert 5000 <= len(document.split()) < 5200
+    assert "\n\n" in document, "Documents should have paragraph structure"
+
+def test_run_size():
+    config_path = make_config('config/config.yaml', {})
+    try:
+        results = run_size(config_path, 2000, skip=('umap', 'report'))
+    finally:
+        os.remove(config_path)
+
+    assert set(results) == {'chunking', 'embedding', 'clustering', 'representatives', 'keyword_themes'}
+    for measured in results.values():
+        assert measured['seconds'] > 0 and measured['throughput'] > 0 and measured['peak_memory_mb'] >= 0
+
+def test_compare_detects_regressions():
+    baseline = {'1000': {'chunking': {'throughput': 100.0}, 'embedding': {'throughput': 100.0}}}
+    results = {'1000': {'chunking': {'throughput': 90.0}, 'embedding': {'throughput': 50.0}}}
+
+    assert compare(results, baseline, tolerance=0.75) == [('1000', 'embedding', 100.0, 50.0)]
+
+def test_measure_times_an_untraced_run():
+    import tracemalloc
+    from benchmarks.run_benchmarks import measure
+
+    traced = []
+    def stage():
+        traced.append(tracemalloc.is_tracing())
+        return [0] * 100000
+
+    results = {}
+    assert len(measure(results, 'stage', len, stage)) == 100000
+    assert traced == [False, True], "The timed run should not be traced; memory comes from a second run"
+    assert results['stage']['items'] == 100000 and results['stage']['peak_memory_mb'] > 0.5
+
+    measure(results, 'untraced', 1, stage, trace_memory=False)
+    assert results['untraced']['peak_memory_mb'] is None and traced[-1] is False
@@ -0,0 +1,96 @@
+import os
+import pytest
+from src.utils.checkpoint import CheckpointStore, source_fingerprint
+
+@pytest.fixture
+def config():
+    return {'target_words': 100, 'chunk_flexibility': 0.25, 'embedding_model': 'nomic-embed-text:latest',
+            'n_clusters': 13, 'llm_model': 'llama'}
+
+def test_save_and_load(config, tmp_path):
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+    store.save('chunk', ("text", ["chunk one", "chunk two"]))
+
+    assert store.load('chunk') == ("text", ["chunk one", "chunk two"])
+    assert store.load('embed') is None, "Stages that were never saved should have no checkpoint"
+
+def test_config_change_invalidates_stage_and_later_stages(config, tmp_path):
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+    for stage in ('load', 'chunk', 'embed', 'cluster'):
+        store.save(stage, stage)
+
+    config['embedding_model'] = 'mxbai-embed-large'
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+
+    assert store.load('load') == 'load', "Stages before the changed key should stay valid"
+    assert store.load('chunk') == 'chunk'
+    assert store.load('embed') is None, "The stage using the changed key should be invalidated"
+    assert store.load('cluster') is None, "Later stages should be invalidated too"
+
+def test_unrelated_config_change_keeps_checkpoints(config, tmp_path):
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+    store.save('cluster', 'clusters')
+
+    config['visualize_in_background'] = False
+    assert CheckpointStore(str(tmp_path), config, 'https://example.com', 'web').load('cluster') == 'clusters'
+
+def test_source_fingerprint_tracks_file_changes(tmp_path):
+    source = tmp_path / "doc.pdf"
+    source.write_text("first version")
+    before = source_fingerprint(str(source), 'pdf')
+
+    source.write_text("second, longer version")
+    os.utime(source, ns=(0, 10**9))
+
+    assert source_fingerprint(str(source), 'pdf') != before, "A modified file should get a new fingerprint"
+    assert source_fingerprint('https://example.com', 'web') == source_fingerprint('https://example.com', 'web')
+
+def test_llm_providers_change_invalidates_themes(config, tmp_path):
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+    store.save('cluster', 'clusters')
+    store.save('themes', 'themes')
+
+    config['llm_providers'] = ['groq', 'ollama']
+    store = CheckpointStore(str(tmp_path), config, 'https://example.com', 'web')
+
+    assert store.load('cluster') == 'clusters'
+    assert store.load('themes') is None, "Themes named by other providers should be invalidated"
+
+def test_failed_run_can_be_resumed_and_success_clears_checkpoints(tmp_path, monkeypatch):
+    import yaml
+    from concurrent.futures import Future
+    from src.summarize import Summarizer
+
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    source = tmp_path / "table.csv"
+    source.write_text("topic,note\n" + "".join(f"{['tax', 'health', 'school'][i % 3]},row {i} about item {i % 7}\n"
+                                               for i in range(120)))
+    with open('config/config.yaml') as f:
+        config = yaml.safe_load(f)
+    config.update({'llm_provider': 'fake', 'embedding_provider': 'fake', 'llm_providers': None, 'artifacts_dir': None,
+                   'checkpoint_dir': str(tmp_path / "checkpoints"), 'resume': False, 'n_clusters': 3, 'target_words': 20})
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    summarizer = Summarizer(str(config_path))
+    plotted = Future()
+    plotted.set_result("umap.png")
+    monkeypatch.setattr(summarizer.visualizer, 'plot_clusters_in_background', lambda *args, **kwargs: plotted)
+    store = CheckpointStore(config['checkpoint_dir'], config, str(source), 'csv')
+
+    invoke_llm = summarizer.model_manager.invoke_llm
+    def fail_on_summary(prompt, priority=None, **kwargs):
+        if priority == 'summary':
+            raise RuntimeError("LLM unavailable")
+        return invoke_llm(prompt, priority, **kwargs)
+    monkeypatch.setattr(summarizer.model_manager, 'invoke_llm', fail_on_summary)
+    with pytest.raises(RuntimeError):
+        summarizer(str(source), 'csv', output_dir=str(tmp_path))
+    assert store.load('cluster') is not None, "A failed run without resume should still leave its checkpoints"
+
+    monkeypatch.setattr(summarizer.model_manager, 'invoke_llm', invoke_llm)
+    monkeypatch.setattr(summarizer.cluster_manager, 'embed_documents_with_progress',
+                        lambda chunks: pytest.fail("Resuming should not embed the chunks again"))
+    data = summarizer(str(source), 'csv', resume=True, output_dir=str(tmp_path))
+
+    assert data['summary']
+    assert not os.path.exists(store.directory), "A successful run should remove its checkpoints"
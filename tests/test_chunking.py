@@ -10,9 +10,9 @@ def test_preprocess_text(chunk_manager):
     text = "This is a test.\n\nThis is a second paragraph with non-ASCII: ñ"
     processed_text = chunk_manager.preprocess_text(text)
     
-    # Ensure multiple newlines are handled, and non-ASCII characters are removed
+    # Ensure multiple newlines are handled, and non-ASCII letters are kept
     assert "\n\n" in processed_text, "Preprocessing should preserve paragraph breaks"
-    assert "ñ" not in processed_text, "Preprocessing should remove non-ASCII characters"
+    assert "ñ" in processed_text, "Preprocessing should keep accented characters"
 
 def test_flexible_chunk(chunk_manager):
     text = """
@@ -66,4 +66,15 @@ def test_get_total_words(chunk_manager):
     total_words = chunk_manager.get_total_words()
     
     # Ensure the total word count across all chunks is correct
-    assert total_words == len(text.split()), "Total word count should match the word count of the input text"
\ No newline at end of file
+    assert total_words == len(text.split()), "Total word count should match the word count of the input text"
+
+def test_iter_chunks_matches_flexible_chunk_on_pages(chunk_manager):
+    paragraph = "Taxes and wages grew again this year. Insulin prices fell for most patients in the state."
+    text = "\n\n".join(f"{paragraph} Paragraph {i}." for i in range(60))
+    pages = [text[i:i + 700] for i in range(0, len(text), 700)]
+
+    chunk_manager.flexible_chunk(chunk_manager.preprocess_text(text))
+    streamed = list(chunk_manager.iter_chunks(pages))
+
+    # Paragraphs that continue on the next page are kept together, so streaming gives the same chunks
+    assert streamed == chunk_manager.get_chunks()
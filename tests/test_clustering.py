@@ -69,4 +69,72 @@ def test_find_n_closest_representatives(cluster_manager):
     # Ensure the correct number of representatives are returned
     assert len(representatives) == 2, "There should be representatives for each of the 2 clusters"
     for cluster_label, closest_indices in representatives:
-        assert len(closest_indices) == 2, "Each cluster should have 2 closest representatives"
\ No newline at end of file
+        assert len(closest_indices) == 2, "Each cluster should have 2 closest representatives"
+
+@pytest.fixture
+def outlier_vectors():
+    # Three tight groups plus a few scattered points far from everything
+    rng = np.random.default_rng(0)
+    centers = np.eye(3, 8) * 10
+    clustered = np.concatenate([center + rng.normal(scale=0.3, size=(30, 8)) for center in centers])
+    scattered = rng.normal(scale=1.0, size=(4, 8)) + np.array([[-10, -10, 0, 0, 10, 0, 0, 0], [0, 0, -10, 10, 0, 0, 0, 0],
+                                                               [0, 0, 0, 0, 0, -10, 10, 0], [0, 0, 0, 0, 0, 0, -10, 10]])
+    return np.concatenate([clustered, scattered]).tolist()
+
+@pytest.fixture
+def offline_cluster_manager(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("outlier_detection: true\noutlier_k: 5\noutlier_contamination: 0.1\nn_closest_representatives: 3\n")
+    return ClusterManager(None, str(config_file))
+
+def test_outliers_are_excluded_from_clusters(offline_cluster_manager, outlier_vectors):
+    offline_cluster_manager.vectors = outlier_vectors
+
+    labels, centers = offline_cluster_manager.cluster_document(n_clusters=3)
+
+    outliers = set(np.flatnonzero(labels == -1).tolist())
+    assert {90, 91, 92, 93} <= outliers, "The scattered points should be outliers"
+    assert len(outliers) <= 0.1 * len(labels), "No more than the contamination fraction should be flagged"
+    assert len(set(labels[:90]) - {-1}) == 3
+    for center in centers:
+        assert np.abs(center).max() > 9, "Centers should sit on the groups, not be pulled by the outliers"
+
+    representatives = offline_cluster_manager.find_n_closest_representatives()
+    assert all(index < 90 for _, indices in representatives for index in indices)
+
+def test_clean_data_keeps_every_point(offline_cluster_manager, outlier_vectors):
+    offline_cluster_manager.vectors = outlier_vectors[:90]
+
+    labels, _ = offline_cluster_manager.cluster_document(n_clusters=3)
+
+    assert (labels >= 0).sum() >= 88, "Without noise almost nothing should be flagged"
+
+@pytest.fixture
+def low_memory_cluster_manager(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("low_memory: true\nmemory_limit_mb: 1\noutlier_detection: true\noutlier_k: 5\n"
+                           "outlier_contamination: 0.1\nn_closest_representatives: 3\nembed_batch_size: 7\n")
+    return ClusterManager(None, str(config_file))
+
+def test_low_memory_embeds_to_file_and_clusters_in_blocks(low_memory_cluster_manager, outlier_vectors, tmp_path):
+    class ListEmbeddings:
+        def embed_documents(self, texts):
+            return [outlier_vectors[int(text)] for text in texts]
+
+    manager = low_memory_cluster_manager
+    manager.embedding_model = ListEmbeddings()
+    vectors = manager.embed_documents_to_file([str(i) for i in range(len(outlier_vectors))], str(tmp_path / "vectors.npy"))
+
+    assert isinstance(vectors, np.memmap) and vectors.dtype == np.float32
+    assert np.allclose(np.load(tmp_path / "vectors.npy"), outlier_vectors, atol=1e-6)
+    rows, columns = manager.distance_block_size(len(vectors))
+    assert rows == columns and rows * columns * 12 <= 2 ** 20 // 8, "Blocks should be sized from memory_limit_mb"
+
+    labels, centers = manager.cluster_document(n_clusters=3)
+
+    assert {90, 91, 92, 93} <= set(np.flatnonzero(labels == -1).tolist())
+    assert len(set(labels[:90]) - {-1}) == 3
+    for center in centers:
+        assert np.abs(center).max() > 9
+    representatives = manager.find_n_closest_representatives()
+    assert all(index < 90 for _, indices in representatives for index in indices)
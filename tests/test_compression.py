@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+from src.clustering.clustering import ClusterManager
+from src.clustering.compression import EmbeddingCompressor, compression_quality
+from src.outputs.artifacts import save_run_artifacts, load_run_artifacts
+
+@pytest.fixture
+def clustered_vectors():
+    # Six groups in a 16-dimensional subspace of a 96-dimensional space, plus a little noise in every dimension
+    rng = np.random.default_rng(0)
+    basis = np.linalg.qr(rng.normal(size=(96, 16)))[0].T
+    centers = rng.normal(scale=4.0, size=(6, 16))
+    latent = np.concatenate([center + rng.normal(size=(50, 16)) for center in centers])
+    return latent @ basis + rng.normal(scale=0.05, size=(300, 96)) + 3.0
+
+@pytest.fixture
+def compression_cluster_manager(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("n_clusters: 6\nn_closest_representatives: 3\ncompression_dimension: 16\n"
+                           "compression_dtype: int8\ncompression_eval_sample: 200\n")
+    return ClusterManager(None, str(config_file))
+
+def test_int8_codes_keep_neighbours_and_clusters(clustered_vectors):
+    compressor = EmbeddingCompressor(16, 'int8').fit(np.array_split(clustered_vectors, 7), clustered_vectors)
+    codes = compressor.encode(clustered_vectors)
+
+    assert codes.dtype == np.int8 and codes.shape == (300, 16)
+    assert compressor.explained_variance > 0.99
+    # The codes are a uniformly scaled copy of the projection, so decoding gives back distances
+    projected = compressor.project(clustered_vectors)
+    np.testing.assert_allclose(compressor.decode(codes), projected, atol=compressor.scale)
+
+    quality = compression_quality(clustered_vectors, codes, compressor, n_clusters=6)
+    assert quality['recall_at_k'] > 0.8
+    assert quality['adjusted_rand_index'] > 0.95
+    assert quality['compression_ratio'] == 24.0
+
+def test_float16_and_state_round_trip(clustered_vectors):
+    compressor = EmbeddingCompressor(8, 'float16').fit([clustered_vectors], clustered_vectors)
+    codes = compressor.encode(clustered_vectors[:10])
+    assert codes.dtype == np.float16 and codes.shape == (10, 8)
+
+    restored = EmbeddingCompressor.from_state(compressor.state())
+    np.testing.assert_array_equal(restored.encode(clustered_vectors[:10]), codes)
+    assert restored.dimension == 8 and restored.dtype == 'float16'
+
+    with pytest.raises(ValueError):
+        EmbeddingCompressor(8, 'int4')
+
+def test_cluster_manager_clusters_compressed_vectors(compression_cluster_manager, clustered_vectors):
+    compression_cluster_manager.vectors = clustered_vectors.tolist()
+
+    codes, compressor, quality = compression_cluster_manager.compress_vectors()
+    assert compression_cluster_manager.vectors is codes and codes.dtype == np.int8
+    assert quality['sample'] == 200
+
+    labels, centers = compression_cluster_manager.cluster_document()
+    assert centers.shape == (6, 16)
+    # Every group of 50 vectors lands in a cluster of its own
+    assert sorted(len(set(labels[start:start + 50])) for start in range(0, 300, 50)) == [1] * 6
+    assert len(set(labels)) == 6
+
+    representatives = compression_cluster_manager.find_n_closest_representatives()
+    for label, indices in representatives:
+        assert all(labels[index] == label for index in indices)
+
+def test_artifacts_keep_compressed_vectors(clustered_vectors, tmp_path):
+    compressor = EmbeddingCompressor(16, 'int8').fit([clustered_vectors], clustered_vectors)
+    codes = compressor.encode(clustered_vectors)
+    chunks = [f"chunk {i}" for i in range(len(codes))]
+    save_run_artifacts(str(tmp_path), chunks, codes, np.zeros(len(codes)), compression=compressor)
+
+    artifacts = load_run_artifacts(str(tmp_path))
+
+    assert artifacts.vectors.dtype == np.int8, "Compressed vectors should be stored as they are"
+    np.testing.assert_array_equal(artifacts.vectors, codes)
+    restored = EmbeddingCompressor.from_state(artifacts.compression)
+    np.testing.assert_array_equal(restored.encode(clustered_vectors[:5]), codes[:5])
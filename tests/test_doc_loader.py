@@ -0,0 +1,12 @@
+from src.doc_loaders.doc_loader import DocumentLoader
+from benchmarks.memory_benchmark import write_pdf
+
+def test_iter_pages_streams_every_page(tmp_path):
+    path = write_pdf(str(tmp_path / "doc.pdf"), pages=7, words_per_page=60)
+
+    pages = list(DocumentLoader(path, "pdf").iter_pages(window=3))
+
+    assert len(pages) == 7, "Pages should be read across reader windows without gaps or repeats"
+    assert len(set(pages)) == 7
+    assert all(len(page.split()) >= 50 for page in pages)
+    assert pages == list(DocumentLoader(path, "pdf").iter_pages(window=50))
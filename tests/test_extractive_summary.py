@@ -0,0 +1,41 @@
+import numpy as np
+from src.outputs.extractive_summary import split_sentences, textrank, central_sentences, create_extractive_summary
+from src.outputs.report_generate import create_final_report
+
+def test_split_sentences():
+    text = "The first sentence is here. Is this the second one? Yes! Version 2.0 shipped today. \"Quoted\" sentences count too."
+    assert split_sentences(text) == ["The first sentence is here.", "Is this the second one?",
+                                     "Version 2.0 shipped today.", "\"Quoted\" sentences count too."]
+
+def test_textrank_prefers_central_items():
+    vectors = np.array([[1.0, 0.2], [1.0, -0.2], [1.0, 0.0], [-0.2, 1.0]])
+    scores = textrank(vectors)
+
+    assert np.isclose(scores.sum(), 1.0)
+    assert scores.argmax() == 2, "The item between the others should rank first"
+    assert scores.argmin() == 3, "The off-topic item should rank last"
+
+def test_central_sentences_keep_document_order():
+    chunk = ("Retrieval quality depends on good embeddings. The weather was pleasant that day. "
+             "Good embeddings make retrieval quality better. Lunch was served at noon in the hall.")
+    picked = central_sentences(chunk, 2)
+
+    assert picked == ["Retrieval quality depends on good embeddings.", "Good embeddings make retrieval quality better."]
+
+def test_extractive_summary_renders(tmp_path):
+    chunks = ["Vector search finds similar documents quickly. It relies on embeddings & indexes. Latency stays low.",
+              "Embeddings map text to vectors for search. Search quality depends on them. Indexes matter for speed.",
+              "The election debate covered taxes and healthcare. Voters asked about <taxes> twice. The debate ran late."]
+    vectors = np.array([[1.0, 0.1], [0.9, 0.2], [0.1, 1.0]])
+    summary = create_extractive_summary(chunks, vectors, [(0, [1, 0]), (1, [2])], themes={0: "Search", 1: "Politics"},
+                                        sentences_per_cluster=1)
+
+    assert summary.startswith("<h1>Extractive summary</h1>")
+    assert summary.index("<h2>Search</h2>") < summary.index("<h2>Politics</h2>")
+    assert summary.count("<li>") == 2
+    assert "<taxes>" not in summary, "Sentences should be escaped for the report markup"
+
+    report_path = tmp_path / "report.pdf"
+    create_final_report({'summary': summary, 'labels': [0, 0, 1], 'themes': {0: "Search", 1: "Politics"},
+                         'umap_image_path': None}, report_path=str(report_path))
+    assert report_path.stat().st_size > 0
@@ -0,0 +1,90 @@
+import time
+import pytest
+from src.models.hedging import HedgedLLM
+from src.models.fakes import FakeLLM
+from src.models.scheduler import LLMScheduler
+
+class FailingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        raise ValueError("provider down")
+
+def test_fast_primary_is_not_hedged():
+    slow = FakeLLM(latency=1.0)
+    pool = HedgedLLM([('groq', FakeLLM(latency=0.01)), ('ollama', slow)], hedge_initial_delay=0.5)
+
+    name, response = pool.invoke("Find a theme")
+
+    assert name == 'groq'
+    assert pool.stats()['ollama']['calls'] == 0
+    pool.shutdown()
+
+def test_slow_primary_is_hedged():
+    pool = HedgedLLM([('groq', FakeLLM(latency=1.0)), ('ollama', FakeLLM(latency=0.01))],
+                     hedge_initial_delay=0.05, hedge_min_delay=0.01)
+
+    start = time.perf_counter()
+    name, response = pool.invoke("Find a theme")
+
+    assert name == 'ollama'
+    assert time.perf_counter() - start < 0.5, "The hedged provider should answer before the slow primary"
+    stats = pool.stats()
+    assert stats['ollama']['hedges'] == 1 and stats['ollama']['wins'] == 1
+    assert stats['groq']['wins'] == 0
+    pool.shutdown()
+
+def test_hedge_delay_follows_latency_percentile():
+    pool = HedgedLLM([('groq', FakeLLM(latency=0.02)), ('ollama', FakeLLM())],
+                     hedge_initial_delay=5.0, hedge_min_delay=0.0, min_samples=5)
+    assert pool.hedge_delay('groq') == 5.0
+
+    for _ in range(5):
+        pool.invoke("Find a theme")
+
+    assert 0.02 <= pool.hedge_delay('groq') < 0.5
+    pool.shutdown()
+
+def test_errors_fall_back_in_order():
+    first, second = FailingLLM(), FailingLLM()
+    pool = HedgedLLM([('groq', first), ('openai', second), ('ollama', FakeLLM())], hedging=False)
+
+    name, response = pool.invoke("Find a theme")
+
+    assert name == 'ollama' and first.calls == 1 and second.calls == 1
+    stats = pool.stats()
+    assert stats['openai']['fallbacks'] == 1 and stats['ollama']['fallbacks'] == 1
+    assert stats['groq']['errors'] == 1
+    pool.shutdown()
+
+def test_last_error_is_raised_when_all_providers_fail():
+    pool = HedgedLLM([('groq', FailingLLM()), ('ollama', FailingLLM())], scheduler=LLMScheduler(max_retries=0))
+
+    with pytest.raises(ValueError, match="provider down"):
+        pool.invoke("Find a theme")
+    pool.shutdown()
+
+def test_model_manager_records_winning_provider(tmp_path):
+    from src.models.models import ModelManager
+    from src.utils.metrics import PipelineMetrics
+
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text('llm_provider: "groq"\nllm_providers: ["fake", {provider: "fake", name: "backup"}]\n')
+    model_manager = ModelManager(str(config_file))
+    model_manager.metrics = PipelineMetrics()
+
+    assert model_manager.invoke_llm("Find a theme", priority='theme')
+    assert model_manager.metrics.summary()['calls']['llm:fake']['calls'] == 1
+    assert set(model_manager.llm_pool.stats()) == {'fake', 'backup'}
+    model_manager.llm_pool.shutdown()
+
+def test_model_manager_reports_providers_that_fail_to_load(tmp_path):
+    from src.models.models import ModelManager
+
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text('llm_provider: "groq"\nllm_providers: ["unknown", {provider: "missing"}]\n')
+
+    with pytest.raises(ValueError, match="unknown: Unknown LLM provider.*missing: Unknown LLM provider"):
+        ModelManager(str(config_file))
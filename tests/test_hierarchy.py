@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from src.clustering.hierarchy import TopicTree
+
+@pytest.fixture
+def fine_clusters():
+    # Six fine clusters that form two well separated groups of three
+    rng = np.random.default_rng(0)
+    group_centers = [np.array([10.0, 0, 0, 0]), np.array([0, 0, 10.0, 0])]
+    offsets = [np.array([0, 1.0, 0, 0]), np.array([0, -1.0, 0, 0]), np.array([0, 0, 0, 1.0])]
+    vectors, labels = [], []
+    for group, group_center in enumerate(group_centers):
+        for offset_index, offset in enumerate(offsets):
+            size = 10 + 5 * group  # The second group is larger
+            vectors.append(group_center + offset + rng.normal(scale=0.05, size=(size, 4)))
+            labels += [group * 3 + offset_index] * size
+    vectors = np.concatenate(vectors)
+    labels = np.array(labels)
+    labels[0] = -1  # An outlier
+    return vectors, labels
+
+def test_cut_merges_nearby_clusters(fine_clusters):
+    vectors, labels = fine_clusters
+    tree = TopicTree(vectors, labels)
+
+    assert tree.n_clusters == 6
+    assert tree.describe(2) == {0: [3, 4, 5], 1: [0, 1, 2]}, "Topic 0 should be the larger group"
+    # Cluster 0 lost its outlier, so it is the smallest
+    assert tree.describe(6) == {topic: [label] for topic, label in enumerate([3, 4, 5, 1, 2, 0])}
+
+def test_representatives_at_coarse_level(fine_clusters):
+    vectors, labels = fine_clusters
+    tree = TopicTree(vectors, labels)
+
+    topic_labels, representatives = tree.representatives_at(2, n=3)
+
+    assert topic_labels[0] == -1, "Outliers should stay outliers"
+    assert set(topic_labels[1:30].tolist()) == {1} and set(topic_labels[30:].tolist()) == {0}
+    assert [topic for topic, _ in representatives] == [0, 1]
+    for topic, indices in representatives:
+        assert len(indices) == 3
+        assert all(topic_labels[index] == topic for index in indices)
+        assert 0 not in indices
+
+def test_single_cluster():
+    tree = TopicTree(np.ones((4, 3)), [0, 0, 0, 0])
+    assert tree.describe(3) == {0: [0]}
+
+def test_tree_from_cluster_centers(fine_clusters):
+    vectors, labels = fine_clusters
+    centers = np.stack([vectors[labels == label].mean(axis=0) for label in range(6)])
+    candidates = [(label, np.flatnonzero(labels == label)[:2]) for label in range(6)]
+    tree = TopicTree(vectors, labels, centers=centers)
+
+    assert tree.describe(2) == TopicTree(vectors, labels).describe(2)
+    topic_labels, representatives = tree.representatives_at(2, n=3, candidates=candidates)
+    allowed = {int(index) for _, indices in candidates for index in indices}
+    for topic, indices in representatives:
+        assert len(indices) == 3
+        assert all(int(index) in allowed and topic_labels[index] == topic for index in indices)
+
+def test_compressed_vectors_are_read_in_blocks(fine_clusters):
+    vectors, labels = fine_clusters
+    codes = np.round(vectors * 10).astype(np.int8)
+    reads = []
+    tree = TopicTree(codes, labels, block_size=16, release=lambda: reads.append(1))
+
+    reference = TopicTree(codes.astype(np.float32), labels)
+    np.testing.assert_allclose(tree.centers, reference.centers, rtol=1e-5)
+    assert tree.vectors is codes, "The codes should not be widened to float32"
+    assert len(reads) == -(-len(codes) // 16)
+    _, representatives = tree.representatives_at(2)
+    _, expected = reference.representatives_at(2)
+    assert [indices.tolist() for _, indices in representatives] == [indices.tolist() for _, indices in expected]
+
+def test_cosine_metric_merges_by_direction():
+    # Two directions; the vectors of each differ widely in length, which misleads the Euclidean metric
+    rng = np.random.default_rng(0)
+    directions = np.array([[1.0, 0, 0], [0, 1.0, 0]])
+    vectors = np.concatenate([directions[group] * scale + rng.normal(scale=0.01, size=(10, 3))
+                              for group, scale in [(0, 1), (0, 20), (1, 1), (1, 20)]])
+    labels = np.repeat(np.arange(4), 10)
+
+    assert TopicTree(vectors, labels, metric='cosine').describe(2) == {0: [0, 1], 1: [2, 3]}
+    assert TopicTree(vectors, labels).describe(2) != {0: [0, 1], 1: [2, 3]}
+    with pytest.raises(ValueError):
+        TopicTree(vectors, labels, metric='manhattan')
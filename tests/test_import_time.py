@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+# Packages that should only be imported by the stage or provider that needs them
+HEAVY_MODULES = ['umap', 'numba', 'matplotlib', 'reportlab', 'PIL', 'sklearn', 'langchain_groq', 'langchain_ollama',
+                 'langchain_openai', 'langchain_community', 'whisper', 'pydub', 'onnxruntime', 'torch']
+# Generous wall-clock budget for a cold import; the module checks below are the precise guard
+IMPORT_BUDGET_SECONDS = 5.0
+
+def measure_import(module):
+    """
+    Imports a module in a fresh interpreter and reports the import time and the heavy modules it pulled in.
+    """
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)\n"
+        "print(json.dumps({'seconds': elapsed, 'heavy': heavy}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.abspath('src'))
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module", ["summarize", "models.models", "clustering.clustering", "visualize.visualize",
+                                    "doc_loaders.doc_loader", "doc_loaders.multimedia_loader"])
+def test_import_is_lazy(module):
+    result = measure_import(module)
+    print(f"import {module}: {result['seconds']:.3f}s")
+
+    assert result['heavy'] == [], f"Importing {module} should not load {result['heavy']}"
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS, f"Importing {module} took {result['seconds']:.2f}s"
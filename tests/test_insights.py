@@ -0,0 +1,65 @@
+import time
+import threading
+from services.insights import InsightCache, ask_all, dataset_fingerprint, file_digest
+
+class SlowLLM:
+    def __init__(self, delay=0.2, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(self, question):
+        with self.lock:
+            self.calls.append(question)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if question == self.fail_on:
+            raise RuntimeError("rate limited")
+        return f"answer to {question}"
+
+def test_questions_run_concurrently_within_the_limit():
+    llm = SlowLLM()
+    questions = [f"question {i}" for i in range(8)]
+
+    start = time.perf_counter()
+    results = ask_all(llm, questions, max_concurrency=4)
+    elapsed = time.perf_counter() - start
+
+    assert list(results) == questions
+    assert results['question 3']['answer'] == "answer to question 3"
+    assert llm.max_in_flight == 4
+    assert elapsed < 0.7, "Eight questions four at a time should take about two question latencies"
+    assert all(result['seconds'] >= 0.2 and not result['cached'] for result in results.values())
+
+def test_answers_are_cached_per_fingerprint(tmp_path):
+    cache = InsightCache(str(tmp_path / "cache"))
+    llm = SlowLLM(delay=0, fail_on="question 2")
+    questions = ["question 1", "question 2"]
+
+    first = ask_all(llm, questions, cache=cache, fingerprint="abc")
+    second = ask_all(llm, questions, cache=cache, fingerprint="abc")
+    other = ask_all(llm, ["question 1"], cache=cache, fingerprint="def")
+
+    assert first['question 2']['error'] == "rate limited"
+    assert second['question 1']['cached'] and second['question 1']['answer'] == "answer to question 1"
+    assert not second['question 2']['cached'], "Failed answers should not be cached"
+    assert not other['question 1']['cached'], "Another dataset should not reuse the answers"
+    assert llm.calls == ["question 1", "question 2", "question 2", "question 1"]
+
+def test_fingerprint_changes_with_schema_and_content(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,x\n")
+    profile = {'columns': {'a': {'dtypes': ['int64']}, 'b': {'dtypes': ['str']}}}
+    fingerprint = dataset_fingerprint(profile, file_digest(str(path)))
+
+    assert dataset_fingerprint(profile, file_digest(str(path))) == fingerprint
+    path.write_text("a,b\n2,x\n")
+    assert dataset_fingerprint(profile, file_digest(str(path))) != fingerprint
+    renamed = {'columns': {'a': {'dtypes': ['int64']}, 'c': {'dtypes': ['str']}}}
+    assert dataset_fingerprint(renamed, file_digest(str(path))) != dataset_fingerprint(profile, file_digest(str(path)))
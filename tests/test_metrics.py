@@ -0,0 +1,80 @@
+import time
+import json
+import pytest
+from unittest.mock import MagicMock
+from src.utils.metrics import PipelineMetrics
+from src.models.models import ModelManager
+
+@pytest.fixture
+def model_manager(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text('llm_provider: "none"\nembedding_model: "mxbai-embed-large"\n')
+    model_manager = ModelManager(str(config_file))
+    model_manager.metrics = PipelineMetrics()
+    return model_manager
+
+def test_nested_stages_are_exclusive():
+    metrics = PipelineMetrics()
+    with metrics.stage('chunk', items=3):
+        with metrics.stage('load'):
+            time.sleep(0.05)
+        time.sleep(0.01)
+
+    assert metrics.stages['load']['wall_seconds'] >= 0.05
+    assert metrics.stages['chunk']['wall_seconds'] < 0.05, "Nested stage time should not count towards the outer stage"
+    assert metrics.stages['chunk']['items'] == 3
+    assert metrics.stages['chunk']['cpu_seconds'] is not None
+
+def test_call_aggregation():
+    metrics = PipelineMetrics()
+    metrics.record_call('llm', 'groq', 0.5, input_tokens=100, output_tokens=20)
+    metrics.record_call('llm', 'groq', 1.5, input_tokens=50, output_tokens=10)
+    metrics.record_call('llm', 'groq', 0.1, error="429")
+
+    llm = metrics.summary()['calls']['llm:groq']
+
+    assert llm['calls'] == 3 and llm['errors'] == 1
+    assert llm['input_tokens'] == 150 and llm['output_tokens'] == 30
+    assert llm['latency_seconds_max'] == 1.5
+    assert json.loads(metrics.to_json())['calls']['llm:groq']['calls'] == 3
+
+def test_prometheus_export():
+    metrics = PipelineMetrics()
+    with metrics.stage('embed', items=10):
+        pass
+    metrics.record_call('embedding', 'ollama', 0.2, items=10, input_tokens=400)
+
+    text = metrics.to_prometheus()
+
+    assert '# TYPE brahmasumm_stage_wall_seconds gauge' in text
+    assert 'brahmasumm_stage_items{stage="embed"} 10' in text
+    assert 'brahmasumm_model_calls_total{kind="embedding",provider="ollama"} 1' in text
+    assert 'brahmasumm_model_tokens_total{kind="embedding",provider="ollama",direction="input"} 400' in text
+
+def test_model_manager_records_calls(model_manager):
+    response = MagicMock(content="A theme", usage_metadata={'input_tokens': 12, 'output_tokens': 3})
+    model_manager.llm = MagicMock()
+    model_manager.llm.invoke.return_value = response
+    model_manager.embedding_model = MagicMock()
+    model_manager.embedding_model.embed_documents.return_value = [[0.1, 0.2], [0.3, 0.4]]
+
+    assert model_manager.invoke_llm("Find a theme") == "A theme"
+    assert model_manager.embed_documents(["first text", "second text"]) == [[0.1, 0.2], [0.3, 0.4]]
+
+    calls = model_manager.metrics.summary()['calls']
+    assert calls['llm:none']['input_tokens'] == 12 and calls['llm:none']['output_tokens'] == 3
+    assert calls['embedding:ollama']['items'] == 2
+
+def test_stage_peak_memory_is_per_stage():
+    import numpy as np
+    metrics = PipelineMetrics(sample_interval=0.005)
+    with metrics.stage('allocate'):
+        block = np.ones(200 * 2 ** 20 // 8)
+        time.sleep(0.02)
+        del block
+    with metrics.stage('idle'):
+        time.sleep(0.02)
+
+    allocate, idle = metrics.stages['allocate']['peak_rss_bytes'], metrics.stages['idle']['peak_rss_bytes']
+    assert allocate - idle > 100 * 2 ** 20, "A later stage should not inherit the peak of an earlier one"
+    assert metrics._sampler is None, "Sampling should stop once no stage is open"
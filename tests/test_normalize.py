@@ -0,0 +1,26 @@
+import pytest
+from src.chunking.normalize import normalize_text, iter_normalized
+
+def test_normalize_text_keeps_unicode_letters():
+    text = "Señor Müller met Zoë in Kraków.\n\n東京で会いましょう。"
+    assert normalize_text(text) == text
+
+def test_normalize_text_cleans_pdf_artifacts():
+    line = "The \ufb01nal of\ufb02ine “re\u00adport” — it’s ready.\u200b\x00"
+    assert normalize_text(line) == 'The final offline "report" - it\'s ready.'
+    assert normalize_text("plain\x07 ascii\ttext ") == "plain ascii text"
+    assert normalize_text(" \t\u00a0") == ""
+
+def test_normalize_text_composes_and_collapses_whitespace():
+    text = "Cafe\u0301 \u00a0 and\ttea.\r\n \r\n\nNext\u2028line\x0cpage\n"
+    assert normalize_text(text) == "Café and tea.\n\nNext\n\nline\n\npage"
+
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_iter_normalized_matches_whole_text(size):
+    text = ("Zoë’s  \ufb01rst line.\r\n\r\n  Second \t paragraph\u00a0with Cafe\u0301 and "
+            "spaces   here.\n\n\n") * 20
+    blocks = [text[i:i + size] for i in range(0, len(text), size)]
+
+    paragraphs = list(iter_normalized(blocks))
+    assert all(paragraphs)
+    assert "\n\n".join(paragraphs) == normalize_text(text)
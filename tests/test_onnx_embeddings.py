@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+from onnx import helper, TensorProto, numpy_helper
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from src.models.onnx_embeddings import OnnxEmbeddings
+
+VOCAB = ["[PAD]", "[UNK]", "taxes", "wages", "jobs", "insulin", "doctors", "hospital", "the", "and"]
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """
+    Builds a tiny embedding model (a token embedding lookup) and a word-level tokenizer.
+    """
+    path = tmp_path_factory.mktemp("onnx_model")
+    tokenizer = Tokenizer(WordLevel({word: i for i, word in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(path / "tokenizer.json"))
+
+    table = np.random.default_rng(0).normal(size=(len(VOCAB), 64)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["embeddings", "input_ids"], ["last_hidden_state"])],
+        "tiny_embedder",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", 64])],
+        [numpy_helper.from_array(table, "embeddings")])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8)
+    onnx.save(model, str(path / "model.onnx"))
+    return str(path)
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_embed_documents(model_path, quantize):
+    embedder = OnnxEmbeddings(model_path, max_seq_length=8, batch_size=2, num_threads=2, quantize=quantize)
+    texts = ["taxes and wages", "insulin doctors hospital", "jobs", "taxes and wages and jobs and the taxes wages"]
+
+    vectors = np.array(embedder.embed_documents(texts))
+
+    assert vectors.shape == (4, 64)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5), "Embeddings should be L2-normalized"
+    # Batching and length sorting must not change the order or values of the results
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(embedder.embed_query(text), vector, atol=1e-5)
+
+def test_quantized_model_stays_close(model_path):
+    texts = ["taxes and wages", "insulin doctors hospital"]
+    full = np.array(OnnxEmbeddings(model_path, quantize=False).embed_documents(texts))
+    quantized = np.array(OnnxEmbeddings(model_path, quantize=True).embed_documents(texts))
+
+    assert np.all(np.sum(full * quantized, axis=1) > 0.99), "int8 embeddings should keep cosine similarity close to 1"
+
+def test_max_seq_length_truncates(model_path):
+    embedder = OnnxEmbeddings(model_path, max_seq_length=2, quantize=False)
+    assert np.allclose(embedder.embed_query("taxes wages insulin doctors"), embedder.embed_query("taxes wages"), atol=1e-5)
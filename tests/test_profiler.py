@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.profiler import Moments, HeavyHitters, UniformSample, profile_table, format_profile
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    rows = 5000
+    df = pd.DataFrame({
+        'price': rng.lognormal(3, 1, rows),
+        'quantity': rng.integers(0, 100, rows),
+        'category': rng.choice(['a', 'b', 'c', 'd'], rows, p=[0.5, 0.3, 0.15, 0.05]),
+        'sku': [f"sku-{i}" for i in range(rows)],
+    })
+    df.loc[rng.choice(rows, 250, replace=False), 'price'] = np.nan
+    df.loc[rng.choice(rows, 100, replace=False), 'category'] = None
+    return df
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_profile_matches_pandas(tmp_path, table, file_format):
+    path = tmp_path / f"table.{file_format}"
+    table.to_csv(path, index=False) if file_format == 'csv' else table.to_parquet(path, index=False)
+
+    profile = profile_table(str(path), chunk_size=700, max_workers=2, sample_size=2000, top_k=20)
+
+    assert profile['rows'] == len(table)
+    assert list(profile['columns']) == list(table.columns)
+    price = profile['columns']['price']
+    assert price['nulls'] == 250
+    assert price['mean'] == pytest.approx(table['price'].mean())
+    assert price['std'] == pytest.approx(table['price'].std())
+    assert price['max'] == pytest.approx(table['price'].max())
+    assert price['quantiles']['p50'] == pytest.approx(table['price'].median(), rel=0.1)
+
+    category = profile['columns']['category']
+    assert category['nulls'] == 100
+    assert [value for value, _ in category['top_values'][:3]] == ['a', 'b', 'c']
+    assert 'Dataset table' in format_profile(profile)
+
+def test_moments_merge_equals_single_pass():
+    values = np.random.default_rng(1).normal(5, 2, 1000)
+    merged = Moments()
+    for part in np.array_split(values, 7):
+        merged.update(part)
+    assert merged.summary()['mean'] == pytest.approx(values.mean())
+    assert merged.summary()['std'] == pytest.approx(values.std(ddof=1))
+
+def test_heavy_hitters_are_bounded_and_find_frequent_values():
+    values = ['x'] * 3000 + ['y'] * 1500 + [f"rare-{i}" for i in range(5000)]
+    np.random.default_rng(2).shuffle(values)
+    sketch = HeavyHitters(k=10)
+    for start in range(0, len(values), 500):
+        sketch.update(values[start:start + 500])
+
+    assert len(sketch.counters) <= 10
+    top = dict(sketch.top(2))
+    assert list(top) == ['x', 'y']
+    # Misra-Gries undercounts by at most n / (k + 1)
+    assert 3000 - len(values) / 11 <= top['x'] <= 3000
+
+def test_uniform_sample_is_bounded():
+    sample = UniformSample(size=100)
+    for start in range(0, 10000, 1000):
+        sample.update(np.arange(start, start + 1000))
+    assert len(sample.values) == 100
+    assert 3000 < sample.quantiles()['p50'] < 7000
+
+def test_streamed_correlation_matches_pandas(tmp_path, table):
+    table['revenue'] = table['price'] * table['quantity'] + 1e6  # Large offset to exercise the chunk shift
+    table.loc[::7, 'quantity'] = np.nan
+    path = tmp_path / "table.csv"
+    table.to_csv(path, index=False)
+
+    profile = profile_table(str(path), chunk_size=700, max_workers=2)
+
+    correlations = profile['correlations']
+    assert correlations['columns'] == ['price', 'quantity', 'revenue']
+    expected = table[correlations['columns']].corr().to_numpy()
+    np.testing.assert_allclose(correlations['matrix'], expected, atol=1e-9)
+    assert "Strongest correlations: price~revenue" in format_profile(profile)
@@ -1,6 +1,7 @@
 import pytest
 import os
-from src.outputs.report_generate import create_final_report
+from src.outputs.report_generate import create_final_report, read_image_size
+from src.outputs.batch_report import render_reports
 
 @pytest.fixture
 def realistic_data():
@@ -106,4 +107,38 @@ def test_create_final_report(realistic_data):
     # Step 4: Open the generated PDF manually for visual inspection
     print(f"Generated PDF report saved at: {os.path.abspath(report_path)}")
 
-# Run with pytest
\ No newline at end of file
+# Run with pytest
+def test_read_image_size(tmp_path):
+    """
+    Test that the image size is read from the header and matches the decoded image.
+    """
+    from PIL import Image as PILImage
+    image_path = str(tmp_path / "image.png")
+    PILImage.new("RGB", (120, 80)).save(image_path)
+
+    assert tuple(read_image_size(image_path)) == (120, 80)
+
+def test_render_reports(realistic_data, tmp_path):
+    """
+    Test that a batch of reports is rendered in the process pool with per-report timings.
+    """
+    jobs = [(realistic_data, str(tmp_path / f"report_{i}.pdf")) for i in range(3)]
+
+    results = render_reports(jobs, max_workers=2)
+
+    assert [result['report_path'] for result in results] == [report_path for _, report_path in jobs]
+    for result in results:
+        assert result['error'] is None, "Every report should render without errors"
+        assert result['seconds'] > 0, "Render time should be measured for every report"
+        assert os.path.exists(result['report_path'])
+
+def test_large_clusters_fit_the_table(realistic_data, tmp_path):
+    """
+    Test that a cluster with more chunk numbers than fit on a page does not break the layout.
+    """
+    data = dict(realistic_data, labels=[0] * 8000 + [1] * 2000, themes={0: "Large", 1: "Small"})
+    report_path = str(tmp_path / "report.pdf")
+
+    create_final_report(data, report_path=report_path)
+
+    assert os.path.exists(report_path)
@@ -0,0 +1,148 @@
+import json
+import time
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.models.scheduler import LLMScheduler, TokenBucket, error_retry_after, is_retryable
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in LLM endpoint that answers the first `failures` requests with 429 and Retry-After.
+    """
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with server.lock:
+            server.requests += 1
+            limited = server.requests <= server.failures
+        if limited:
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retry_after))
+            self.end_headers()
+            return
+        body = json.dumps({'content': 'A theme'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def llm_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RateLimitedHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.failures = 2
+    server.retry_after = 0.2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def post_prompt(server, prompt):
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat"
+    request = urllib.request.Request(url, data=json.dumps({'prompt': prompt}).encode(), method='POST')
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())['content']
+
+def test_retries_honour_retry_after(llm_server):
+    scheduler = LLMScheduler(max_retries=3, base_delay=0.01)
+
+    start = time.monotonic()
+    assert scheduler.call('groq', lambda: post_prompt(llm_server, "Find a theme")) == "A theme"
+    elapsed = time.monotonic() - start
+
+    assert llm_server.requests == 3
+    assert elapsed >= 2 * llm_server.retry_after, "Each 429 should hold the provider back for Retry-After seconds"
+
+def test_gives_up_after_max_retries(llm_server):
+    llm_server.failures = 10
+    llm_server.retry_after = 0
+    scheduler = LLMScheduler(max_retries=2, base_delay=0.01)
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scheduler.call('groq', lambda: post_prompt(llm_server, "Find a theme"))
+
+    assert error.value.code == 429
+    assert llm_server.requests == 3
+
+def test_errors_are_classified():
+    class ProviderError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"status {status_code}")
+            self.status_code = status_code
+
+    assert is_retryable(ProviderError(429)) and is_retryable(ProviderError(503))
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(ProviderError(400)) and not is_retryable(ValueError("bad prompt"))
+
+    calls = []
+    def bad_request():
+        calls.append(1)
+        raise ProviderError(400)
+    with pytest.raises(ProviderError):
+        LLMScheduler(max_retries=3, base_delay=0.01).call('groq', bad_request)
+    assert len(calls) == 1, "Client errors should not be retried"
+
+def test_sdk_connection_errors_are_retryable():
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+    assert is_retryable(httpx.ConnectError("refused", request=request))
+    assert is_retryable(httpx.ReadTimeout("timed out", request=request))
+    for package in ("groq", "openai"):
+        sdk = pytest.importorskip(package)
+        assert is_retryable(sdk.APIConnectionError(request=request))
+        assert is_retryable(sdk.APITimeoutError(request=request))
+        assert not is_retryable(sdk.APIError("bad prompt", request=request, body=None))
+
+def test_retry_after_header_formats():
+    class HeaderError(Exception):
+        def __init__(self, value):
+            self.headers = {'retry-after': value}
+
+    assert error_retry_after(HeaderError("1.5")) == 1.5
+    assert error_retry_after(HeaderError("not a date")) is None
+    assert error_retry_after(ValueError()) is None
+
+def test_requests_are_paced():
+    scheduler = LLMScheduler(rate_limits={'groq': {'requests_per_minute': 600, 'burst': 0.001}})
+
+    start = time.monotonic()
+    for _ in range(4):
+        scheduler.call('groq', lambda: None)
+    elapsed = time.monotonic() - start
+
+    # One request per 0.1s once the single-request burst is used up
+    assert elapsed >= 0.25
+
+def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(rate=10, capacity=5)
+    now = time.monotonic()
+    assert bucket.wait_time(100, now) == 0, "A full bucket should admit a request larger than its capacity"
+    bucket.take(100)
+    assert bucket.wait_time(1, now) == pytest.approx(0.1, abs=0.01)
+
+def test_summaries_go_before_waiting_theme_calls():
+    scheduler = LLMScheduler(rate_limits={'groq': {'requests_per_minute': 1200, 'burst': 0.001}})
+    order = []
+    scheduler.call('groq', lambda: None)  # Empty the bucket so the callers below queue up
+
+    def caller(name, priority):
+        scheduler.call('groq', lambda: order.append(name), priority=priority)
+
+    threads = [threading.Thread(target=caller, args=(f"theme {i}", 'theme')) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.01)
+    summary = threading.Thread(target=caller, args=('summary', 'summary'))
+    summary.start()
+    for thread in threads + [summary]:
+        thread.join()
+
+    assert order.index('summary') <= 1, "The summary should overtake the queued theme calls"
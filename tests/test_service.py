@@ -0,0 +1,125 @@
+import time
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from src.service import JobManager, QueueFullError, create_app
+
+class StubRunner:
+    """
+    Stands in for the summarization pipeline: writes an artifact and returns a small result,
+    optionally blocking until released so tests can fill the queue.
+    """
+    def __init__(self, block=False):
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, job):
+        self.release.wait(timeout=10)
+        if job.source == "broken":
+            raise ValueError("Could not load document")
+        with open(f"{job.output_dir}/report.pdf", "w") as f:
+            f.write("report")
+        return {'summary': f"Summary of {job.source}", 'themes': {0: "Theme"}}
+
+@pytest.fixture
+def config_path(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(f'service_workers: 1\nservice_max_pending: 1\nservice_output_dir: "{tmp_path / "jobs"}"\n')
+    return str(config_file)
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job_id}").json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError("Job did not finish in time")
+
+def test_job_lifecycle(config_path):
+    with TestClient(create_app(config_path, runner=StubRunner())) as client:
+        response = client.post("/jobs", json={'source': "https://example.com", 'type': "web"})
+        assert response.status_code == 202
+        job_id = response.json()['job_id']
+
+        assert wait_for(client, job_id)['status'] == 'done'
+        assert client.get(f"/jobs/{job_id}/result").json() == {'summary': "Summary of https://example.com", 'themes': {'0': "Theme"}}
+        assert client.get(f"/jobs/{job_id}/artifacts").json() == {'artifacts': ["report.pdf"]}
+        assert client.get(f"/jobs/{job_id}/artifacts/report.pdf").text == "report"
+        assert client.get(f"/jobs/{job_id}/artifacts/../../config.yaml").status_code == 404
+        assert client.get("/jobs/unknown").status_code == 404
+
+def test_failed_job(config_path):
+    with TestClient(create_app(config_path, runner=StubRunner())) as client:
+        job_id = client.post("/jobs", json={'source': "broken"}).json()['job_id']
+
+        status = wait_for(client, job_id)
+        assert status['status'] == 'failed' and "Could not load document" in status['error']
+        assert client.get(f"/jobs/{job_id}/result").status_code == 409
+
+def test_backpressure(config_path):
+    runner = StubRunner(block=True)
+    with TestClient(create_app(config_path, runner=runner)) as client:
+        # One job runs and one waits; the third is rejected until a slot frees up
+        running = client.post("/jobs", json={'source': "a"})
+        assert running.status_code == 202
+        while client.get(f"/jobs/{running.json()['job_id']}").json()['status'] != 'running':
+            time.sleep(0.01)
+        queued = client.post("/jobs", json={'source': "b"})
+        assert queued.status_code == 202
+        rejected = client.post("/jobs", json={'source': "c"})
+        assert rejected.status_code == 429 and 'retry-after' in rejected.headers
+        assert 'brahmasumm_jobs{status="queued"} 1' in client.get("/metrics").text
+
+        runner.release.set()
+        assert wait_for(client, queued.json()['job_id'])['status'] == 'done'
+        assert client.post("/jobs", json={'source': "c"}).status_code == 202
+
+def test_job_manager_releases_slots(tmp_path):
+    jobs = JobManager(StubRunner(), output_dir=str(tmp_path), max_workers=1, max_pending=0)
+    for _ in range(3):
+        job = jobs.submit("https://example.com", "web")
+        deadline = time.time() + 10
+        while job.status not in ('done', 'failed') and time.time() < deadline:
+            time.sleep(0.01)
+        assert job.status == 'done', "Each finished job should free its slot for the next one"
+    jobs.shutdown()
+
+def test_job_manager_rejects_when_full(tmp_path):
+    runner = StubRunner(block=True)
+    jobs = JobManager(runner, output_dir=str(tmp_path), max_workers=1, max_pending=0)
+    jobs.submit("a", "web")
+    with pytest.raises(QueueFullError):
+        jobs.submit("b", "web")
+    runner.release.set()
+    jobs.shutdown()
+
+def test_shutdown_finishes_running_jobs_and_cancels_queued_ones(tmp_path):
+    runner = StubRunner(block=True)
+    jobs = JobManager(runner, output_dir=str(tmp_path), max_workers=1, max_pending=1)
+    running, queued = jobs.submit("a", "web"), jobs.submit("b", "web")
+    while running.status != 'running':
+        time.sleep(0.01)
+
+    threading.Timer(0.1, runner.release.set).start()
+    jobs.shutdown(wait=True)
+
+    assert running.status == 'done', "Running jobs should finish before shutdown returns"
+    assert queued.status == 'failed' and queued.error == "Cancelled at shutdown"
+    with pytest.raises(QueueFullError):
+        jobs.submit("c", "web")
+
+def test_forgotten_jobs_lose_their_output(tmp_path):
+    jobs = JobManager(StubRunner(), output_dir=str(tmp_path), max_workers=1, max_pending=0, history=1)
+    finished = []
+    for source in ("a", "b", "c"):
+        job = jobs.submit(source, "web")
+        while job.status != 'done':
+            time.sleep(0.01)
+        finished.append(job)
+    jobs.shutdown()
+
+    assert jobs.get(finished[0].id) is None
+    assert not (tmp_path / finished[0].id).exists(), "An evicted job's output directory should be removed"
+    assert (tmp_path / finished[-1].id / "report.pdf").exists()
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from src.clustering.clustering import ClusterManager
+from src.clustering.spherical_kmeans import SphericalKMeans, normalize_rows
+
+@pytest.fixture
+def directional_vectors():
+    # Five directions with vectors of very different lengths: the clusters are only visible by angle
+    rng = np.random.default_rng(0)
+    directions = normalize_rows(rng.normal(size=(5, 32)))
+    topics = np.repeat(np.arange(5), 60)
+    vectors = directions[topics] + rng.normal(scale=0.15, size=(300, 32))
+    vectors *= rng.uniform(0.2, 5.0, size=(300, 1))
+    return vectors, topics
+
+def same_partition(labels, topics):
+    return len(set(zip(labels.tolist(), topics.tolist()))) == len(set(topics.tolist())) == len(set(labels.tolist()))
+
+def test_recovers_clusters_by_angle(directional_vectors):
+    vectors, topics = directional_vectors
+    kmeans = SphericalKMeans(5, block_size=64)
+    labels = kmeans.fit_predict(vectors)
+
+    assert same_partition(labels, topics)
+    np.testing.assert_allclose(np.linalg.norm(kmeans.cluster_centers_, axis=1), 1, rtol=1e-5)
+    assert kmeans.n_iter_ < kmeans.max_iter, "Iterations should stop once the assignments settle"
+    np.testing.assert_array_equal(kmeans.predict(vectors), labels)
+    distances = kmeans.transform(vectors)
+    assert distances.shape == (300, 5) and np.all(distances.argmin(axis=1) == labels)
+
+def test_streamed_blocks_match_in_memory(directional_vectors, tmp_path):
+    vectors, _ = directional_vectors
+    path = tmp_path / "vectors.npy"
+    np.save(path, vectors.astype(np.float32))
+    rows = np.arange(0, 300, 2)
+
+    in_memory = SphericalKMeans(5).fit_predict(vectors[rows])
+    streamed = SphericalKMeans(5, block_size=32, stream=True).fit_predict(np.load(path, mmap_mode='r'), rows)
+
+    np.testing.assert_array_equal(streamed, in_memory)
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_cluster_manager_spherical_engine(directional_vectors, tmp_path, low_memory):
+    vectors, topics = directional_vectors
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(f"clustering_engine: spherical\nlow_memory: {str(low_memory).lower()}\n"
+                           "outlier_detection: true\noutlier_k: 5\noutlier_contamination: 0.05\nn_closest_representatives: 3\n")
+    manager = ClusterManager(None, str(config_file))
+    manager.vectors = vectors.tolist()
+
+    labels, centers = manager.cluster_document(n_clusters=5)
+
+    inliers = labels != -1
+    assert same_partition(labels[inliers], topics[inliers])
+    assert centers.shape == (5, 32)
+    for label, indices in manager.find_n_closest_representatives():
+        assert all(labels[index] == label for index in indices), "Representatives are the chunks closest by cosine"
+
+def test_unknown_engine_is_rejected(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("clustering_engine: hdbscan\n")
+    manager = ClusterManager(None, str(config_file))
+    manager.vectors = np.eye(4).tolist()
+
+    with pytest.raises(ValueError):
+        manager.cluster_document(n_clusters=2)
+
+def test_outliers_are_found_by_angle_under_the_spherical_engine(directional_vectors, tmp_path):
+    vectors, _ = directional_vectors
+    off_topic = normalize_rows(np.random.default_rng(1).normal(size=(4, 32))) * 0.5
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("clustering_engine: spherical\noutlier_k: 5\noutlier_contamination: 0.05\n")
+    manager = ClusterManager(None, str(config_file))
+    manager.vectors = np.concatenate([vectors, off_topic]).tolist()
+
+    outliers = manager.find_outliers()
+
+    assert outliers[300:].all(), "Vectors pointing away from every topic should be outliers"
+    assert outliers.sum() == 4, "Long or short vectors on a topic direction should not be flagged for their length"
@@ -0,0 +1,90 @@
+import yaml
+import pytest
+from unittest.mock import MagicMock
+from src.utils.structured_output import extract_json, parse_cluster_themes
+
+def test_extract_json_skips_prose_and_handles_nesting():
+    text = 'Sure! Here are the themes {not json} ```json\n{"themes": [{"cluster": 0, "theme": "A {braced} theme"}], "meta": {"n": 1}}\n```'
+    value = extract_json(text)
+    assert value['meta'] == {'n': 1}
+    assert value['themes'][0]['theme'] == "A {braced} theme"
+    assert extract_json("no json here") is None
+
+def test_invalid_entries_are_dropped_individually():
+    response = '''{"themes": [
+        {"cluster": 0, "theme": "Chatbot design"},
+        {"cluster": "1", "theme": "Retrieval quality"},
+        {"cluster": 2, "theme": ""},
+        {"cluster": 7, "theme": "Unknown cluster"},
+        {"cluster": 3, "theme": "a theme that goes on far too long to be a useful label for a topic"},
+        {"cluster": 4}
+    ]}'''
+    themes = parse_cluster_themes(response, [0, 1, 2, 3, 4])
+    assert themes == {0: "Chatbot design", 1: "Retrieval quality"}
+
+def test_mapping_responses_are_accepted():
+    response = '{"Cluster 0": {"theme": "Chatbot design"}, "Cluster 1": {"theme": "Evaluation"}}'
+    assert parse_cluster_themes(response, [0, 1]) == {0: "Chatbot design", 1: "Evaluation"}
+
+@pytest.fixture
+def summarizer():
+    from src.summarize import Summarizer
+    summarizer = Summarizer.__new__(Summarizer)
+    with open('config/prompts.yaml') as file:
+        summarizer.prompts = yaml.safe_load(file)
+    summarizer.model_manager = MagicMock()
+    return summarizer
+
+def test_single_call_with_per_cluster_fallback(summarizer):
+    chunks = ["chunk zero", "chunk one", "chunk two", "chunk three"]
+    representatives = [(0, [0, 1]), (1, [2]), (2, [3])]
+    summarizer.model_manager.invoke_llm.side_effect = [
+        'Here you go: {"themes": [{"cluster": 0, "theme": "Zero"}, {"cluster": 2, "theme": "Two"}]}',
+        "One",
+    ]
+
+    themes, cluster_content = summarizer.find_themes_for_clusters(chunks, representatives)
+
+    assert themes == {0: "Zero", 1: "One", 2: "Two"}
+    assert cluster_content[0] == "chunk zero chunk one"
+    prompts = [call.args[0] for call in summarizer.model_manager.invoke_llm.call_args_list]
+    assert all(f"Cluster {label}:\n{chunks[indices[0]]}" in prompts[0] for label, indices in representatives)
+    assert "chunk two" in prompts[1], "Only the cluster missing from the combined response should be retried"
+    assert len(prompts) == 2
+
+def test_schema_errors_follow_the_schema():
+    from src.utils.structured_output import CLUSTER_THEMES_SCHEMA, schema_errors
+
+    assert schema_errors({'themes': [{'cluster': 0, 'theme': "Zero"}]}, CLUSTER_THEMES_SCHEMA) == []
+    errors = schema_errors({'themes': [{'cluster': True, 'theme': ""}, {'theme': "No cluster"}]}, CLUSTER_THEMES_SCHEMA)
+    assert errors == ["$.themes[0].cluster: expected integer, got bool", "$.themes[0].theme: shorter than 1 characters",
+                      "$.themes[1]: missing 'cluster'"]
+
+def test_combined_call_requests_the_schema_and_names_the_source(summarizer):
+    from src.utils.structured_output import CLUSTER_THEMES_SCHEMA
+
+    summarizer.source_description = "a PDF document"
+    summarizer.model_manager.invoke_llm.return_value = '{"themes": [{"cluster": 0, "theme": "Zero"}]}'
+    summarizer.find_themes_for_clusters(["chunk zero"], [(0, [0])])
+
+    call = summarizer.model_manager.invoke_llm.call_args
+    assert call.kwargs['schema'] == CLUSTER_THEMES_SCHEMA
+    assert "clusters of text from a PDF document" in call.args[0]
+
+def test_structured_llm_uses_the_provider_json_mode(tmp_path):
+    from src.models.models import ModelManager
+    from src.models.fakes import FakeLLM
+    from src.utils.structured_output import CLUSTER_THEMES_SCHEMA
+
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("llm_provider: fake\n")
+    manager = ModelManager(str(config_file))
+
+    class Bindable:
+        def bind(self, **kwargs):
+            return kwargs
+
+    assert manager.structured_llm('groq', Bindable(), CLUSTER_THEMES_SCHEMA) == {'response_format': {'type': 'json_object'}}
+    assert manager.structured_llm('ollama', Bindable(), CLUSTER_THEMES_SCHEMA) == {'format': CLUSTER_THEMES_SCHEMA}
+    assert isinstance(manager.structured_llm('fake', manager.llm, CLUSTER_THEMES_SCHEMA), FakeLLM)
+    assert manager.invoke_llm("Name the themes as JSON", schema=CLUSTER_THEMES_SCHEMA)
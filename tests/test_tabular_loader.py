@@ -0,0 +1,62 @@
+import pytest
+from openpyxl import Workbook
+from src.doc_loaders.tabular_loader import TabularLoader, render_row
+from src.doc_loaders.doc_loader import DocumentLoader
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "sales.csv"
+    lines = ["region,product,units,note"]
+    lines += [f"north,widget {i},{i},shipped on time" for i in range(40)]
+    lines.append("south,,,")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    path = tmp_path / "book.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Orders"
+    sheet.append(["id", "customer", "amount"])
+    for i in range(30):
+        sheet.append([i, f"customer {i}", 10.0 * i])
+    returns = workbook.create_sheet("Returns")
+    returns.append([None, None])
+    returns.append(["id", None])
+    returns.append([7, "damaged"])
+    workbook.save(path)
+    return str(path)
+
+def test_render_row_skips_empty_cells():
+    assert render_row(["a", "b", "c"], ["1", None, 2.0]) == "a: 1; c: 2."
+    assert render_row(["a"], [""]) == ""
+
+def test_csv_blocks_respect_target_words(csv_file):
+    blocks = list(TabularLoader(csv_file, target_words=30, chunk_rows=7).iter_blocks())
+
+    rows = [line for block in blocks for line in block.split("\n")[1:]]
+    assert len(rows) == 41, "Every row should be rendered once, across CSV chunk boundaries"
+    assert rows[0] == "region: north; product: widget 0; units: 0; note: shipped on time."
+    assert rows[-1] == "region: south."
+    for block in blocks:
+        assert block.startswith("sales\n")
+        assert len(block.split()) - 1 <= 30, "Blocks should not exceed target_words"
+
+def test_excel_blocks_stay_within_a_sheet(xlsx_file):
+    blocks = TabularLoader(xlsx_file, target_words=50)()
+
+    assert all(block.split("\n")[0] in ("Orders", "Returns") for block in blocks)
+    assert blocks[-1] == "Returns\nid: 7; Column 2: damaged."
+    orders = [line for block in blocks if block.startswith("Orders") for line in block.split("\n")[1:]]
+    assert orders[3] == "id: 3; customer: customer 3; amount: 30."
+    assert len(orders) == 30
+
+def test_document_loader_streams_tabular_directory(tmp_path, csv_file, xlsx_file):
+    loader = DocumentLoader(str(tmp_path), "directory", "*.xlsx")
+    assert loader.is_tabular()
+    blocks = list(loader.iter_blocks(target_words=50))
+    assert blocks and all(block.split("\n")[0] in ("Orders", "Returns") for block in blocks)
+
+    csv_loader = DocumentLoader(csv_file, "csv")
+    assert csv_loader() == "\n\n".join(csv_loader.iter_blocks())
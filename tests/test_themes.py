@@ -0,0 +1,47 @@
+import time
+import pytest
+from src.topic_themes.themes import KeywordThemes
+from benchmarks.synthetic import generate_document
+
+@pytest.fixture
+def keyword_themes(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("theme_keywords_top_n: 2\n")
+    return KeywordThemes(str(config_file))
+
+def test_keywords_are_distinctive_per_cluster(keyword_themes):
+    chunks = [
+        "The vector database stores embeddings for retrieval. Retrieval quality depends on the embeddings.",
+        "Embeddings power retrieval; the vector database answers nearest neighbour queries.",
+        "The election debate covered taxes and healthcare. Voters asked about taxes.",
+        "Healthcare costs and taxes dominated the election debate.",
+    ]
+    keywords = keyword_themes.extract_keywords(chunks, [0, 0, 1, 1])
+
+    assert set(keywords) == {0, 1}
+    assert len(keywords[0]) == 2 and len(keywords[1]) == 2
+    assert any('retrieval' in phrase or 'embeddings' in phrase for phrase in keywords[0])
+    assert any('taxes' in phrase or 'debate' in phrase for phrase in keywords[1])
+    assert not set(keywords[0]) & set(keywords[1])
+
+def test_overlapping_phrases_are_skipped(keyword_themes):
+    chunks = ["vector database vector database vector database", "election taxes"]
+    keywords = keyword_themes.extract_keywords(chunks, [0, 1], top_n=3)
+
+    assert keywords[0][0] == 'vector database'
+    assert 'vector' not in keywords[0] and 'database' not in keywords[0], "Words of a chosen phrase should be skipped"
+
+def test_labels_for_many_chunks_are_fast(keyword_themes):
+    words = generate_document(50000, seed=1).split()
+    chunks = [" ".join(words[i:i + 100]) for i in range(0, len(words), 100)]
+    labels = [i % 13 for i in range(len(chunks))]
+
+    start = time.perf_counter()
+    themes = keyword_themes.find_themes(chunks, labels)
+    elapsed = time.perf_counter() - start
+
+    assert len(themes) == 13 and all(themes.values())
+    assert elapsed < 2.0
+
+def test_chunks_without_words(keyword_themes):
+    assert keyword_themes.find_themes(["the and of", "a an"], [0, 1]) == {0: "Cluster 0", 1: "Cluster 1"}
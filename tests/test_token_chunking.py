@@ -0,0 +1,108 @@
+import pytest
+import yaml
+
+pytest.importorskip("tokenizers")
+
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors, trainers
+from benchmarks.synthetic import generate_document
+from src.chunking.token_chunking import TokenChunker
+from src.chunking.textchunking import ChunkManager
+
+@pytest.fixture(scope="module")
+def tokenizer_path(tmp_path_factory):
+    """
+    Trains a small BERT-style WordPiece tokenizer that adds [CLS] and [SEP] to every text.
+    """
+    path = tmp_path_factory.mktemp("tokenizer") / "tokenizer.json"
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    trainer = trainers.WordPieceTrainer(vocab_size=500, special_tokens=["[PAD]", "[UNK]", "[CLS]", "[SEP]"])
+    tokenizer.train_from_iterator([generate_document(2000, seed=seed) for seed in range(3)], trainer)
+    tokenizer.post_processor = processors.TemplateProcessing(single="[CLS] $A [SEP]",
+                                                             special_tokens=[("[CLS]", 2), ("[SEP]", 3)])
+    tokenizer.save(str(path))
+    return str(path)
+
+@pytest.fixture(scope="module", params=["bytelevel", "metaspace"])
+def spaced_tokenizer_path(request, tmp_path_factory):
+    """
+    Trains a tokenizer that marks the space before a word, so a word is tokenized differently
+    with and without one: ByteLevel BPE (RoBERTa, GPT-2) or Metaspace Unigram (XLM-R, e5).
+    """
+    path = tmp_path_factory.mktemp(request.param) / "tokenizer.json"
+    documents = [generate_document(2000, seed=seed) for seed in range(3)]
+    if request.param == "bytelevel":
+        tokenizer = Tokenizer(models.BPE())
+        tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+        trainer = trainers.BpeTrainer(vocab_size=500, initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+                                      special_tokens=["<s>", "</s>"])
+    else:
+        tokenizer = Tokenizer(models.Unigram())
+        tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+        trainer = trainers.UnigramTrainer(vocab_size=500, special_tokens=["<s>", "</s>", "<unk>"], unk_token="<unk>")
+    tokenizer.train_from_iterator(documents, trainer)
+    tokenizer.post_processor = processors.TemplateProcessing(single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 1)])
+    tokenizer.save(str(path))
+    return str(path)
+
+def test_chunks_fit_the_token_budget(tokenizer_path):
+    chunker = TokenChunker(tokenizer_path, max_tokens=48, batch_size=5)
+    paragraphs = generate_document(3000, seed=7).split("\n\n")
+    paragraphs.append(" ".join(["Unbelievablylongwordwithoutend and more"] * 40))
+
+    chunks = list(chunker.iter_chunks(paragraphs))
+
+    counts = [chunker.count_tokens(chunk) for chunk in chunks]
+    assert max(counts) <= 48, "No chunk should exceed max_tokens, special tokens included"
+    assert sum(counts) / len(counts) > 40, "Chunks should be packed close to the budget"
+    assert " ".join(chunks).split() == " ".join(paragraphs).split(), "Words should be kept whole and in order"
+
+def test_spaced_tokenizers_fit_the_token_budget(spaced_tokenizer_path):
+    chunker = TokenChunker(spaced_tokenizer_path, max_tokens=48, batch_size=5)
+    paragraphs = generate_document(3000, seed=7).split("\n\n")
+    paragraphs.append(" ".join(["Unbelievablylongwordwithoutend and more"] * 40))
+
+    chunks = list(chunker.iter_chunks(paragraphs))
+
+    counts = [chunker.count_tokens(chunk) for chunk in chunks]
+    assert max(counts) <= 48, "Pieces tokenized differently inside a chunk should not push it over max_tokens"
+    assert sum(counts) / len(counts) > 30
+    assert " ".join(chunks).split() == " ".join(paragraphs).split(), "Words should be kept whole and in order"
+
+def test_paragraphs_that_fit_are_not_split(tokenizer_path):
+    chunker = TokenChunker(tokenizer_path, max_tokens=64)
+    paragraphs = ["taxes and wages grew.", "the hospital hired nurses.", "students paid tuition."]
+
+    assert list(chunker.iter_chunks(paragraphs)) == [" ".join(paragraphs)]
+    # The trained vocabulary can differ between runs, so the budget is taken from the longest paragraph
+    small = TokenChunker(tokenizer_path, max_tokens=max(chunker.count_tokens(paragraph) for paragraph in paragraphs))
+    assert list(small.iter_chunks(paragraphs)) == paragraphs
+
+def test_max_tokens_must_leave_room_for_text(tokenizer_path):
+    with pytest.raises(ValueError):
+        TokenChunker(tokenizer_path, max_tokens=2)
+
+def test_chunk_manager_token_mode(tmp_path, tokenizer_path):
+    with open('config/config.yaml') as f:
+        config = yaml.safe_load(f)
+    config.update({'chunk_mode': 'tokens', 'chunk_max_tokens': 40, 'chunk_tokenizer_path': tokenizer_path})
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    chunk_manager = ChunkManager(str(config_path))
+    text = generate_document(1500, seed=3)
+
+    chunk_manager.chunk(chunk_manager.preprocess_text(text))
+
+    chunks = chunk_manager.get_chunks()
+    assert chunks and all(chunk_manager.token_chunker.count_tokens(chunk) <= 40 for chunk in chunks)
+    pages = [text[i:i + 500] for i in range(0, len(text), 500)]
+    assert list(chunk_manager.iter_chunks(pages)) == chunks
+
+def test_token_mode_needs_a_tokenizer(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("chunk_mode: tokens\nembedding_provider: fake\n")
+    chunk_manager = ChunkManager(str(config_path))
+
+    with pytest.raises(ValueError, match="chunk_tokenizer_path"):
+        chunk_manager.chunk("Some text to chunk.")
@@ -0,0 +1,44 @@
+import os
+import pytest
+import numpy as np
+from concurrent.futures import Future
+from src.visualize.visualize import Visualizer
+from src.outputs.report_generate import create_final_report
+
+@pytest.fixture
+def visualizer():
+    visualizer = Visualizer(config_path='config/config.yaml')
+    yield visualizer
+    visualizer.shutdown()
+
+@pytest.fixture
+def clustered_vectors():
+    # Three well separated blobs of 20 vectors each
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(3, 16)) * 10
+    vectors = np.vstack([center + rng.normal(size=(20, 16)) for center in centers])
+    labels = np.repeat(np.arange(3), 20)
+    themes = {0: "First theme", 1: "Second theme", 2: "Third theme"}
+    return vectors, labels, themes
+
+def test_plot_clusters_in_background(visualizer, clustered_vectors, tmp_path):
+    vectors, labels, themes = clustered_vectors
+    output_image = str(tmp_path / "umap.png")
+
+    future = visualizer.plot_clusters_in_background(vectors, themes, labels, n_neighbors=5, output_image=output_image)
+
+    # The call must return immediately with a handle instead of blocking on the plot
+    assert isinstance(future, Future), "Background plotting should return a Future"
+    assert future.result(timeout=300) == output_image
+    assert os.path.exists(output_image), "The UMAP plot should be saved to disk"
+
+def test_report_resolves_pending_image(clustered_vectors, tmp_path):
+    vectors, labels, themes = clustered_vectors
+    image_future = Future()
+    image_future.set_result(str(tmp_path / "missing.png"))
+    data = {'summary': '<p>Summary</p>', 'labels': labels.tolist(), 'themes': themes, 'umap_image_path': image_future}
+
+    report_path = str(tmp_path / "report.pdf")
+    create_final_report(data, report_path=report_path)
+
+    assert os.path.exists(report_path), "The report should be built once the image path is resolved"